@@ -5,12 +5,35 @@ from django.db.models import Sum, Count, Q
 from django.utils import timezone
 from .models import (
     Classe, Maquette, PreContrat, ModulePropose, Contrat,
-    Pointage, DocumentContrat, PaiementContrat, ActionLog, Groupe
+    Pointage, DocumentContrat, PaiementContrat, ActionLog, Groupe,
+    SequenceReference, CampagnePaie, ExportJob
 )
 from Utilisateur.models import CustomUser
 
 from decimal import Decimal
 from django.urls import reverse
+from django.contrib import messages
+from django.core.exceptions import ValidationError
+
+
+def rapporter_transitions(modeladmin, request, resultats, message_succes):
+    """
+    Affiche le bilan d'une transition en masse : une erreur par objet refusé,
+    puis le nombre d'objets traités
+    """
+    succes = 0
+    for pk, resultat in resultats.items():
+        if resultat['succes']:
+            succes += 1
+        else:
+            modeladmin.message_user(
+                request,
+                f"Erreur avec {resultat['reference'] or f'#{pk}'}: {resultat['message']}",
+                messages.ERROR
+            )
+    
+    if succes > 0:
+        modeladmin.message_user(request, message_succes.format(succes), messages.SUCCESS)
 
 # ==========================================
 # ADMIN CLASSE
@@ -245,6 +268,8 @@ class PreContratAdmin(admin.ModelAdmin):
         'professeur_display',
         'classe_display', 
         'statut_badge',
+        'modules_progression',
+        'montant_total_display',
         'date_creation_format',
         'actions_simplifiees'  # Inclut la suppression
     ]
@@ -342,6 +367,17 @@ class PreContratAdmin(admin.ModelAdmin):
         return obj.date_creation.strftime('%d/%m/%Y')
     date_creation_format.short_description = 'Créé le'
     
+    def modules_progression(self, obj):
+        """Modules validés / total (annotations de with_stats)"""
+        return f"{obj.modules_valides_count}/{obj.nombre_modules} ({obj.progression_pourcentage:.0f}%)"
+    modules_progression.short_description = 'Modules validés'
+    modules_progression.admin_order_field = 'stats_nombre_modules'
+    
+    def montant_total_display(self, obj):
+        return f"{obj.get_montant_total():,.0f} FCFA".replace(',', ' ')
+    montant_total_display.short_description = 'Montant estimé'
+    montant_total_display.admin_order_field = 'stats_montant_total'
+    
     def actions_simplifiees(self, obj):
         """Actions incluant la suppression"""
         detail_url = reverse('admin:Gestion_precontrat_change', args=[obj.id])
@@ -401,53 +437,19 @@ class PreContratAdmin(admin.ModelAdmin):
     # ==========================================
     
     def soumettre_selection(self, request, queryset):
-        """Soumet les précontrats sélectionnés"""
-        count = 0
-        for precontrat in queryset:
-            try:
-                if hasattr(precontrat, 'soumettre'):
-                    precontrat.soumettre(user=request.user)
-                precontrat.status = 'SUBMITTED'
-                precontrat.save()
-                count += 1
-            except Exception as e:
-                self.message_user(
-                    request, 
-                    f"Erreur avec {precontrat.reference}: {str(e)}", 
-                    messages.ERROR
-                )
-        
-        if count > 0:
-            self.message_user(
-                request, 
-                f"📨 {count} précontrat(s) soumis avec succès", 
-                messages.SUCCESS
-            )
+        """Soumet les précontrats sélectionnés (transition en masse)"""
+        resultats = queryset.soumettre(user=request.user)
+        rapporter_transitions(self, request, resultats, "📨 {} précontrat(s) soumis avec succès")
     soumettre_selection.short_description = "📨 Soumettre la sélection"
     
     def valider_selection(self, request, queryset):
-        """Valide les précontrats sélectionnés"""
-        count = 0
-        for precontrat in queryset:
-            try:
-                if hasattr(precontrat, 'valider'):
-                    precontrat.valider(user=request.user)
-                precontrat.status = 'VALIDATED'
-                precontrat.save()
-                count += 1
-            except Exception as e:
-                self.message_user(
-                    request, 
-                    f"Erreur avec {precontrat.reference}: {str(e)}", 
-                    messages.ERROR
-                )
-        
-        if count > 0:
-            self.message_user(
-                request, 
-                f"✅ {count} précontrat(s) validés avec succès", 
-                messages.SUCCESS
-            )
+        """Valide les précontrats sélectionnés (transition en masse)"""
+        try:
+            resultats = queryset.valider(user=request.user)
+        except ValidationError as e:
+            self.message_user(request, e.messages[0], messages.ERROR)
+            return
+        rapporter_transitions(self, request, resultats, "✅ {} précontrat(s) validés avec succès")
     valider_selection.short_description = "✅ Valider la sélection"
     
     # ==========================================
@@ -478,8 +480,8 @@ class PreContratAdmin(admin.ModelAdmin):
     statut_badge_display.short_description = 'Statut actuel'
     
     def get_queryset(self, request):
-        """Optimisation simple des requêtes"""
-        return super().get_queryset(request).select_related('professeur', 'classe')
+        """Optimisation des requêtes : statistiques des modules annotées"""
+        return super().get_queryset(request).with_stats().select_related('professeur', 'classe')
 
 # ==========================================
 # ADMIN MODULE PROPOSÉ
@@ -595,7 +597,7 @@ class ContratAdmin(admin.ModelAdmin):
         'volumes_display', 'date_validation'
     ]
     list_filter = [
-        'status', 'type_enseignement', 
+        'status', 'annee_academique', 'type_enseignement', 
         'date_debut_prevue', 'date_fin_prevue'
     ]
     search_fields = [
@@ -710,6 +712,14 @@ class ContratAdmin(admin.ModelAdmin):
         )
     groupes_count.short_description = 'Groupes'
     
+    actions = ['terminer_selection']
+    
+    def terminer_selection(self, request, queryset):
+        """Termine les cours sélectionnés (transition en masse)"""
+        resultats = queryset.terminer(request.user)
+        rapporter_transitions(self, request, resultats, "🏁 {} contrat(s) terminé(s)")
+    terminer_selection.short_description = "🏁 Terminer les cours sélectionnés"
+    
     # Ajouter le filtre par groupes
     list_filter = [
         'status', 'type_enseignement', 
@@ -879,7 +889,7 @@ class PaiementContratAdmin(admin.ModelAdmin):
         'mode_paiement', 'date_creation', 'date_paiement'
     ]
     list_filter = [
-        'status', 'mode_paiement', 'date_creation',
+        'status', 'mode_paiement', 'campagne', 'date_creation',
         'date_paiement', 'date_approbation'
     ]
     search_fields = [
@@ -895,7 +905,7 @@ class PaiementContratAdmin(admin.ModelAdmin):
     
     fieldsets = (
         ('Informations principales', {
-            'fields': ('contrat', 'professeur', 'status')
+            'fields': ('contrat', 'professeur', 'campagne', 'status')
         }),
         ('Montants', {
             'fields': (
@@ -968,25 +978,9 @@ class PaiementContratAdmin(admin.ModelAdmin):
     status_badge.short_description = 'Statut'
     
     def approuver_paiements(self, request, queryset):
-        """Approuve les paiements sélectionnés"""
-        count = 0
-        for paiement in queryset:
-            if paiement.status == 'PENDING':
-                try:
-                    paiement.approuver(request.user)
-                    count += 1
-                except Exception as e:
-                    self.message_user(
-                        request,
-                        f'Erreur pour le paiement #{paiement.id}: {str(e)}',
-                        level='error'
-                    )
-        
-        if count > 0:
-            self.message_user(
-                request,
-                f'{count} paiement(s) approuvé(s) avec succès.'
-            )
+        """Approuve les paiements sélectionnés (transition en masse)"""
+        resultats = queryset.approuver(request.user)
+        rapporter_transitions(self, request, resultats, '{} paiement(s) approuvé(s) avec succès.')
     approuver_paiements.short_description = 'Approuver les paiements sélectionnés'
     
     def save_model(self, request, obj, form, change):
@@ -1056,4 +1050,72 @@ class ActionLogAdmin(admin.ModelAdmin):
         return False
     
     def has_delete_permission(self, request, obj=None):
-        return False
\ No newline at end of file
+        return False
+
+
+# ==========================================
+# ADMIN SÉQUENCES DE RÉFÉRENCE
+# ==========================================
+
+@admin.register(SequenceReference)
+class SequenceReferenceAdmin(admin.ModelAdmin):
+    """Consultation des compteurs de références (modifiés uniquement par le code)"""
+    
+    list_display = ['cle', 'valeur', 'updated_at']
+    search_fields = ['cle']
+    readonly_fields = ['cle', 'valeur', 'updated_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    """Suivi des exports produits en arrière-plan (créés par les demandes)"""
+    
+    list_display = ['id', 'type_export', 'status', 'demande_par', 'nombre_demandes', 'taille', 'created_at', 'expire_le']
+    list_filter = ['status', 'type_export']
+    readonly_fields = [
+        'type_export', 'parametres', 'empreinte', 'status', 'fichier', 'taille', 'erreur',
+        'demande_par', 'nombre_demandes', 'created_at', 'date_debut', 'date_fin', 'expire_le'
+    ]
+    
+    def has_add_permission(self, request):
+        return False
+
+
+# ==========================================
+# ADMIN CAMPAGNE DE PAIE
+# ==========================================
+
+class PaiementCampagneInline(admin.TabularInline):
+    model = PaiementContrat
+    extra = 0
+    fields = ['contrat', 'professeur', 'montant_brut', 'montant_deductions', 'montant_net', 'status']
+    readonly_fields = fields
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(CampagnePaie)
+class CampagnePaieAdmin(admin.ModelAdmin):
+    """Consultation des campagnes de paie (pilotées depuis l'interface comptable)"""
+    
+    list_display = [
+        'reference', 'periode_debut', 'periode_fin', 'status',
+        'nombre_paiements', 'montant_net_total', 'date_creation'
+    ]
+    list_filter = ['status', 'date_creation']
+    search_fields = ['reference']
+    readonly_fields = [
+        'reference', 'nombre_paiements', 'montant_brut_total',
+        'montant_deductions_total', 'montant_net_total',
+        'cree_par', 'approuve_par', 'paye_par',
+        'date_creation', 'date_approbation', 'date_paiement', 'updated_at'
+    ]
+    inlines = [PaiementCampagneInline]
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GestionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Gestion'
+
+    def ready(self):
+        import Gestion.signals  # Importer les signaux
@@ -0,0 +1,390 @@
+"""
+Exports produits en arrière-plan (jobs)
+
+Chaque type d'export déclare son libellé, l'extension du fichier, les rôles
+autorisés, ses paramètres (avec leur conversion) et la fonction qui écrit
+le fichier. Une demande normalise les paramètres et calcule une empreinte
+(type, paramètres, versions des tags de données de cache_tableaux, tenues
+en base donc communes aux workers web et à `traiter_exports`) : une
+demande identique rejoint le job en cours ou réutilise le fichier produit
+tant qu'il n'a pas expiré, et toute modification des données concernées
+donne une nouvelle empreinte.
+
+Les jobs EN ATTENTE sont produits par la commande `traiter_exports`
+(worker) dans MEDIA_ROOT/exports, ou par un thread du processus web si
+EXPORT_THREAD_INTEGRE est actif (par défaut en DEBUG). Les fichiers sont
+conservés EXPORT_RETENTION secondes puis purgés.
+"""
+
+import hashlib
+import json
+import logging
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from Utilisateur import cache_tableaux
+from Utilisateur.models import Professeur
+
+from .models import CampagnePaie, Contrat, ExportJob, PaiementContrat
+from .services import CampagnePaieService
+from .utils import (
+    ecrire_contrats_excel, ecrire_fiches_zip, ecrire_paiements_excel,
+    generate_rapport_professeur, generate_statistiques_contrats
+)
+
+logger = logging.getLogger(__name__)
+
+EXPORT_RETENTION = getattr(settings, 'EXPORT_RETENTION', 60 * 60 * 24)
+# Un job EN COURS depuis plus longtemps est considéré abandonné (worker arrêté)
+EXPORT_TIMEOUT = getattr(settings, 'EXPORT_TIMEOUT', 60 * 60)
+EXPORT_THREAD_INTEGRE = getattr(settings, 'EXPORT_THREAD_INTEGRE', settings.DEBUG)
+
+TypeExport = namedtuple(
+    'TypeExport', ['libelle', 'extension', 'roles', 'tags', 'parametres', 'requis', 'produire']
+)
+
+
+# ==========================================
+# PRODUCTION DES FICHIERS
+# ==========================================
+
+def _ecrire_json(donnees, fichier):
+    fichier.write(json.dumps(donnees, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2).encode('utf-8'))
+
+
+def produire_contrats_excel(parametres, fichier):
+    contrats = Contrat.objects.all()
+    if 'annee' in parametres:
+        contrats = contrats.filter(annee_academique=parametres['annee'])
+    if 'classe' in parametres:
+        contrats = contrats.filter(classe_id=parametres['classe'])
+    if 'professeur' in parametres:
+        contrats = contrats.filter(professeur_id=parametres['professeur'])
+    if 'status' in parametres:
+        contrats = contrats.filter(status=parametres['status'])
+    ecrire_contrats_excel(contrats, fichier)
+
+
+def produire_fiches_contrats(parametres, fichier):
+    contrats = Contrat.objects.filter(annee_academique=parametres['annee'])
+    if 'classe' in parametres:
+        contrats = contrats.filter(classe_id=parametres['classe'])
+    if 'status' in parametres:
+        contrats = contrats.filter(status=parametres['status'])
+    ecrire_fiches_zip(contrats, fichier)
+
+
+def produire_paiements_excel(parametres, fichier):
+    paiements = PaiementContrat.objects.all()
+    if 'campagne' in parametres:
+        paiements = paiements.filter(campagne_id=parametres['campagne'])
+    if 'status' in parametres:
+        paiements = paiements.filter(status=parametres['status'])
+    ecrire_paiements_excel(paiements, fichier)
+
+
+def produire_recus_campagne(parametres, fichier):
+    campagne = CampagnePaie.objects.get(pk=parametres['campagne'])
+    fichier.write(CampagnePaieService.recus_pdf(campagne))
+
+
+def produire_rapport_professeur(parametres, fichier):
+    professeur = Professeur.objects.select_related('user').get(pk=parametres['professeur'])
+    annee = parametres.get('annee') or Contrat.annee_academique_de()
+    _ecrire_json(generate_rapport_professeur(professeur, annee), fichier)
+
+
+def produire_statistiques_contrats(parametres, fichier):
+    _ecrire_json(
+        generate_statistiques_contrats(parametres['date_debut'], parametres['date_fin']),
+        fichier
+    )
+
+
+# ==========================================
+# REGISTRE
+# ==========================================
+
+def _annee(valeur):
+    annee = Contrat.normaliser_annee(valeur)
+    if len(annee) != 9 or not annee[:4].isdigit() or not annee[5:].isdigit():
+        raise ValueError(f"Année académique invalide : {valeur}")
+    return annee
+
+
+def _date(valeur):
+    return date.fromisoformat(str(valeur)).isoformat()
+
+
+def _texte(valeur):
+    return str(valeur).strip()
+
+
+TYPES = {
+    'contrats_excel': TypeExport(
+        'Contrats (Excel)', 'xlsx',
+        ['RESP_RH', 'RESP_PEDA', 'COMPTABLE', 'ADMIN'],
+        ('contrats', 'pointages'),
+        {'annee': _annee, 'classe': int, 'professeur': int, 'status': _texte},
+        (),
+        produire_contrats_excel,
+    ),
+    'fiches_contrats': TypeExport(
+        'Fiches de contrat (ZIP)', 'zip',
+        ['RESP_RH', 'RESP_PEDA', 'ADMIN'],
+        ('contrats',),
+        {'annee': _annee, 'classe': int, 'status': _texte},
+        ('annee',),
+        produire_fiches_contrats,
+    ),
+    'paiements_excel': TypeExport(
+        'Paiements (Excel)', 'xlsx',
+        ['COMPTABLE', 'ADMIN'],
+        ('paiements',),
+        {'campagne': int, 'status': _texte},
+        (),
+        produire_paiements_excel,
+    ),
+    'recus_campagne': TypeExport(
+        'Reçus de campagne (PDF)', 'pdf',
+        ['COMPTABLE', 'ADMIN'],
+        ('paiements',),
+        {'campagne': int},
+        ('campagne',),
+        produire_recus_campagne,
+    ),
+    'rapport_professeur': TypeExport(
+        'Rapport professeur (JSON)', 'json',
+        ['RESP_RH', 'RESP_PEDA', 'ADMIN'],
+        ('contrats', 'pointages'),
+        {'professeur': int, 'annee': _annee},
+        ('professeur',),
+        produire_rapport_professeur,
+    ),
+    'statistiques_contrats': TypeExport(
+        'Statistiques des contrats (JSON)', 'json',
+        ['RESP_RH', 'RESP_PEDA', 'COMPTABLE', 'ADMIN'],
+        ('contrats', 'pointages'),
+        {'date_debut': _date, 'date_fin': _date},
+        ('date_debut', 'date_fin'),
+        produire_statistiques_contrats,
+    ),
+}
+
+
+def normaliser(type_export, donnees):
+    """
+    Paramètres retenus et convertis d'une demande (clés inconnues ignorées)
+
+    Raises:
+        KeyError: type inconnu
+        ValueError: paramètre requis manquant ou invalide
+    """
+    definition = TYPES[type_export]
+    parametres = {}
+    for nom, convertir in definition.parametres.items():
+        valeur = donnees.get(nom)
+        if valeur in (None, ''):
+            continue
+        try:
+            parametres[nom] = convertir(valeur)
+        except (TypeError, ValueError):
+            raise ValueError(f"Paramètre invalide : {nom}")
+    manquants = [nom for nom in definition.requis if nom not in parametres]
+    if manquants:
+        raise ValueError(f"Paramètre(s) requis : {', '.join(manquants)}")
+    return parametres
+
+
+def empreinte(type_export, parametres):
+    """Hash du type, des paramètres et des versions (en base) des tags de données"""
+    versions = cache_tableaux.versions(TYPES[type_export].tags)
+    contenu = json.dumps([type_export, parametres, versions], sort_keys=True)
+    return hashlib.sha256(contenu.encode()).hexdigest()
+
+
+# ==========================================
+# DEMANDES
+# ==========================================
+
+def _reutilisable(signature):
+    """Job actif ou fichier non expiré de même empreinte"""
+    for job in ExportJob.objects.filter(
+        empreinte=signature,
+        status__in=['PENDING', 'RUNNING', 'DONE'],
+    ).order_by('-created_at')[:2]:
+        if job.status != 'DONE' or job.est_disponible:
+            return job
+    return None
+
+
+class DemandeConcurrente(Exception):
+    """Le job d'une demande n'a pu être ni créé ni rejoint (concurrence persistante)"""
+
+
+DEMANDE_TENTATIVES = 3
+
+
+def demander(type_export, donnees, user):
+    """
+    Crée le job d'un export, ou rejoint le job identique existant
+
+    Returns:
+        tuple: (job, cree)
+
+    Raises:
+        DemandeConcurrente: job identique créé puis terminé en échec (ou
+            annulé) à chaque tentative
+    """
+    parametres = normaliser(type_export, donnees)
+    signature = empreinte(type_export, parametres)
+
+    for _ in range(DEMANDE_TENTATIVES):
+        job = _reutilisable(signature)
+        if job is not None:
+            ExportJob.objects.filter(pk=job.pk).update(nombre_demandes=F('nombre_demandes') + 1)
+            return job, False
+
+        try:
+            with transaction.atomic():
+                job = ExportJob.objects.create(
+                    type_export=type_export,
+                    parametres=parametres,
+                    empreinte=signature,
+                    demande_par=user,
+                )
+        except IntegrityError:
+            # Demande identique créée entre-temps : la rejoindre, ou créer
+            # à nouveau si elle a échoué ou a été annulée depuis
+            continue
+
+        logger.info(f"📦 Export {type_export} #{job.pk} demandé par {user}")
+        if EXPORT_THREAD_INTEGRE:
+            transaction.on_commit(lancer_thread)
+        return job, True
+
+    logger.warning(f"⚠️ Export {type_export} : job ni créé ni rejoint après {DEMANDE_TENTATIVES} tentatives")
+    raise DemandeConcurrente(signature)
+
+
+# ==========================================
+# PRODUCTION (WORKER)
+# ==========================================
+
+def reserver():
+    """
+    Réserve le plus ancien job en attente (UPDATE conditionnel : un job
+    n'est pris que par un seul worker)
+    """
+    while True:
+        job = ExportJob.objects.filter(status='PENDING').order_by('created_at').first()
+        if job is None:
+            return None
+        if ExportJob.objects.filter(pk=job.pk, status='PENDING').update(
+            status='RUNNING', date_debut=timezone.now()
+        ):
+            job.refresh_from_db()
+            return job
+
+
+def executer(job):
+    """Produit le fichier d'un job réservé ; le job passe TERMINÉ ou ÉCHEC"""
+    definition = TYPES.get(job.type_export)
+    start = time.perf_counter()
+    try:
+        if definition is None:
+            raise KeyError(f"Type d'export inconnu : {job.type_export}")
+        with tempfile.TemporaryFile() as fichier:
+            definition.produire(job.parametres, fichier)
+            fichier.seek(0)
+            nom = f"{job.type_export}_{timezone.now():%Y%m%d_%H%M%S}_{job.empreinte[:8]}.{definition.extension}"
+            job.fichier.save(nom, File(fichier), save=False)
+    except Exception as e:
+        logger.exception(f"❌ Export {job.type_export} #{job.pk} en échec")
+        job.status = 'FAILED'
+        job.erreur = str(e)
+    else:
+        job.status = 'DONE'
+        job.taille = job.fichier.size
+        logger.info(
+            f"✅ Export {job.type_export} #{job.pk} produit en "
+            f"{(time.perf_counter() - start) * 1000:.0f} ms ({job.taille} octets)"
+        )
+
+    job.date_fin = timezone.now()
+    job.expire_le = job.date_fin + timedelta(seconds=EXPORT_RETENTION)
+    job.save(update_fields=['status', 'erreur', 'fichier', 'taille', 'date_fin', 'expire_le'])
+    return job
+
+
+def relancer_bloques():
+    """Remet en attente les jobs EN COURS depuis plus de EXPORT_TIMEOUT"""
+    return ExportJob.objects.filter(
+        status='RUNNING',
+        date_debut__lt=timezone.now() - timedelta(seconds=EXPORT_TIMEOUT),
+    ).update(status='PENDING', date_debut=None)
+
+
+def traiter(limite=None):
+    """
+    Produit les jobs en attente, du plus ancien au plus récent
+
+    Returns:
+        int: nombre de jobs traités
+    """
+    relancer_bloques()
+    nombre = 0
+    while limite is None or nombre < limite:
+        job = reserver()
+        if job is None:
+            break
+        executer(job)
+        nombre += 1
+    return nombre
+
+
+def purger():
+    """
+    Supprime les jobs terminés ou en échec expirés, et leurs fichiers
+
+    Returns:
+        int: nombre de jobs supprimés
+    """
+    expires = ExportJob.objects.filter(
+        status__in=['DONE', 'FAILED'],
+        expire_le__lt=timezone.now(),
+    )
+    nombre = 0
+    for job in expires.iterator(chunk_size=500):
+        if job.fichier:
+            job.fichier.delete(save=False)
+        job.delete()
+        nombre += 1
+    if nombre:
+        logger.info(f"🗑️ {nombre} export(s) expiré(s) supprimé(s)")
+    return nombre
+
+
+def _traiter_en_thread():
+    try:
+        traiter()
+    finally:
+        connection.close()
+
+
+def lancer_thread():
+    """
+    Produit les jobs en attente dans un thread du processus courant (la
+    réservation conditionnelle évite qu'un job soit produit deux fois)
+    """
+    threading.Thread(target=_traiter_en_thread, name='exports', daemon=True).start()
@@ -417,6 +417,119 @@ class PointageForm(forms.ModelForm):
                 pointage.groupes.set(groupes_selectionnes)
         
         return pointage
+
+
+# ============================================================================
+# SAISIE GROUPÉE DES POINTAGES
+# ============================================================================
+
+class PointageBatchLigneForm(forms.Form):
+    """
+    Une ligne de la grille de saisie groupée : contrat × date × heures × groupes
+
+    Les choix (contrats en cours, groupes) sont calculés une seule fois par
+    la vue et partagés par toutes les lignes du formset.
+    """
+
+    contrat = forms.TypedChoiceField(
+        coerce=int,
+        label="Contrat",
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'})
+    )
+    date_seance = forms.DateField(
+        label="Date",
+        widget=forms.DateInput(attrs={
+            'class': 'form-control form-control-sm',
+            'type': 'date'
+        })
+    )
+    heure_debut = forms.TimeField(
+        required=False,
+        label="Début",
+        widget=forms.TimeInput(attrs={
+            'class': 'form-control form-control-sm',
+            'type': 'time'
+        })
+    )
+    heure_fin = forms.TimeField(
+        required=False,
+        label="Fin",
+        widget=forms.TimeInput(attrs={
+            'class': 'form-control form-control-sm',
+            'type': 'time'
+        })
+    )
+    heures_cours = forms.DecimalField(
+        required=False,
+        max_digits=5,
+        decimal_places=2,
+        min_value=Decimal('0'),
+        label="CM",
+        widget=forms.NumberInput(attrs={
+            'class': 'form-control form-control-sm',
+            'step': '0.5',
+            'min': '0',
+            'max': '8',
+            'placeholder': '0.0'
+        })
+    )
+    heures_td = forms.DecimalField(
+        required=False,
+        max_digits=5,
+        decimal_places=2,
+        min_value=Decimal('0'),
+        label="TD",
+        widget=forms.NumberInput(attrs={
+            'class': 'form-control form-control-sm',
+            'step': '0.5',
+            'min': '0',
+            'max': '8',
+            'placeholder': '0.0'
+        })
+    )
+    groupes = forms.TypedMultipleChoiceField(
+        coerce=int,
+        label="Groupes",
+        widget=forms.SelectMultiple(attrs={
+            'class': 'form-select form-select-sm',
+            'size': '3'
+        })
+    )
+
+    def __init__(self, *args, contrat_choices=(), groupe_choices=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['contrat'].choices = [('', '---------')] + list(contrat_choices)
+        self.fields['groupes'].choices = list(groupe_choices)
+
+    def clean(self):
+        cleaned_data = super().clean()
+
+        cours = cleaned_data.get('heures_cours') or Decimal('0')
+        td = cleaned_data.get('heures_td') or Decimal('0')
+        cleaned_data['heures_cours'] = cours
+        cleaned_data['heures_td'] = td
+
+        if cours + td == 0:
+            raise ValidationError(
+                'Vous devez renseigner au moins un type d\'heures (cours ou TD)'
+            )
+
+        debut = cleaned_data.get('heure_debut')
+        fin = cleaned_data.get('heure_fin')
+        if debut and fin and fin <= debut:
+            raise ValidationError('L\'heure de fin doit être postérieure à l\'heure de début')
+
+        return cleaned_data
+
+
+PointageBatchFormSet = forms.formset_factory(
+    PointageBatchLigneForm,
+    extra=5,
+    min_num=1,
+    validate_min=True,
+)
+
+
 #==============================================
 # FORMULAIRES POUR DOCUMENTS
 # ============================================================================
@@ -527,6 +640,53 @@ class PaiementExecuteForm(forms.Form):
     )
 
 
+class CampagnePaieForm(forms.Form):
+    """
+    Lancement d'une campagne de paie : période de fin des cours et taux
+    de retenue appliqué au montant brut.
+    """
+    
+    periode_debut = forms.DateField(
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'date'
+        }),
+        label='Début de période'
+    )
+    
+    periode_fin = forms.DateField(
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'date'
+        }),
+        label='Fin de période',
+        initial=date.today
+    )
+    
+    taux_deductions = forms.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        min_value=Decimal('0'),
+        max_value=Decimal('100'),
+        widget=forms.NumberInput(attrs={
+            'class': 'form-control',
+            'step': '0.01'
+        }),
+        label='Taux de retenue (%)',
+        help_text='Impôts, cotisations... appliqués au montant brut'
+    )
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        debut = cleaned_data.get('periode_debut')
+        fin = cleaned_data.get('periode_fin')
+        
+        if debut and fin and fin < debut:
+            raise ValidationError("La fin de période doit être postérieure au début")
+        
+        return cleaned_data
+
+
 # ============================================================================
 # FORMULAIRES DE RECHERCHE ET FILTRES
 # ============================================================================
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Gestion.models import Contrat
+from Gestion.utils import ecrire_fiches_zip
+
+
+class Command(BaseCommand):
+    help = (
+        'Générer les fiches PDF des contrats d\'une classe et / ou d\'une année '
+        'académique dans une archive ZIP (rendu en parallèle)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--classe', type=int, help='Classe (ID)')
+        parser.add_argument('--annee', help='Année académique (2025 ou 2025-2026)')
+        parser.add_argument('--status', help='Statut des contrats (ex: IN_PROGRESS)')
+        parser.add_argument(
+            '--processus',
+            type=int,
+            help='Nombre de processus de rendu (défaut : FICHES_PROCESSUS ou nombre de cœurs)',
+        )
+        parser.add_argument(
+            '--sortie',
+            help='Fichier ZIP produit (défaut : fiches_contrats_<critères>.zip)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('\n' + '=' * 70))
+        self.stdout.write(self.style.SUCCESS('    GÉNÉRATION DES FICHES DE CONTRAT'))
+        self.stdout.write(self.style.SUCCESS('=' * 70 + '\n'))
+
+        if not options['classe'] and not options['annee']:
+            raise CommandError('Précisez --classe et / ou --annee')
+
+        contrats = Contrat.objects.all()
+        criteres = []
+        if options['classe']:
+            contrats = contrats.filter(classe_id=options['classe'])
+            criteres.append(f"classe{options['classe']}")
+        if options['annee']:
+            annee = Contrat.normaliser_annee(options['annee'])
+            contrats = contrats.filter(annee_academique=annee)
+            criteres.append(annee)
+        if options['status']:
+            contrats = contrats.filter(status=options['status'])
+
+        if not contrats.exists():
+            self.stdout.write(self.style.WARNING('⚠️  Aucun contrat pour ces critères'))
+            return
+
+        sortie = options['sortie'] or f"fiches_contrats_{'_'.join(criteres)}.zip"
+        with open(sortie, 'wb') as fichier:
+            bilan = ecrire_fiches_zip(contrats, fichier, options['processus'])
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {bilan['nombre']} fiche(s) écrite(s) dans {sortie}"))
+        self.stdout.write(
+            f"📊 {bilan['duree']:.2f} s sur {bilan['processus']} processus : "
+            f"{bilan['pdf_par_seconde']:.1f} PDF/s"
+        )
@@ -0,0 +1,92 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from Gestion.models import Contrat, Pointage
+
+
+class Command(BaseCommand):
+    help = (
+        'Vérifier les compteurs d\'heures effectuées des contrats par rapport '
+        'aux pointages et corriger les écarts'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Corriger les compteurs en écart (sinon simple rapport)',
+        )
+        parser.add_argument(
+            '--contrat',
+            type=int,
+            help='Limiter la vérification à un contrat (ID)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('\n' + '=' * 70))
+        self.stdout.write(self.style.SUCCESS('    RÉCONCILIATION DES HEURES EFFECTUÉES'))
+        self.stdout.write(self.style.SUCCESS('=' * 70 + '\n'))
+
+        zero = Value(Decimal('0.00'), output_field=DecimalField(max_digits=8, decimal_places=2))
+
+        def somme(champ):
+            return Coalesce(
+                Subquery(
+                    Pointage.objects.filter(contrat=OuterRef('pk'))
+                    .values('contrat')
+                    .annotate(total=Sum(champ))
+                    .values('total')[:1],
+                    output_field=DecimalField(max_digits=8, decimal_places=2),
+                ),
+                zero,
+            )
+
+        contrats = Contrat.objects.annotate(
+            reel_cours=somme('heures_cours'),
+            reel_td=somme('heures_td'),
+        ).only('id', 'reference', 'heures_cours_effectuees', 'heures_td_effectuees')
+
+        if options['contrat']:
+            contrats = contrats.filter(pk=options['contrat'])
+
+        ecarts = []
+        for contrat in contrats.iterator(chunk_size=500):
+            if (contrat.heures_cours_effectuees != contrat.reel_cours or
+                    contrat.heures_td_effectuees != contrat.reel_td):
+                ecarts.append(contrat)
+                self.stdout.write(
+                    self.style.WARNING(
+                        f'⚠️  {contrat.reference}: '
+                        f'cours {contrat.heures_cours_effectuees} → {contrat.reel_cours}, '
+                        f'TD {contrat.heures_td_effectuees} → {contrat.reel_td}'
+                    )
+                )
+
+        if not ecarts:
+            self.stdout.write(self.style.SUCCESS('✅ Aucun écart détecté'))
+            return
+
+        self.stdout.write(f'\n📊 {len(ecarts)} contrat(s) en écart')
+
+        if not options['fix']:
+            self.stdout.write('ℹ️  Relancez avec --fix pour corriger')
+            return
+
+        with transaction.atomic():
+            for contrat in ecarts:
+                # Recalcul sous verrou du contrat : les pointages concurrents
+                # (UPDATE F() sur la même ligne) attendent la fin du recalcul
+                list(Contrat.objects.select_for_update().filter(pk=contrat.pk).values_list('pk'))
+                totaux = Pointage.objects.filter(
+                    contrat_id=contrat.pk
+                ).aggregate(cours=Sum('heures_cours'), td=Sum('heures_td'))
+                Contrat.objects.filter(pk=contrat.pk).update(
+                    heures_cours_effectuees=totaux['cours'] or Decimal('0.00'),
+                    heures_td_effectuees=totaux['td'] or Decimal('0.00'),
+                )
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(ecarts)} contrat(s) corrigé(s)'))
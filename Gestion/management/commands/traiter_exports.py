@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Gestion import exports
+
+
+class Command(BaseCommand):
+    help = 'Produire les exports en attente et purger les exports expirés (worker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--boucle',
+            action='store_true',
+            help='Tourner en continu (sinon traiter les jobs en attente puis s\'arrêter)',
+        )
+        parser.add_argument(
+            '--intervalle',
+            type=float,
+            default=5,
+            help='Attente entre deux passages en mode --boucle (secondes, défaut : 5)',
+        )
+        parser.add_argument(
+            '--purger',
+            action='store_true',
+            help='Uniquement supprimer les exports expirés',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('\n' + '=' * 70))
+        self.stdout.write(self.style.SUCCESS('    EXPORTS EN ARRIÈRE-PLAN'))
+        self.stdout.write(self.style.SUCCESS('=' * 70 + '\n'))
+
+        supprimes = exports.purger()
+        self.stdout.write(f'🗑️  {supprimes} export(s) expiré(s) supprimé(s)')
+        if options['purger']:
+            return
+
+        if not options['boucle']:
+            nombre = exports.traiter()
+            self.stdout.write(self.style.SUCCESS(f'✅ {nombre} export(s) traité(s)'))
+            return
+
+        self.stdout.write(f"🔄 En attente de jobs (toutes les {options['intervalle']} s, Ctrl+C pour arrêter)")
+        try:
+            while True:
+                nombre = exports.traiter()
+                if nombre:
+                    self.stdout.write(self.style.SUCCESS(f'✅ {nombre} export(s) traité(s)'))
+                    exports.purger()
+                else:
+                    time.sleep(options['intervalle'])
+        except KeyboardInterrupt:
+            self.stdout.write('\n⏹️  Arrêt du worker')
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:48
+
+from django.db import migrations, models
+
+
+def initialiser_sequences(apps, schema_editor):
+    """
+    Initialise les séquences au-dessus des références existantes
+    (PC-{année}-{n} et CONT-IIPEA/{année}/{code} numériques)
+    """
+    PreContrat = apps.get_model('Gestion', 'PreContrat')
+    Contrat = apps.get_model('Gestion', 'Contrat')
+    SequenceReference = apps.get_model('Gestion', 'SequenceReference')
+
+    maximums = {}
+
+    for reference in PreContrat.objects.values_list('reference', flat=True):
+        parts = (reference or '').split('-')
+        if len(parts) == 3 and parts[0] == 'PC' and parts[1].isdigit() and parts[2].isdigit():
+            cle = f"PC-{parts[1]}"
+            maximums[cle] = max(maximums.get(cle, 0), int(parts[2]))
+
+    for reference in Contrat.objects.values_list('reference', flat=True):
+        parts = (reference or '').split('/')
+        if len(parts) == 3 and parts[0] == 'CONT-IIPEA' and parts[1].isdigit() and parts[2].isdigit():
+            cle = f"CONT-{parts[1]}"
+            maximums[cle] = max(maximums.get(cle, 0), int(parts[2]))
+
+    for cle, valeur in maximums.items():
+        SequenceReference.objects.update_or_create(cle=cle, defaults={'valeur': valeur})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Gestion', '0003_alter_actionlog_pre_contrat_alter_contrat_reference'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenceReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cle', models.CharField(help_text='Identifiant de la séquence (ex: PC-2025, CONT-2025)', max_length=50, unique=True, verbose_name='Clé')),
+                ('valeur', models.PositiveBigIntegerField(default=0, verbose_name='Dernière valeur attribuée')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Dernière modification')),
+            ],
+            options={
+                'verbose_name': 'Séquence de référence',
+                'verbose_name_plural': 'Séquences de référence',
+                'ordering': ['cle'],
+            },
+        ),
+        migrations.RunPython(initialiser_sequences, migrations.RunPython.noop),
+    ]
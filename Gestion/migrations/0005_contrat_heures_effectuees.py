@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:50
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def calculer_heures_effectuees(apps, schema_editor):
+    """Initialise les compteurs à partir des pointages existants"""
+    Contrat = apps.get_model('Gestion', 'Contrat')
+    Pointage = apps.get_model('Gestion', 'Pointage')
+
+    totaux = Pointage.objects.values('contrat_id').annotate(
+        cours=Sum('heures_cours'),
+        td=Sum('heures_td'),
+    )
+    for total in totaux:
+        Contrat.objects.filter(pk=total['contrat_id']).update(
+            heures_cours_effectuees=total['cours'] or Decimal('0.00'),
+            heures_td_effectuees=total['td'] or Decimal('0.00'),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Gestion', '0004_sequencereference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contrat',
+            name='heures_cours_effectuees',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=8, verbose_name='Heures de cours effectuées'),
+        ),
+        migrations.AddField(
+            model_name='contrat',
+            name='heures_td_effectuees',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=8, verbose_name='Heures de TD effectuées'),
+        ),
+        migrations.RunPython(calculer_heures_effectuees, migrations.RunPython.noop),
+    ]
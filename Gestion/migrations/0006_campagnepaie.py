@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:00
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Gestion', '0005_contrat_heures_effectuees'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampagnePaie',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reference', models.CharField(editable=False, max_length=30, unique=True, verbose_name='Référence')),
+                ('periode_debut', models.DateField(verbose_name='Début de période')),
+                ('periode_fin', models.DateField(verbose_name='Fin de période')),
+                ('status', models.CharField(choices=[('CREATED', 'Créée'), ('APPROVED', 'Approuvée'), ('PAID', 'Payée'), ('CANCELLED', 'Annulée')], default='CREATED', max_length=20, verbose_name='Statut')),
+                ('taux_deductions', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Appliqué au montant brut de chaque paiement', max_digits=5, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Taux de retenue (%)')),
+                ('nombre_paiements', models.PositiveIntegerField(default=0, verbose_name='Nombre de paiements')),
+                ('montant_brut_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Montant brut total (FCFA)')),
+                ('montant_deductions_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Déductions totales (FCFA)')),
+                ('montant_net_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Montant net total (FCFA)')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('date_approbation', models.DateTimeField(blank=True, null=True, verbose_name="Date d'approbation")),
+                ('date_paiement', models.DateTimeField(blank=True, null=True, verbose_name='Date de paiement')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('approuve_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='campagnes_paie_approuvees', to=settings.AUTH_USER_MODEL, verbose_name='Approuvée par')),
+                ('cree_par', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='campagnes_paie_creees', to=settings.AUTH_USER_MODEL, verbose_name='Créée par')),
+                ('paye_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='campagnes_paie_payees', to=settings.AUTH_USER_MODEL, verbose_name='Payée par')),
+            ],
+            options={
+                'verbose_name': 'Campagne de paie',
+                'verbose_name_plural': 'Campagnes de paie',
+                'ordering': ['-date_creation'],
+            },
+        ),
+        migrations.AddField(
+            model_name='paiementcontrat',
+            name='campagne',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='paiements', to='Gestion.campagnepaie', verbose_name='Campagne de paie'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:03
+
+from django.db import migrations, models
+
+
+def calculer_nombre_modules(apps, schema_editor):
+    """Initialise le nombre de modules à partir des UEs existantes"""
+    Maquette = apps.get_model('Gestion', 'Maquette')
+
+    for maquette in Maquette.objects.only('pk', 'unites_enseignement').iterator():
+        nombre = sum(
+            len(ue.get('matieres') or [])
+            for ue in maquette.unites_enseignement or []
+            if isinstance(ue, dict)
+        )
+        Maquette.objects.filter(pk=maquette.pk).update(nombre_modules=nombre)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Gestion', '0006_campagnepaie'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maquette',
+            name='nombre_modules',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de modules'),
+        ),
+        migrations.RunPython(calculer_nombre_modules, migrations.RunPython.noop),
+    ]
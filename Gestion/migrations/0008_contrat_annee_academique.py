@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:22
+
+from django.conf import settings
+import re
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+FORMAT_ANNEE = re.compile(r'^\d{4}-\d{4}$')
+
+
+def renseigner_annee_academique(apps, schema_editor):
+    """
+    Année académique des contrats existants : celle du précontrat, à
+    défaut celle de la maquette, à défaut déduite de la date de validation
+    (l'année académique commence en septembre)
+    """
+    Contrat = apps.get_model('Gestion', 'Contrat')
+
+    par_annee = defaultdict(list)
+    lignes = Contrat.objects.values_list(
+        'pk',
+        'module_propose__pre_contrat__annee_academique',
+        'maquette__annee_academique',
+        'date_validation',
+    )
+    for pk, annee_precontrat, annee_maquette, date_validation in lignes.iterator():
+        for annee in (annee_precontrat, annee_maquette):
+            if annee and FORMAT_ANNEE.match(annee.strip()):
+                annee = annee.strip()
+                break
+        else:
+            debut = date_validation.year if date_validation.month >= 9 else date_validation.year - 1
+            annee = f"{debut}-{debut + 1}"
+        par_annee[annee].append(pk)
+
+    for annee, pks in par_annee.items():
+        Contrat.objects.filter(pk__in=pks).update(annee_academique=annee)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Gestion', '0007_maquette_nombre_modules'),
+        ('Utilisateur', '0002_compteurstatistique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contrat',
+            name='annee_academique',
+            field=models.CharField(blank=True, help_text='Ex: 2024-2025', max_length=9, verbose_name='Année académique'),
+        ),
+        migrations.RunPython(renseigner_annee_academique, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='contrat',
+            index=models.Index(fields=['classe', 'annee_academique', 'status'], name='Gestion_con_classe__cf02bd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contrat',
+            index=models.Index(fields=['professeur', 'annee_academique'], name='Gestion_con_profess_608ece_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Gestion', '0008_contrat_annee_academique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_export', models.CharField(max_length=50, verbose_name="Type d'export")),
+                ('parametres', models.JSONField(blank=True, default=dict, verbose_name='Paramètres')),
+                ('empreinte', models.CharField(db_index=True, help_text='Hash du type, des paramètres et des versions des données', max_length=64, verbose_name='Empreinte')),
+                ('status', models.CharField(choices=[('PENDING', 'En attente'), ('RUNNING', 'En cours'), ('DONE', 'Terminé'), ('FAILED', 'Échec')], default='PENDING', max_length=20, verbose_name='Statut')),
+                ('fichier', models.FileField(blank=True, upload_to='exports/', verbose_name='Fichier')),
+                ('taille', models.PositiveBigIntegerField(default=0, verbose_name='Taille (octets)')),
+                ('erreur', models.TextField(blank=True, verbose_name='Erreur')),
+                ('nombre_demandes', models.PositiveIntegerField(default=1, verbose_name='Nombre de demandes')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de demande')),
+                ('date_debut', models.DateTimeField(blank=True, null=True, verbose_name='Début de production')),
+                ('date_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fin de production')),
+                ('expire_le', models.DateTimeField(blank=True, null=True, verbose_name='Expire le')),
+                ('demande_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='exports', to=settings.AUTH_USER_MODEL, verbose_name='Demandé par')),
+            ],
+            options={
+                'verbose_name': 'Export',
+                'verbose_name_plural': 'Exports',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='Gestion_exp_status_3fde44_idx'), models.Index(fields=['expire_le'], name='Gestion_exp_expire__1ae937_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['PENDING', 'RUNNING'])), fields=('empreinte',), name='exportjob_empreinte_active_unique')],
+            },
+        ),
+    ]
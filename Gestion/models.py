@@ -269,6 +269,14 @@ class Maquette(models.Model):
         verbose_name="Unités d'enseignement"
     )
     
+    # Nombre de matières des UEs, recalculé à chaque enregistrement
+    # (évite de relire le JSON pour les statistiques de suivi)
+    nombre_modules = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Nombre de modules"
+    )
+    
     # Données brutes
     raw_data = models.JSONField(
         default=dict,
@@ -311,6 +319,25 @@ class Maquette(models.Model):
     def get_total_ues(self):
         """Retourne le nombre d'unités d'enseignement"""
         return len(self.unites_enseignement) if self.unites_enseignement else 0
+    
+    @staticmethod
+    def compter_modules(unites_enseignement):
+        """Nombre de matières d'une liste d'UEs (JSON de l'API)"""
+        return sum(
+            len(ue.get('matieres') or [])
+            for ue in unites_enseignement or []
+            if isinstance(ue, dict)
+        )
+    
+    def save(self, *args, **kwargs):
+        """Sauvegarde en tenant à jour le nombre de modules"""
+        self.nombre_modules = Maquette.compter_modules(self.unites_enseignement)
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'unites_enseignement' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'nombre_modules'}
+        
+        super().save(*args, **kwargs)
 
 
 
@@ -332,6 +359,8 @@ from decimal import Decimal
 import uuid
 
 from Utilisateur.models import CustomUser
+from Utilisateur.aggregations import compter_par
+from Utilisateur import compteurs
 from Gestion.models import Classe, Maquette
 
 
@@ -349,9 +378,204 @@ from django.urls import reverse
 from decimal import Decimal
 import uuid
 import logging
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
 
 logger = logging.getLogger(__name__)
 
+
+# ==========================================
+# TRANSITIONS DE WORKFLOW EN MASSE
+# ==========================================
+
+class TransitionQuerySet(models.QuerySet):
+    """
+    Base des querysets proposant des transitions de statut en masse.
+
+    Une transition verrouille les lignes sélectionnées, lit leurs préconditions
+    calculées en SQL (annotations), applique le changement de statut par un
+    seul UPDATE conditionnel puis journalise par un bulk_create d'ActionLog.
+    Les signaux save() des instances ne sont pas déclenchés : les compteurs
+    statistiques sont tenus à jour par `compteurs.mettre_a_jour`.
+    """
+    
+    def _transition(self, *, depuis, valeurs, journal, annotations=None, champs=(), verifier=None):
+        """
+        Args:
+            depuis: statut(s) de départ autorisés
+            valeurs: colonnes mises à jour (valeurs ou expressions)
+            journal: fonction(ligne) -> ActionLog non sauvegardé
+            annotations: préconditions calculées en SQL pour chaque ligne
+            champs: colonnes supplémentaires lues pour verifier / journal
+            verifier: fonction(ligne) -> message de refus, ou None
+        
+        Returns:
+            dict: {pk: {'reference', 'succes', 'message'}} pour chaque objet sélectionné
+        """
+        depuis = [depuis] if isinstance(depuis, str) else list(depuis)
+        annotations = annotations or {}
+        statuts = dict(self.model.STATUS_CHOICES)
+        manager = self.model._default_manager
+        
+        # Les pk d'abord : le queryset peut porter des agrégats (admin)
+        # incompatibles avec SELECT ... FOR UPDATE
+        pks = list(self.order_by().values_list('pk', flat=True))
+        resultats = {}
+        
+        with transaction.atomic():
+            lignes = manager.select_for_update().filter(pk__in=pks).annotate(
+                **annotations
+            ).values('pk', 'status', *champs, *annotations)
+            
+            eligibles = []
+            for ligne in lignes:
+                if ligne['status'] not in depuis:
+                    message = (
+                        f"Transition impossible depuis le statut "
+                        f"« {statuts.get(ligne['status'], ligne['status'])} »"
+                    )
+                else:
+                    message = verifier(ligne) if verifier else None
+                
+                if message:
+                    resultats[ligne['pk']] = {
+                        'reference': ligne.get('reference'),
+                        'succes': False,
+                        'message': message,
+                    }
+                else:
+                    eligibles.append(ligne)
+            
+            if eligibles:
+                compteurs.mettre_a_jour(
+                    manager.filter(
+                        pk__in=[ligne['pk'] for ligne in eligibles],
+                        status__in=depuis
+                    ),
+                    **valeurs
+                )
+                
+                logs = ActionLog.objects.bulk_create([journal(ligne) for ligne in eligibles])
+                for ligne, log in zip(eligibles, logs):
+                    resultats[ligne['pk']] = {
+                        'reference': ligne.get('reference'),
+                        'succes': True,
+                        'message': log.details,
+                    }
+        
+        logger.info(
+            f"🔁 {self.model._meta.verbose_name} : {len(eligibles)}/{len(pks)} "
+            f"transition(s) depuis {', '.join(depuis)}"
+        )
+        return resultats
+
+
+# ==========================================
+# QUERYSET PRÉCONTRAT
+# ==========================================
+
+class PreContratQuerySet(TransitionQuerySet):
+    """QuerySet personnalisé pour les précontrats"""
+    
+    def soumettre(self, user=None):
+        """Soumet en masse les précontrats en brouillon ayant au moins un module"""
+        now = timezone.now()
+        return self._transition(
+            depuis='DRAFT',
+            annotations={
+                'a_modules': models.Exists(
+                    ModulePropose.objects.filter(pre_contrat=models.OuterRef('pk'))
+                ),
+            },
+            champs=('reference',),
+            verifier=lambda ligne: (
+                None if ligne['a_modules'] else "Aucun module n'a été ajouté au précontrat"
+            ),
+            valeurs={'status': 'SUBMITTED', 'date_soumission': now, 'date_modification': now},
+            journal=lambda ligne: ActionLog(
+                pre_contrat_id=ligne['pk'],
+                action='SUBMITTED',
+                user=user,
+                details="Précontrat soumis pour validation"
+            ),
+        )
+    
+    def valider(self, user=None, notes=""):
+        """
+        Valide en masse les précontrats soumis puis génère leurs contrats
+        (un passage ensembliste par précontrat, voir ContratGenerationService)
+        """
+        if not user or user.role not in ['RESP_RH', 'ADMIN']:
+            raise ValidationError("Seuls les responsables RH peuvent valider les précontrats")
+        
+        now = timezone.now()
+        resultats = self._transition(
+            depuis='SUBMITTED',
+            annotations={
+                'nb_modules_valides': Coalesce(
+                    models.Subquery(
+                        ModulePropose.objects.filter(
+                            pre_contrat=models.OuterRef('pk'), est_valide=True
+                        ).order_by().values('pre_contrat').annotate(
+                            n=models.Count('pk')
+                        ).values('n')[:1]
+                    ),
+                    0
+                ),
+            },
+            champs=('reference',),
+            valeurs={
+                'status': 'VALIDATED',
+                'date_validation': now,
+                'valide_par': user,
+                'notes_validation': notes,
+                'date_modification': now,
+            },
+            journal=lambda ligne: ActionLog(
+                pre_contrat_id=ligne['pk'],
+                action='VALIDATED',
+                user=user,
+                details=f"Précontrat validé avec {ligne['nb_modules_valides']} module(s) validé(s)"
+            ),
+        )
+        
+        valides = [pk for pk, resultat in resultats.items() if resultat['succes']]
+        for precontrat in self.model.objects.filter(pk__in=valides).select_related('professeur'):
+            resultats[precontrat.pk]['contrats'] = precontrat.creer_contrats_automatiquement(user)
+        
+        return resultats
+    
+    def with_stats(self):
+        """
+        Annote chaque précontrat avec les statistiques de ses modules
+        (une seule jointure, agrégats conditionnels) :
+        stats_nombre_modules, stats_modules_valides, stats_volume_cours,
+        stats_volume_td, stats_montant_total
+        
+        Les propriétés du modèle (nombre_modules, progression_pourcentage,
+        get_montant_total...) utilisent ces annotations si elles sont présentes.
+        """
+        montant_field = models.DecimalField(max_digits=16, decimal_places=2)
+        return self.annotate(
+            stats_nombre_modules=models.Count('modules_proposes'),
+            stats_modules_valides=models.Count(
+                'modules_proposes',
+                filter=models.Q(modules_proposes__est_valide=True)
+            ),
+            stats_volume_cours=models.Sum('modules_proposes__volume_heure_cours'),
+            stats_volume_td=models.Sum('modules_proposes__volume_heure_td'),
+            stats_montant_total=models.Sum(
+                models.ExpressionWrapper(
+                    models.F('modules_proposes__volume_heure_cours') * models.F('modules_proposes__taux_horaire_cours') +
+                    models.F('modules_proposes__volume_heure_td') * models.F('modules_proposes__taux_horaire_td'),
+                    output_field=montant_field
+                ),
+                output_field=montant_field
+            ),
+        )
+
+
 class PreContrat(models.Model):
     """
     Modèle pour la création d'un précontrat avant validation RH.
@@ -488,6 +712,8 @@ class PreContrat(models.Model):
         help_text="Ex: 2024-2025"
     )
     
+    objects = PreContratQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Précontrat"
         verbose_name_plural = "Précontrats"
@@ -536,22 +762,23 @@ class PreContrat(models.Model):
             else:
                 self.annee_academique = f"{year}-{year+1}"
         
+        # Générer la référence dès l'INSERT (séquence atomique)
+        if self._state.adding and not self.reference:
+            self.reference = PreContrat.allouer_references(1)[0]
+        
         # Valider le modèle
         self.full_clean()
         
-        # Première sauvegarde pour obtenir un ID
-        is_new = self._state.adding
         super().save(*args, **kwargs)
-        
-        # Générer la référence si c'est un nouveau précontrat
-        if is_new and not self.reference:
-            year = timezone.now().year
-            # Compter les précontrats de l'année
-            count = PreContrat.objects.filter(
-                date_creation__year=year
-            ).count()
-            self.reference = f"PC-{year}-{str(count).zfill(4)}"
-            self.save(update_fields=['reference'])
+    
+    @staticmethod
+    def allouer_references(nombre):
+        """
+        Réserve `nombre` références consécutives PC-{année}-{numéro}
+        """
+        year = timezone.now().year
+        numeros = SequenceReference.reserver(f"PC-{year}", nombre)
+        return [f"PC-{year}-{str(numero).zfill(4)}" for numero in numeros]
     
     def get_absolute_url(self):
         """URL de détail du précontrat"""
@@ -598,11 +825,15 @@ class PreContrat(models.Model):
     @property
     def nombre_modules(self):
         """Retourne le nombre de modules proposés"""
+        if hasattr(self, 'stats_nombre_modules'):
+            return self.stats_nombre_modules
         return self.modules_proposes.count()
     
     @property
     def modules_valides_count(self):
         """Retourne le nombre de modules validés"""
+        if hasattr(self, 'stats_modules_valides'):
+            return self.stats_modules_valides
         return self.modules_proposes.filter(est_valide=True).count()
     
     @property
@@ -622,10 +853,16 @@ class PreContrat(models.Model):
     
     def get_volume_total(self):
         """Calcule le volume horaire total de tous les modules"""
-        total = self.modules_proposes.aggregate(
-            total_cm=models.Sum('volume_heure_cours'),
-            total_td=models.Sum('volume_heure_td'),
-        )
+        if hasattr(self, 'stats_volume_cours'):
+            total = {
+                'total_cm': self.stats_volume_cours,
+                'total_td': self.stats_volume_td,
+            }
+        else:
+            total = self.modules_proposes.aggregate(
+                total_cm=models.Sum('volume_heure_cours'),
+                total_td=models.Sum('volume_heure_td'),
+            )
         
         cm = total.get('total_cm') or Decimal('0')
         td = total.get('total_td') or Decimal('0')
@@ -638,6 +875,9 @@ class PreContrat(models.Model):
     
     def get_montant_total(self):
         """Calcule le montant total estimé de tous les modules"""
+        if hasattr(self, 'stats_montant_total'):
+            return self.stats_montant_total or Decimal('0')
+        
         total = Decimal('0')
         for module in self.modules_proposes.all():
             total += module.get_montant_total()
@@ -710,27 +950,17 @@ class PreContrat(models.Model):
     
     def creer_contrats_automatiquement(self, user):
         """Crée automatiquement les contrats pour tous les modules validés"""
-        from .utils import create_contrat_from_module
+        from .services import ContratGenerationService
         
-        contrats_crees = 0
-        modules_valides = self.modules_proposes.filter(est_valide=True)
-        
-        logger.info(f"🔄 Début création automatique des contrats pour {modules_valides.count()} module(s) validé(s)")
-        
-        for module in modules_valides:
-            if not hasattr(module, 'contrat'):
-                try:
-                    logger.info(f"🔄 Création contrat pour module: {module.nom_module}")
-                    create_contrat_from_module(module, user)
-                    contrats_crees += 1
-                    logger.info(f"✅ Contrat créé pour le module {module.nom_module}")
-                except Exception as e:
-                    logger.error(f"❌ Erreur création contrat pour module {module.id}: {e}", exc_info=True)
-            else:
-                logger.info(f"ℹ️ Contrat existe déjà pour le module {module.nom_module}")
+        try:
+            resultat = ContratGenerationService.generer_contrats(
+                self, user, valider_modules=False
+            )
+        except Exception as e:
+            logger.error(f"❌ Erreur création des contrats du précontrat {self.reference}: {e}", exc_info=True)
+            return 0
         
-        logger.info(f"✅ {contrats_crees} contrat(s) créé(s) automatiquement pour le précontrat {self.reference}")
-        return contrats_crees
+        return len(resultat['contrats'])
     
     def rejeter(self, user=None, raison=""):
         """Rejette le précontrat"""
@@ -840,16 +1070,8 @@ class PreContrat(models.Model):
     @classmethod
     def get_statistiques(cls):
         """Retourne les statistiques globales des précontrats"""
-        total = cls.objects.count()
-        return {
-            'total': total,
-            'draft': cls.objects.filter(status='DRAFT').count(),
-            'submitted': cls.objects.filter(status='SUBMITTED').count(),
-            'under_review': cls.objects.filter(status='UNDER_REVIEW').count(),
-            'validated': cls.objects.filter(status='VALIDATED').count(),
-            'rejected': cls.objects.filter(status='REJECTED').count(),
-            'cancelled': cls.objects.filter(status='CANCELLED').count(),
-        }
+        stats = compter_par(cls.objects.all(), 'status', choix=cls.STATUS_CHOICES)
+        return {cle.lower(): nombre for cle, nombre in stats.items()}
 
 # ==========================================
 # MODÈLE MODULE PROPOSÉ
@@ -1031,6 +1253,81 @@ class ModulePropose(models.Model):
 
 
 
+# ==========================================
+# QUERYSET CONTRAT
+# ==========================================
+
+class ContratQuerySet(TransitionQuerySet):
+    """QuerySet personnalisé pour les contrats"""
+    
+    def with_montants(self):
+        """
+        Annote chaque contrat de ses volumes et montants calculés en SQL :
+        volume_contractuel, volume_effectue, montant_contractuel, montant_a_payer
+        
+        Les heures effectuées proviennent des compteurs du contrat
+        (heures_cours_effectuees / heures_td_effectuees), sans relire les pointages.
+        """
+        volume_field = models.DecimalField(max_digits=8, decimal_places=2)
+        montant_field = models.DecimalField(max_digits=14, decimal_places=2)
+        return self.annotate(
+            volume_contractuel=models.ExpressionWrapper(
+                F('volume_heure_cours') + F('volume_heure_td'),
+                output_field=volume_field
+            ),
+            volume_effectue=models.ExpressionWrapper(
+                F('heures_cours_effectuees') + F('heures_td_effectuees'),
+                output_field=volume_field
+            ),
+            montant_contractuel=models.ExpressionWrapper(
+                F('volume_heure_cours') * F('taux_horaire_cours') +
+                F('volume_heure_td') * F('taux_horaire_td'),
+                output_field=montant_field
+            ),
+            montant_a_payer=models.ExpressionWrapper(
+                F('heures_cours_effectuees') * F('taux_horaire_cours') +
+                F('heures_td_effectuees') * F('taux_horaire_td'),
+                output_field=montant_field
+            ),
+        )
+    
+    def terminer(self, user):
+        """
+        Termine en masse les cours en cours : prêts pour paiement si les
+        documents obligatoires sont chargés, en attente de documents sinon
+        """
+        documents_ok = models.Q(support_cours_uploaded=True, syllabus_uploaded=True)
+        now = timezone.now()
+        resultats = self._transition(
+            depuis='IN_PROGRESS',
+            champs=('reference', 'support_cours_uploaded', 'syllabus_uploaded'),
+            valeurs={
+                'status': models.Case(
+                    models.When(documents_ok, then=models.Value('READY_FOR_PAYMENT')),
+                    default=models.Value('PENDING_DOCUMENTS'),
+                ),
+                'date_fin_reelle': now.date(),
+                'updated_at': now,
+            },
+            journal=lambda ligne: ActionLog(
+                contrat_id=ligne['pk'],
+                action='COMPLETED',
+                user=user,
+                details=(
+                    f"Cours terminé - Documents: "
+                    f"{'OK' if ligne['support_cours_uploaded'] and ligne['syllabus_uploaded'] else 'Manquants'}"
+                )
+            ),
+        )
+        
+        # UPDATE en masse : pas de signal post_save pour invalider le suivi
+        if any(resultat['succes'] for resultat in resultats.values()):
+            from .services import ProgressionService
+            ProgressionService.invalider_apres_commit()
+        
+        return resultats
+
+
 # ==========================================
 # MODÈLE CONTRAT
 # ==========================================
@@ -1187,6 +1484,14 @@ class Contrat(models.Model):
         verbose_name="Date de validation"
     )
     
+    # Année académique (celle du précontrat), clé des requêtes annuelles
+    annee_academique = models.CharField(
+        max_length=9,
+        blank=True,
+        verbose_name="Année académique",
+        help_text="Ex: 2024-2025"
+    )
+    
     # Gestion pédagogique
     demarre_par = models.ForeignKey(
         'Utilisateur.CustomUser',
@@ -1202,6 +1507,22 @@ class Contrat(models.Model):
         verbose_name="Date de démarrage"
     )
     
+    # Heures réalisées (cumul des pointages, maintenu par les signaux)
+    heures_cours_effectuees = models.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False,
+        verbose_name="Heures de cours effectuées"
+    )
+    heures_td_effectuees = models.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False,
+        verbose_name="Heures de TD effectuées"
+    )
+    
     # Documents obligatoires
     support_cours_uploaded = models.BooleanField(
         default=False,
@@ -1222,6 +1543,8 @@ class Contrat(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ContratQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Contrat"
         verbose_name_plural = "Contrats"
@@ -1232,6 +1555,8 @@ class Contrat(models.Model):
             models.Index(fields=['classe', 'status']),
             models.Index(fields=['status']),
             models.Index(fields=['-date_validation']),
+            models.Index(fields=['classe', 'annee_academique', 'status']),
+            models.Index(fields=['professeur', 'annee_academique']),
         ]
     
     def __str__(self):
@@ -1239,27 +1564,41 @@ class Contrat(models.Model):
 
     def generate_reference(self):
         """
-        Génère une référence unique du type: CONT-IIPEA/2025/A1B2C
+        Génère une référence unique du type: CONT-IIPEA/2025/00042
+        """
+        return Contrat.allouer_references(1)[0]
+    
+    @staticmethod
+    def allouer_references(nombre):
+        """
+        Réserve `nombre` références consécutives CONT-IIPEA/{année}/{numéro}
+        (à utiliser pour les créations en masse)
         """
-        import random
-        import string
-        
-        # Obtenir l'année courante
         year = timezone.now().year
-        
-        # Générer un code alphanumérique de 5 caractères
-        characters = string.ascii_uppercase + string.digits
-        code = ''.join(random.choices(characters, k=5))
-        
-        # Format: CONT-IIPEA/2025/A1B2C
-        reference = f"CONT-IIPEA/{year}/{code}"
-        
-        # Vérifier l'unicité
-        while Contrat.objects.filter(reference=reference).exists():
-            code = ''.join(random.choices(characters, k=5))
-            reference = f"CONT-IIPEA/{year}/{code}"
-        
-        return reference
+        numeros = SequenceReference.reserver(f"CONT-{year}", nombre)
+        return [f"CONT-IIPEA/{year}/{str(numero).zfill(5)}" for numero in numeros]
+    
+    @staticmethod
+    def annee_academique_de(date=None):
+        """Année académique (septembre à août) contenant `date`, ex: 2024-2025"""
+        date = date or timezone.now()
+        debut = date.year if date.month >= 9 else date.year - 1
+        return f"{debut}-{debut + 1}"
+    
+    @staticmethod
+    def normaliser_annee(annee):
+        """
+        Année académique d'un filtre : '2025-2026' tel quel, une année
+        seule (paramètre ?annee=2025 des vues de suivi) désigne l'année
+        académique qui commence cette année-là
+        """
+        annee = str(annee).strip()
+        if annee.isdigit():
+            return f"{annee}-{int(annee) + 1}"
+        return annee
+    
+    # Compteurs mis à jour uniquement par F() (voir ajuster_heures_effectuees)
+    CHAMPS_HEURES_EFFECTUEES = ('heures_cours_effectuees', 'heures_td_effectuees')
     
     def save(self, *args, **kwargs):
         """Sauvegarde avec génération automatique de la référence"""
@@ -1267,10 +1606,40 @@ class Contrat(models.Model):
         if not self.reference:
             self.reference = self.generate_reference()
         
+        # Année académique du précontrat, à défaut celle de la validation
+        if not self.annee_academique:
+            precontrat = self.module_propose.pre_contrat if self.module_propose_id else None
+            self.annee_academique = (
+                precontrat.annee_academique if precontrat and precontrat.annee_academique
+                else self.annee_academique_de(self.date_validation)
+            )
+        
+        # Ne jamais écraser les compteurs d'heures avec une valeur en mémoire
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.CHAMPS_HEURES_EFFECTUEES
+            ]
+        
         # Validation et sauvegarde
         self.full_clean()
         super().save(*args, **kwargs)
     
+    @staticmethod
+    def ajuster_heures_effectuees(contrat_id, delta_cours, delta_td):
+        """
+        Ajoute atomiquement un delta aux compteurs d'heures d'un contrat
+        (UPDATE ... SET heures = heures + delta). updated_at est rafraîchi
+        pour invalider les fragments de gabarits versionnés sur le contrat.
+        """
+        if not delta_cours and not delta_td:
+            return
+        Contrat.objects.filter(pk=contrat_id).update(
+            heures_cours_effectuees=F('heures_cours_effectuees') + delta_cours,
+            heures_td_effectuees=F('heures_td_effectuees') + delta_td,
+            updated_at=timezone.now(),
+        )
+    
     @property
     def volume_total_contractuel(self):
         """Volume horaire total contractuel"""
@@ -1286,19 +1655,9 @@ class Contrat(models.Model):
     
     def get_heures_effectuees(self):
         """Retourne les heures effectivement réalisées pour ce contrat"""
-        # Récupérer tous les pointages de ce contrat
-        pointages = self.pointages.all()
-        
-        total_cours = Decimal('0.00')
-        total_td = Decimal('0.00')
-        
-        for pointage in pointages:
-            total_cours += pointage.heures_cours
-            total_td += pointage.heures_td
-        
         return {
-            'cours': total_cours,
-            'td': total_td,
+            'cours': self.heures_cours_effectuees,
+            'td': self.heures_td_effectuees,
         }
     
     def get_all_groupes(self):
@@ -1689,6 +2048,207 @@ class DocumentContrat(models.Model):
             self.contrat.check_documents_and_update_status()
 
 
+# ==========================================
+# MODÈLE CAMPAGNE DE PAIE
+# ==========================================
+
+class CampagnePaie(models.Model):
+    """
+    Campagne de paie : paiement groupé des contrats prêts pour paiement
+    terminés sur une période. Les paiements de la campagne sont créés,
+    approuvés et payés en un seul lot (voir CampagnePaieService).
+    """
+    
+    STATUS_CHOICES = [
+        ('CREATED', 'Créée'),
+        ('APPROVED', 'Approuvée'),
+        ('PAID', 'Payée'),
+        ('CANCELLED', 'Annulée'),
+    ]
+    
+    reference = models.CharField(
+        max_length=30,
+        unique=True,
+        editable=False,
+        verbose_name="Référence"
+    )
+    
+    # Période couverte (date de fin réelle des cours)
+    periode_debut = models.DateField(
+        verbose_name="Début de période"
+    )
+    periode_fin = models.DateField(
+        verbose_name="Fin de période"
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='CREATED',
+        verbose_name="Statut"
+    )
+    
+    taux_deductions = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        validators=[MinValueValidator(Decimal('0.00'))],
+        verbose_name="Taux de retenue (%)",
+        help_text="Appliqué au montant brut de chaque paiement"
+    )
+    
+    # Totaux (recalculés par agrégat SQL sur les paiements de la campagne)
+    nombre_paiements = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Nombre de paiements"
+    )
+    montant_brut_total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Montant brut total (FCFA)"
+    )
+    montant_deductions_total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Déductions totales (FCFA)"
+    )
+    montant_net_total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Montant net total (FCFA)"
+    )
+    
+    # Acteurs
+    cree_par = models.ForeignKey(
+        'Utilisateur.CustomUser',
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='campagnes_paie_creees',
+        verbose_name="Créée par"
+    )
+    approuve_par = models.ForeignKey(
+        'Utilisateur.CustomUser',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='campagnes_paie_approuvees',
+        verbose_name="Approuvée par"
+    )
+    paye_par = models.ForeignKey(
+        'Utilisateur.CustomUser',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='campagnes_paie_payees',
+        verbose_name="Payée par"
+    )
+    
+    # Dates
+    date_creation = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date de création"
+    )
+    date_approbation = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Date d'approbation"
+    )
+    date_paiement = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Date de paiement"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Campagne de paie"
+        verbose_name_plural = "Campagnes de paie"
+        ordering = ['-date_creation']
+    
+    def __str__(self):
+        return f"{self.reference} ({self.periode_debut:%d/%m/%Y} - {self.periode_fin:%d/%m/%Y})"
+    
+    @staticmethod
+    def allouer_reference():
+        """Réserve la prochaine référence PAIE-{année}-{numéro}"""
+        year = timezone.now().year
+        numero = SequenceReference.reserver(f"PAIE-{year}", 1)[0]
+        return f"PAIE-{year}-{str(numero).zfill(4)}"
+    
+    def save(self, *args, **kwargs):
+        if not self.reference:
+            self.reference = CampagnePaie.allouer_reference()
+        super().save(*args, **kwargs)
+    
+    def get_absolute_url(self):
+        return reverse('campagne_paie_detail', kwargs={'pk': self.pk})
+
+
+class PaiementContratQuerySet(TransitionQuerySet):
+    """QuerySet personnalisé pour les paiements"""
+    
+    def approuver(self, user):
+        """Approuve en masse les paiements en attente"""
+        now = timezone.now()
+        return self._transition(
+            depuis='PENDING',
+            champs=('contrat_id', 'montant_net'),
+            valeurs={
+                'status': 'APPROVED',
+                'approuve_par': user,
+                'date_approbation': now,
+                'updated_at': now,
+            },
+            journal=lambda ligne: ActionLog(
+                contrat_id=ligne['contrat_id'],
+                paiement_id=ligne['pk'],
+                action='PAYMENT_APPROVED',
+                user=user,
+                details=f"Paiement approuvé - Montant: {ligne['montant_net']} FCFA"
+            ),
+        )
+    
+    def payer(self, user, mode_paiement, reference=''):
+        """
+        Marque en masse les paiements approuvés comme payés, puis passe leurs
+        contrats au statut payé (un UPDATE pour l'ensemble)
+        """
+        now = timezone.now()
+        resultats = self._transition(
+            depuis='APPROVED',
+            champs=('contrat_id', 'montant_net'),
+            valeurs={
+                'status': 'PAID',
+                'mode_paiement': mode_paiement,
+                'reference_paiement': reference,
+                'paye_par': user,
+                'date_paiement': now,
+                'updated_at': now,
+            },
+            journal=lambda ligne: ActionLog(
+                contrat_id=ligne['contrat_id'],
+                paiement_id=ligne['pk'],
+                action='PAID',
+                user=user,
+                details=f"Paiement effectué - Mode: {mode_paiement} - Montant: {ligne['montant_net']} FCFA"
+            ),
+        )
+        
+        payes = [pk for pk, resultat in resultats.items() if resultat['succes']]
+        if payes:
+            compteurs.mettre_a_jour(
+                Contrat.objects.filter(paiements__in=payes), status='PAID', updated_at=now
+            )
+            
+            from .services import ProgressionService
+            ProgressionService.invalider_apres_commit()
+        
+        return resultats
+
+
 class PaiementContrat(models.Model):
     """
     Paiement d'un contrat
@@ -1723,6 +2283,14 @@ class PaiementContrat(models.Model):
         related_name='paiements',
         verbose_name="Professeur"
     )
+    campagne = models.ForeignKey(
+        CampagnePaie,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='paiements',
+        verbose_name="Campagne de paie"
+    )
     
     # Montants
     montant_brut = models.DecimalField(
@@ -1824,6 +2392,8 @@ class PaiementContrat(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = PaiementContratQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Paiement de contrat"
         verbose_name_plural = "Paiements de contrats"
@@ -1995,4 +2565,166 @@ class ActionLog(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.get_action_display()} - {self.timestamp}"
\ No newline at end of file
+        return f"{self.get_action_display()} - {self.timestamp}"
+
+
+class SequenceReference(models.Model):
+    """
+    Compteur persistant pour la génération des références (précontrats,
+    contrats). L'incrément est atomique et peut réserver un bloc de numéros
+    pour les créations en masse.
+    """
+    
+    cle = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name="Clé",
+        help_text="Identifiant de la séquence (ex: PC-2025, CONT-2025)"
+    )
+    
+    valeur = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name="Dernière valeur attribuée"
+    )
+    
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Dernière modification"
+    )
+    
+    class Meta:
+        verbose_name = "Séquence de référence"
+        verbose_name_plural = "Séquences de référence"
+        ordering = ['cle']
+    
+    def __str__(self):
+        return f"{self.cle} = {self.valeur}"
+    
+    @classmethod
+    def reserver(cls, cle, taille=1):
+        """
+        Réserve atomiquement `taille` numéros consécutifs pour la séquence
+        
+        L'UPDATE verrouille la ligne jusqu'à la fin de la transaction :
+        deux appels concurrents ne peuvent pas obtenir le même bloc.
+        
+        Returns:
+            range: numéros réservés
+        """
+        if taille < 1:
+            return range(0)
+        
+        with transaction.atomic():
+            cls.objects.get_or_create(cle=cle)
+            cls.objects.filter(cle=cle).update(
+                valeur=F('valeur') + taille,
+                updated_at=timezone.now()
+            )
+            fin = cls.objects.filter(cle=cle).values_list('valeur', flat=True).get()
+        
+        return range(fin - taille + 1, fin + 1)
+
+
+class ExportJob(models.Model):
+    """
+    Export (Excel, PDF, rapport) produit en arrière-plan
+
+    La demande crée un job EN ATTENTE ; un worker (commande
+    `traiter_exports`) le produit dans MEDIA_ROOT/exports. Les demandes de
+    mêmes paramètres partagent le job (même empreinte) tant qu'il est en
+    cours ou que son fichier n'a pas expiré. Voir Gestion.exports.
+    """
+
+    STATUS_CHOICES = [
+        ('PENDING', 'En attente'),
+        ('RUNNING', 'En cours'),
+        ('DONE', 'Terminé'),
+        ('FAILED', 'Échec'),
+    ]
+
+    type_export = models.CharField(
+        max_length=50,
+        verbose_name="Type d'export"
+    )
+
+    parametres = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Paramètres"
+    )
+
+    empreinte = models.CharField(
+        max_length=64,
+        db_index=True,
+        verbose_name="Empreinte",
+        help_text="Hash du type, des paramètres et des versions des données"
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='PENDING',
+        verbose_name="Statut"
+    )
+
+    fichier = models.FileField(
+        upload_to='exports/',
+        blank=True,
+        verbose_name="Fichier"
+    )
+
+    taille = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name="Taille (octets)"
+    )
+
+    erreur = models.TextField(
+        blank=True,
+        verbose_name="Erreur"
+    )
+
+    demande_par = models.ForeignKey(
+        'Utilisateur.CustomUser',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='exports',
+        verbose_name="Demandé par"
+    )
+
+    nombre_demandes = models.PositiveIntegerField(
+        default=1,
+        verbose_name="Nombre de demandes"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de demande")
+    date_debut = models.DateTimeField(null=True, blank=True, verbose_name="Début de production")
+    date_fin = models.DateTimeField(null=True, blank=True, verbose_name="Fin de production")
+    expire_le = models.DateTimeField(null=True, blank=True, verbose_name="Expire le")
+
+    class Meta:
+        verbose_name = "Export"
+        verbose_name_plural = "Exports"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['expire_le']),
+        ]
+        constraints = [
+            # Un seul job actif par empreinte : les demandes simultanées se rejoignent
+            models.UniqueConstraint(
+                fields=['empreinte'],
+                condition=models.Q(status__in=['PENDING', 'RUNNING']),
+                name='exportjob_empreinte_active_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.type_export} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def est_disponible(self):
+        return bool(
+            self.status == 'DONE' and self.fichier and
+            (self.expire_le is None or self.expire_le > timezone.now())
+        )
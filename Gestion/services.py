@@ -0,0 +1,1416 @@
+"""
+Services métier de l'application Gestion
+"""
+import hashlib
+import json
+import logging
+import re
+import time
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db import transaction
+from django.db.models import (
+    Count, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value
+)
+from django.db.models.functions import Coalesce, Round
+from django.utils import timezone
+
+from Utilisateur import cache_tableaux, compteurs
+from Utilisateur.aggregations import compter_par
+
+from .models import (
+    ActionLog, CampagnePaie, Classe, Contrat, Groupe, Maquette, ModulePropose,
+    PaiementContrat, Pointage, PreContrat
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _to_float(value):
+    """Convertit une valeur API en float (0 si vide ou invalide)"""
+    try:
+        return float(value) if value else 0
+    except (ValueError, TypeError):
+        return 0
+
+
+# ==========================================
+# VIEW-MODEL DES MAQUETTES
+# ==========================================
+
+class MaquetteViewModelService:
+    """
+    Compile le JSON `unites_enseignement` d'une maquette en un view-model
+    sérialisable (matières, UEs, semestres, totaux) partagé par la page de
+    détail et la page des matières.
+
+    Le view-model est mis en cache sous une clé versionnée par
+    `Maquette.id`, `last_synced`, `updated_at` et l'empreinte du JSON des
+    UEs : une nouvelle synchronisation ou une écriture du JSON qui ne touche
+    pas aux dates (`QuerySet.update`) produit une nouvelle clé, l'ancienne
+    expire d'elle-même.
+    """
+
+    CACHE_PREFIX = 'maquette_vm'
+    CACHE_TIMEOUT = getattr(settings, 'MAQUETTE_VM_CACHE_TIMEOUT', 60 * 60 * 24)
+
+    @classmethod
+    def get_version(cls, maquette):
+        """Version de la maquette : dates de sync / modification et empreinte du contenu"""
+        stamps = [
+            maquette.last_synced.timestamp() if maquette.last_synced else 0,
+            maquette.updated_at.timestamp() if maquette.updated_at else 0,
+        ]
+        return '-'.join(
+            [str(int(stamp * 1000)) for stamp in stamps]
+            + [cls.get_content_hash(maquette.unites_enseignement)[:12]]
+        )
+
+    @classmethod
+    def get_cache_key(cls, maquette):
+        return f'{cls.CACHE_PREFIX}_{maquette.pk}_{cls.get_version(maquette)}'
+
+    @staticmethod
+    def get_content_hash(unites_enseignement):
+        """Empreinte du contenu JSON des UEs"""
+        payload = json.dumps(unites_enseignement or [], sort_keys=True, default=str)
+        return hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _resolve_semestre(ue):
+        """Semestre d'une UE : `semestre`, `semestre_id` ou numéro du libellé"""
+        semestre = ue.get('semestre') or ue.get('semestre_id')
+        if not semestre and ue.get('semestre_libelle'):
+            # Extraire "1" de "SEMESTRE 1"
+            match = re.search(r'\d+', ue.get('semestre_libelle', ''))
+            if match:
+                semestre = int(match.group())
+        return semestre
+
+    @classmethod
+    def build(cls, maquette):
+        """
+        Construit le view-model complet d'une maquette (sans cache)
+
+        Returns:
+            dict: view-model sérialisable
+        """
+        unites_enseignement = maquette.unites_enseignement or []
+
+        matieres_list = []
+        ues_list = []
+        semestres_set = set()
+
+        total_coefficient = 0
+        total_volume_horaire = 0
+        total_volume_cm = 0
+        total_volume_td = 0
+        total_volume_tp = 0
+        total_cout_global = 0
+
+        for ue in unites_enseignement:
+            ue_id = ue.get('id', '')
+            ue_libelle = ue.get('libelle', 'UE sans nom')
+            ue_code = ue.get('code', '')
+            ue_semestre = cls._resolve_semestre(ue)
+            ue_credits = _to_float(ue.get('credits', 0))
+
+            if ue_semestre:
+                semestres_set.add(ue_semestre)
+
+            matieres = ue.get('matieres', []) or []
+
+            ues_list.append({
+                'id': ue_id,
+                'libelle': ue_libelle,
+                'code': ue_code,
+                'semestre': ue_semestre,
+                'semestre_libelle': ue.get('semestre_libelle', ''),
+                'credits': ue_credits,
+                'nombre_matieres': len(matieres),
+                'categorie': ue.get('categorie_nom', ''),
+            })
+
+            for matiere in matieres:
+                coefficient = _to_float(matiere.get('coefficient', 0))
+                volume_cm = _to_float(matiere.get('volume_horaire_cm', 0))
+                volume_td = _to_float(matiere.get('volume_horaire_td', 0))
+                volume_tp = _to_float(matiere.get('volume_horaire_tp', 0))
+                taux_cm = _to_float(matiere.get('taux_horaire_cm', 0))
+                taux_td = _to_float(matiere.get('taux_horaire_td', 0))
+                taux_tp = _to_float(matiere.get('taux_horaire_tp', 0))
+
+                volume_total = volume_cm + volume_td + volume_tp
+                cout_cm = volume_cm * taux_cm
+                cout_td = volume_td * taux_td
+                cout_tp = volume_tp * taux_tp
+                cout_total = cout_cm + cout_td + cout_tp
+
+                total_coefficient += coefficient
+                total_volume_horaire += volume_total
+                total_volume_cm += volume_cm
+                total_volume_td += volume_td
+                total_volume_tp += volume_tp
+                total_cout_global += cout_total
+
+                professeur = matiere.get('professeur', {})
+                professeur_nom = ''
+                if isinstance(professeur, dict):
+                    professeur_nom = professeur.get('nom', '')
+                elif isinstance(professeur, str):
+                    professeur_nom = professeur
+
+                matieres_list.append({
+                    'id': matiere.get('id', ''),
+                    'nom': matiere.get('nom', 'Matière sans nom'),
+                    'code': matiere.get('code', ''),
+                    'description': matiere.get('description', ''),
+                    'coefficient': coefficient,
+                    'ue_libelle': ue_libelle,
+                    'ue_code': ue_code,
+                    'ue_id': ue_id,
+                    'ue_credits': ue_credits,
+                    'semestre': matiere.get('semestre') or ue_semestre,
+                    'volume_cm': volume_cm,
+                    'taux_cm': taux_cm,
+                    'cout_cm': cout_cm,
+                    'volume_td': volume_td,
+                    'taux_td': taux_td,
+                    'cout_td': cout_td,
+                    'volume_tp': volume_tp,
+                    'taux_tp': taux_tp,
+                    'cout_tp': cout_tp,
+                    'volume_total': volume_total,
+                    'cout_total': cout_total,
+                    'professeur_nom': professeur_nom,
+                    # Clés utilisées par la page des matières (CM + TD)
+                    'volume_horaire_cm': volume_cm,
+                    'taux_horaire_cm': taux_cm,
+                    'volume_horaire_td': volume_td,
+                    'taux_horaire_td': taux_td,
+                    'volume_horaire_total': volume_cm + volume_td,
+                    'total_taux_horaire': cout_cm + cout_td,
+                })
+
+        matieres_list.sort(key=lambda x: (x['semestre'] if x['semestre'] else 999, x['nom']))
+
+        # Groupement en une seule passe
+        matieres_par_semestre = {}
+        for matiere in matieres_list:
+            if matiere['semestre']:
+                matieres_par_semestre.setdefault(matiere['semestre'], []).append(matiere)
+        ues_par_semestre = {}
+        for ue in ues_list:
+            if ue['semestre']:
+                ues_par_semestre.setdefault(ue['semestre'], []).append(ue)
+
+        # Semestres de la page détail : ceux des UEs
+        semestres = sorted(semestres_set)
+        stats_par_semestre = []
+        for sem in semestres:
+            matieres_sem = matieres_par_semestre.get(sem, [])
+            ues_sem = ues_par_semestre.get(sem, [])
+            stats_par_semestre.append({
+                'semestre': sem,
+                'nombre_ues': len(ues_sem),
+                'nombre_matieres': len(matieres_sem),
+                'credits_total': sum(ue['credits'] for ue in ues_sem),
+                'coefficient_total': sum(m['coefficient'] for m in matieres_sem),
+                'volume_total': sum(m['volume_total'] for m in matieres_sem),
+                'volume_cm': sum(m['volume_cm'] for m in matieres_sem),
+                'volume_td': sum(m['volume_td'] for m in matieres_sem),
+                'volume_tp': sum(m['volume_tp'] for m in matieres_sem),
+                'cout_total': sum(m['cout_total'] for m in matieres_sem),
+            })
+
+        # Semestres de la page matières : ceux des matières (CM + TD)
+        semestres_matieres = sorted(matieres_par_semestre)
+        stats_matieres_par_semestre = []
+        for sem in semestres_matieres:
+            matieres_sem = matieres_par_semestre[sem]
+            stats_matieres_par_semestre.append({
+                'semestre': sem,
+                'nombre_matieres': len(matieres_sem),
+                'coefficient_total': sum(m['coefficient'] for m in matieres_sem),
+                'volume_total': sum(m['volume_horaire_total'] for m in matieres_sem),
+                'volume_cm': sum(m['volume_horaire_cm'] for m in matieres_sem),
+                'volume_td': sum(m['volume_horaire_td'] for m in matieres_sem),
+                'cout_total': sum(m['total_taux_horaire'] for m in matieres_sem),
+            })
+
+        return {
+            'version': cls.get_version(maquette),
+            'content_hash': cls.get_content_hash(unites_enseignement),
+            'unites_enseignement': unites_enseignement,
+            'total_ues': len(unites_enseignement),
+            'matieres': matieres_list,
+            'ues': ues_list,
+            'matieres_par_semestre': {sem: matieres_par_semestre.get(sem, []) for sem in semestres},
+            'ues_par_semestre': {sem: ues_par_semestre.get(sem, []) for sem in semestres},
+            'total_matieres': len(matieres_list),
+            'total_coefficient': total_coefficient,
+            'total_volume_horaire': total_volume_horaire,
+            'total_volume_cm': total_volume_cm,
+            'total_volume_td': total_volume_td,
+            'total_volume_tp': total_volume_tp,
+            'total_cout': total_cout_global,
+            'semestres': semestres,
+            'stats_par_semestre': stats_par_semestre,
+            # Variante page matières (volumes et coûts CM + TD)
+            'matieres_page': {
+                'matieres_par_semestre': dict(
+                    (sem, matieres_par_semestre[sem]) for sem in semestres_matieres
+                ),
+                'total_volume_horaire': total_volume_cm + total_volume_td,
+                'total_cout': sum(m['total_taux_horaire'] for m in matieres_list),
+                'semestres': semestres_matieres,
+                'stats_par_semestre': stats_matieres_par_semestre,
+            },
+            'has_matieres': len(matieres_list) > 0,
+            'has_ues': len(ues_list) > 0,
+        }
+
+    @classmethod
+    def get(cls, maquette):
+        """
+        Retourne le view-model depuis le cache, ou le construit et le met en cache
+        """
+        cache_key = cls.get_cache_key(maquette)
+
+        start = time.perf_counter()
+        view_model = cache.get(cache_key)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if view_model is not None:
+            logger.debug(
+                f"⚡ View-model maquette {maquette.pk} servi depuis le cache "
+                f"({elapsed_ms:.2f} ms)"
+            )
+            return view_model
+
+        start = time.perf_counter()
+        view_model = cls.build(maquette)
+        cache.set(cache_key, view_model, cls.CACHE_TIMEOUT)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        logger.info(
+            f"🔨 View-model maquette {maquette.pk} compilé en {elapsed_ms:.2f} ms: "
+            f"{view_model['total_matieres']} matières, "
+            f"{len(view_model['ues'])} UEs, "
+            f"{len(view_model['semestres'])} semestres"
+        )
+        return view_model
+
+    @classmethod
+    def warm(cls, maquette):
+        """Précalcule le view-model (appelé à la synchronisation)"""
+        try:
+            view_model = cls.build(maquette)
+            cache.set(cls.get_cache_key(maquette), view_model, cls.CACHE_TIMEOUT)
+            return view_model
+        except Exception as e:
+            logger.warning(f"⚠️ Précalcul view-model maquette {maquette.pk} impossible: {e}")
+            return None
+
+
+# ==========================================
+# CATALOGUE DES MODULES D'UNE CLASSE
+# ==========================================
+
+class ModuleCatalogueService:
+    """
+    Catalogue des modules (matières) des maquettes actives d'une classe,
+    utilisé par le wizard de précontrat.
+
+    La version du catalogue (ETag / Last-Modified) est dérivée des maquettes
+    actives de la classe : identifiants, `last_synced`, `updated_at` et
+    empreinte du contenu des UEs.
+    Le corps JSON est mis en cache par classe sous cette version.
+    """
+
+    CACHE_PREFIX = 'module_catalogue'
+    CACHE_TIMEOUT = getattr(settings, 'MODULE_CATALOGUE_CACHE_TIMEOUT', 60 * 60)
+
+    # Format de chaque endpoint : (clé du nom de matière, clé du nom d'UE)
+    VARIANTS = {
+        'api': ('libelle', 'nom'),
+        'precontrat': ('nom', 'libelle'),
+    }
+
+    @classmethod
+    def get_version(cls, request, classe_id):
+        """
+        Retourne (etag, last_modified) pour la classe, ou (None, None)
+        si la classe n'existe pas. Mémorisé sur la requête.
+        """
+        memo = getattr(request, '_module_catalogue_versions', None)
+        if memo is None:
+            memo = request._module_catalogue_versions = {}
+        if classe_id in memo:
+            return memo[classe_id]
+
+        classe_row = Classe.objects.filter(pk=classe_id).values_list(
+            'updated_at', 'is_active'
+        ).first()
+        if classe_row is None:
+            memo[classe_id] = (None, None)
+            return memo[classe_id]
+
+        rows = list(
+            Maquette.objects.filter(classe_id=classe_id, is_active=True)
+            .order_by('pk')
+            .values_list('pk', 'last_synced', 'updated_at', 'unites_enseignement')
+        )
+
+        parts = [str(classe_id), classe_row[0].isoformat(), str(classe_row[1])]
+        dates = [classe_row[0]]
+        for pk, last_synced, updated_at, unites_enseignement in rows:
+            contenu = MaquetteViewModelService.get_content_hash(unites_enseignement)[:12]
+            parts.append(f'{pk}:{last_synced.isoformat()}:{updated_at.isoformat()}:{contenu}')
+            dates.extend([last_synced, updated_at])
+
+        etag = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+        memo[classe_id] = (etag, max(dates))
+        return memo[classe_id]
+
+    @classmethod
+    def get_payload(cls, request, classe, variant):
+        """
+        Corps JSON du catalogue pour la classe (servi depuis le cache)
+
+        Returns:
+            dict ou None si la classe n'a aucune maquette active
+        """
+        etag, _ = cls.get_version(request, classe.pk)
+        cache_key = f'{cls.CACHE_PREFIX}_{variant}_{classe.pk}_{etag}'
+
+        payload = cache.get(cache_key)
+        if payload is not None:
+            return payload
+
+        maquettes = Maquette.objects.filter(classe=classe, is_active=True)
+        if not maquettes.exists():
+            return None
+
+        nom_key, ue_nom_key = cls.VARIANTS[variant]
+        modules = []
+        for maquette in maquettes:
+            for ue in maquette.unites_enseignement or []:
+                for matiere in ue.get('matieres', []):
+                    modules.append({
+                        'id': matiere.get('id'),
+                        'code': matiere.get('code', ''),
+                        'nom': matiere.get(nom_key, ''),
+                        'ue_nom': ue.get(ue_nom_key, ''),
+                        'volume_cm': float(matiere.get('volume_horaire_cm', 5)),
+                        'volume_td': float(matiere.get('volume_horaire_td', 5)),
+                        'taux_cm': float(matiere.get('taux_horaire_cm', 5000)),
+                        'taux_td': float(matiere.get('taux_horaire_td', 5000)),
+                    })
+
+        payload = {'success': True}
+        if variant == 'precontrat':
+            payload['classe'] = classe.nom
+        payload['modules'] = modules
+        payload['count'] = len(modules)
+
+        cache.set(cache_key, payload, cls.CACHE_TIMEOUT)
+        logger.debug(f"📦 Catalogue modules classe {classe.pk} ({variant}) mis en cache: {len(modules)} modules")
+        return payload
+
+
+# ==========================================
+# PROGRESSION ANNUELLE DES CLASSES
+# ==========================================
+
+class ProgressionService:
+    """
+    Progression des classes actives pour une année académique des
+    contrats : modules planifiés (maquettes actives), modules démarrés,
+    contrats en cours et terminés.
+
+    Le calcul tient en deux requêtes quel que soit le nombre de classes et
+    le résultat est mis en cache par année sous la version du tag
+    `progression` (cache_tableaux, partagée par tous les processus),
+    incrémentée à chaque modification d'un contrat, d'une maquette ou d'une
+    classe (voir `Gestion.signals`).
+    """
+
+    CACHE_PREFIX = 'progression_v2'
+    CACHE_TIMEOUT = getattr(settings, 'PROGRESSION_CACHE_TIMEOUT', 60 * 15)
+    TAG = 'progression'
+
+    STATUTS_DEMARRES = ['IN_PROGRESS', 'COMPLETED', 'READY_FOR_PAYMENT']
+    STATUTS_TERMINES = ['COMPLETED', 'READY_FOR_PAYMENT']
+
+    @staticmethod
+    def pourcentage(modules_demarres, total_modules):
+        return round((modules_demarres / total_modules) * 100, 1) if total_modules > 0 else 0
+
+    @classmethod
+    def get_version(cls):
+        """Génération courante du cache de progression"""
+        return cache_tableaux.versions([cls.TAG])[cls.TAG]
+
+    @classmethod
+    def invalider(cls):
+        """Rend obsolètes toutes les progressions en cache (toutes années)"""
+        cache_tableaux.incrementer([cls.TAG])
+
+    @classmethod
+    def invalider_apres_commit(cls):
+        """Invalide une fois la transaction courante validée"""
+        transaction.on_commit(cls.invalider)
+
+    @classmethod
+    def build(cls, annee):
+        """
+        Calcule la progression de l'année (sans cache)
+
+        Returns:
+            dict sérialisable : 'classes' (une ligne par classe active,
+            triées par niveau puis nom) et 'totaux' (modules des classes
+            actives, tous les contrats validés dans l'année)
+        """
+        modules_par_classe = Maquette.objects.filter(
+            classe=OuterRef('pk'),
+            is_active=True
+        ).order_by().values('classe').annotate(
+            total=Sum('nombre_modules')
+        ).values('total')
+
+        classes = list(
+            Classe.objects.filter(is_active=True).annotate(
+                total_modules=Coalesce(Subquery(modules_par_classe), 0)
+            ).order_by('niveau', 'nom').values(
+                'id', 'nom', 'filiere', 'niveau', 'total_modules'
+            )
+        )
+
+        compteurs = {
+            ligne['classe_id']: ligne
+            for ligne in Contrat.objects.filter(
+                annee_academique=Contrat.normaliser_annee(annee)
+            ).order_by().values('classe_id').annotate(
+                contrats_total=Count('pk'),
+                modules_demarres=Count('pk', filter=Q(status__in=cls.STATUTS_DEMARRES)),
+                contrats_en_cours=Count('pk', filter=Q(status='IN_PROGRESS')),
+                contrats_termines=Count('pk', filter=Q(status__in=cls.STATUTS_TERMINES)),
+            )
+        }
+
+        lignes = []
+        for classe in classes:
+            ligne = compteurs.get(classe['id'], {})
+            total_modules = classe.pop('total_modules')
+            modules_demarres = ligne.get('modules_demarres', 0)
+            lignes.append({
+                'classe': classe,
+                'total_modules': total_modules,
+                'modules_demarres': modules_demarres,
+                'modules_restants': max(total_modules - modules_demarres, 0),
+                'progression_pourcent': cls.pourcentage(modules_demarres, total_modules),
+                'contrats_en_cours': ligne.get('contrats_en_cours', 0),
+                'contrats_termines': ligne.get('contrats_termines', 0),
+            })
+
+        totaux = {
+            cle: sum(ligne[cle] for ligne in compteurs.values())
+            for cle in ('contrats_total', 'contrats_en_cours', 'contrats_termines')
+        }
+        totaux['classes'] = len(lignes)
+        for cle in ('total_modules', 'modules_demarres', 'modules_restants'):
+            totaux[cle] = sum(ligne[cle] for ligne in lignes)
+        totaux['progression_pourcent'] = cls.pourcentage(
+            totaux['modules_demarres'], totaux['total_modules']
+        )
+        return {'classes': lignes, 'totaux': totaux}
+
+    @classmethod
+    def get(cls, annee):
+        """Progression de l'année depuis le cache, calculée au besoin"""
+        annee = Contrat.normaliser_annee(annee)
+        cache_key = f'{cls.CACHE_PREFIX}_{cls.get_version()}_{annee}'
+
+        progression = cache.get(cache_key)
+        if progression is not None:
+            return progression
+
+        start = time.perf_counter()
+        progression = cls.build(annee)
+        cache.set(cache_key, progression, cls.CACHE_TIMEOUT)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        logger.debug(
+            f"📊 Progression {annee} calculée en {elapsed_ms:.2f} ms: "
+            f"{len(progression['classes'])} classes"
+        )
+        return progression
+
+
+# ==========================================
+# SÉRIES TEMPORELLES DE PROGRESSION
+# ==========================================
+
+class SerieProgressionService:
+    """
+    Heures réalisées (pointages) et prévues (volumes contractuels) cumulées
+    sur l'année académique, par semaine ou par mois : pour l'établissement
+    et par classe, filière et professeur.
+
+    Deux requêtes (pointages et contrats de l'année) ; le classement par
+    période, les cumuls et les courbes contractuelles sont vectorisés
+    (NumPy / pandas). Le volume d'un contrat est réparti linéairement entre
+    son début (réel, prévu, sinon date de validation) et sa fin prévue (à
+    défaut la fin de l'année). Le résultat est mis en cache par année et
+    fréquence sous les versions des tags `contrats` et `pointages`.
+    """
+
+    CACHE_PREFIX = 'serie_progression'
+    CACHE_TIMEOUT = getattr(settings, 'PROGRESSION_CACHE_TIMEOUT', 60 * 15)
+    TAGS = ('contrats', 'pointages')
+
+    FREQUENCES = {'semaine': 'W-SUN', 'mois': 'ME'}
+    DIMENSIONS = ('classe', 'filiere', 'professeur')
+
+    CHAMPS_POINTAGES = [
+        'date_seance', 'heures_cours', 'heures_td',
+        'contrat__classe_id', 'contrat__classe__nom', 'contrat__classe__filiere',
+        'contrat__professeur_id',
+        'contrat__professeur__user__first_name', 'contrat__professeur__user__last_name',
+    ]
+    CHAMPS_CONTRATS = [
+        'volume_heure_cours', 'volume_heure_td',
+        'date_debut_reelle', 'date_debut_prevue', 'date_validation', 'date_fin_prevue',
+        'classe_id', 'classe__nom', 'classe__filiere',
+        'professeur_id', 'professeur__user__first_name', 'professeur__user__last_name',
+    ]
+
+    @staticmethod
+    def fins_de_periode(annee, frequence):
+        """Dates de fin des périodes de l'année académique (1er septembre - 31 août)"""
+        debut = int(annee[:4])
+        premier_jour, dernier_jour = pd.Timestamp(debut, 9, 1), pd.Timestamp(debut + 1, 8, 31)
+        fins = pd.date_range(premier_jour, dernier_jour, freq=SerieProgressionService.FREQUENCES[frequence])
+        if not len(fins) or fins[-1] < dernier_jour:
+            fins = fins.append(pd.DatetimeIndex([dernier_jour]))
+        return fins
+
+    @staticmethod
+    def _dimensions(df, prefixe):
+        """Colonnes classe / filiere / professeur et libellés d'un DataFrame brut"""
+        professeur = (
+            df[f'{prefixe}professeur__user__first_name'].fillna('') + ' '
+            + df[f'{prefixe}professeur__user__last_name'].fillna('')
+        ).str.strip()
+        return pd.DataFrame({
+            'classe': df[f'{prefixe}classe_id'],
+            'classe_libelle': df[f'{prefixe}classe__nom'],
+            'filiere': df[f'{prefixe}classe__filiere'].fillna('').replace('', 'Non renseignée'),
+            'professeur': df[f'{prefixe}professeur_id'],
+            'professeur_libelle': professeur,
+        })
+
+    @classmethod
+    def charger(cls, annee):
+        """
+        Pointages et contrats de l'année sous forme de DataFrames
+
+        Returns:
+            tuple: (pointages: date, heures + dimensions,
+                    contrats: debut, fin, volume + dimensions)
+        """
+        pointages = pd.DataFrame.from_records(
+            list(Pointage.objects.filter(
+                contrat__annee_academique=annee
+            ).values_list(*cls.CHAMPS_POINTAGES)),
+            columns=cls.CHAMPS_POINTAGES,
+        )
+        contrats = pd.DataFrame.from_records(
+            list(Contrat.objects.filter(
+                annee_academique=annee
+            ).values_list(*cls.CHAMPS_CONTRATS)),
+            columns=cls.CHAMPS_CONTRATS,
+        )
+
+        pointages = pd.concat([
+            pd.DataFrame({
+                'date': pd.to_datetime(pointages['date_seance']),
+                'heures': pointages['heures_cours'].astype(float) + pointages['heures_td'].astype(float),
+            }),
+            cls._dimensions(pointages, 'contrat__'),
+        ], axis=1)
+
+        validation = pd.to_datetime(contrats['date_validation'], utc=True).dt.tz_convert(
+            settings.TIME_ZONE
+        ).dt.tz_localize(None).dt.normalize()
+        debut = pd.to_datetime(contrats['date_debut_reelle']).fillna(
+            pd.to_datetime(contrats['date_debut_prevue'])
+        ).fillna(validation)
+        contrats = pd.concat([
+            pd.DataFrame({
+                'debut': debut,
+                'fin': pd.to_datetime(contrats['date_fin_prevue']),
+                'volume': contrats['volume_heure_cours'].astype(float) + contrats['volume_heure_td'].astype(float),
+            }),
+            cls._dimensions(contrats, ''),
+        ], axis=1)
+        return pointages, contrats
+
+    @classmethod
+    def calculer(cls, pointages, contrats, fins):
+        """
+        Cumuls réalisés / prévus par période (calcul vectorisé, sans requête)
+
+        Returns:
+            dict: 'global' et une liste de séries par dimension
+        """
+        nombre = len(fins)
+        bornes = fins.values.astype('datetime64[ns]')
+
+        # Période de chaque séance : première fin de période >= date de séance
+        periodes = np.minimum(
+            np.searchsorted(bornes, pointages['date'].values.astype('datetime64[ns]'), side='left'),
+            nombre - 1
+        )
+        heures = pointages['heures'].to_numpy(dtype=float)
+
+        # Courbes contractuelles : part du volume écoulée à chaque fin de période
+        debut = contrats['debut'].values.astype('datetime64[ns]').astype('int64')[:, None]
+        fin = contrats['fin'].fillna(fins[-1]).values.astype('datetime64[ns]').astype('int64')[:, None]
+        fin = np.maximum(fin, debut)
+        ecoule = (bornes.astype('int64')[None, :] - debut) / np.maximum(fin - debut, 1)
+        prevu = np.clip(ecoule, 0, 1) * contrats['volume'].to_numpy(dtype=float)[:, None]
+
+        resultat = {
+            'global': {
+                'realise': np.bincount(periodes, weights=heures, minlength=nombre).cumsum(),
+                'prevu': prevu.sum(axis=0),
+            },
+        }
+
+        for dimension in cls.DIMENSIONS:
+            realise = pd.DataFrame(
+                {'cle': pointages[dimension].to_numpy(), 'periode': periodes, 'heures': heures}
+            ).groupby(['cle', 'periode'])['heures'].sum().unstack(fill_value=0.0)
+            realise = realise.reindex(columns=range(nombre), fill_value=0.0).cumsum(axis=1)
+            prevu_dimension = pd.DataFrame(prevu).groupby(contrats[dimension].to_numpy()).sum()
+
+            cles = realise.index.union(prevu_dimension.index)
+            realise = realise.reindex(cles, fill_value=0.0).to_numpy()
+            prevu_dimension = prevu_dimension.reindex(cles, fill_value=0.0).to_numpy()
+
+            if dimension == 'filiere':
+                libelles = {}
+            else:
+                colonne = f'{dimension}_libelle'
+                libelles = pd.concat([
+                    pointages[[dimension, colonne]], contrats[[dimension, colonne]]
+                ]).drop_duplicates(dimension).set_index(dimension)[colonne]
+
+            resultat[dimension] = [
+                {'cle': cle, 'libelle': libelles.get(cle, str(cle)), 'realise': realise[i], 'prevu': prevu_dimension[i]}
+                for i, cle in enumerate(cles)
+            ]
+        return resultat
+
+    @staticmethod
+    def _serie(realise, prevu):
+        total = float(prevu[-1]) if len(prevu) else 0.0
+        return {
+            'realise': np.round(realise, 2).tolist(),
+            'prevu': np.round(prevu, 2).tolist(),
+            'taux_realisation': round(float(realise[-1]) / total * 100, 1) if total else 0,
+        }
+
+    @classmethod
+    def build(cls, annee, frequence='semaine'):
+        """Série de l'année (sans cache), sérialisable en JSON"""
+        annee = Contrat.normaliser_annee(annee)
+        fins = cls.fins_de_periode(annee, frequence)
+        pointages, contrats = cls.charger(annee)
+        calcul = cls.calculer(pointages, contrats, fins)
+
+        serie = {
+            'annee_academique': annee,
+            'frequence': frequence,
+            'periodes': [fin.date().isoformat() for fin in fins],
+            'global': cls._serie(calcul['global']['realise'], calcul['global']['prevu']),
+        }
+        for dimension in cls.DIMENSIONS:
+            serie[dimension] = sorted(
+                (
+                    {
+                        'cle': ligne['cle'].item() if hasattr(ligne['cle'], 'item') else ligne['cle'],
+                        'libelle': ligne['libelle'],
+                        **cls._serie(ligne['realise'], ligne['prevu']),
+                    }
+                    for ligne in calcul[dimension]
+                ),
+                key=lambda ligne: str(ligne['libelle'])
+            )
+        return serie
+
+    @classmethod
+    def get(cls, annee, frequence='semaine'):
+        """Série de l'année depuis le cache, calculée au besoin"""
+        if frequence not in cls.FREQUENCES:
+            frequence = 'semaine'
+        annee = Contrat.normaliser_annee(annee)
+        if not re.fullmatch(r'\d{4}-\d{4}', annee):
+            annee = Contrat.annee_academique_de()
+        signature = '.'.join(str(v) for v in cache_tableaux.versions(cls.TAGS).values())
+        cache_key = f'{cls.CACHE_PREFIX}_{annee}_{frequence}_{signature}'
+
+        serie = cache.get(cache_key)
+        if serie is not None:
+            return serie
+
+        start = time.perf_counter()
+        serie = cls.build(annee, frequence)
+        cache.set(cache_key, serie, cls.CACHE_TIMEOUT)
+        logger.debug(
+            f"📈 Série de progression {annee} ({frequence}) calculée en "
+            f"{(time.perf_counter() - start) * 1000:.2f} ms"
+        )
+        return serie
+
+
+# ==========================================
+# CRÉATION EN MASSE DES MODULES PROPOSÉS
+# ==========================================
+
+def _to_decimal(value, default=0):
+    """Conversion sécurisée en Decimal"""
+    try:
+        return Decimal(str(value)) if value is not None else Decimal(default)
+    except (TypeError, ValueError, ArithmeticError):
+        return Decimal(default)
+
+
+class ModuleProposeService:
+    """
+    Création des modules proposés d'un précontrat à partir des maquettes
+    de la classe : un seul parcours des maquettes, validation en mémoire,
+    puis un seul INSERT via `bulk_create`.
+    """
+
+    @staticmethod
+    def build_module_data(matiere, ue, module_id):
+        """
+        Normalise une matière de maquette en données de module
+        (volumes par défaut à 20h, taux par défaut à 5000 FCFA)
+        """
+        def safe_float(value, default=0.0):
+            try:
+                if value is None or value == '':
+                    return default
+                return float(value)
+            except (TypeError, ValueError):
+                return default
+
+        volume_cm = safe_float(matiere.get('volume_horaire_cm'), 20.0)
+        volume_td = safe_float(matiere.get('volume_horaire_td'), 20.0)
+
+        if volume_cm <= 0 and volume_td <= 0:
+            logger.warning(f"⚠️ Module {module_id} a tous les volumes à 0, utilisation de valeurs par défaut")
+            volume_cm = 20.0
+            volume_td = 20.0
+
+        taux_cm = safe_float(matiere.get('taux_horaire_cm'), 5000.0)
+        taux_td = safe_float(matiere.get('taux_horaire_td'), 5000.0)
+
+        if volume_cm > 0 and taux_cm <= 0:
+            logger.warning(f"⚠️ Module {module_id}: Volume CM > 0 mais taux CM = 0, correction à 5000")
+            taux_cm = 5000.0
+
+        if volume_td > 0 and taux_td <= 0:
+            logger.warning(f"⚠️ Module {module_id}: Volume TD > 0 mais taux TD = 0, correction à 5000")
+            taux_td = 5000.0
+
+        return {
+            'id': matiere.get('id'),
+            'code': matiere.get('code', f'MOD_{module_id}'),
+            'nom': matiere.get('nom', 'Module sans nom'),
+            'ue_nom': ue.get('libelle', 'UE non spécifiée'),
+            'volume_horaire_cm': volume_cm,
+            'volume_horaire_td': volume_td,
+            'taux_horaire_cm': taux_cm,
+            'taux_horaire_td': taux_td,
+        }
+
+    @staticmethod
+    def build_module_index(maquettes):
+        """
+        Indexe les matières des maquettes par identifiant (str)
+
+        Returns:
+            dict: {str(matiere_id): (matiere, ue)} — première occurrence conservée
+        """
+        index = {}
+        for maquette in maquettes:
+            for ue in maquette.unites_enseignement or []:
+                for matiere in ue.get('matieres', []):
+                    index.setdefault(str(matiere.get('id', '')), (matiere, ue))
+        return index
+
+    @classmethod
+    def bulk_create(cls, precontrat, maquettes, module_ids):
+        """
+        Crée les modules proposés sélectionnés pour un précontrat
+
+        À appeler dans une transaction. Les erreurs sont rapportées module
+        par module, dans le même format que la création unitaire.
+
+        Returns:
+            tuple: (liste des ModulePropose créés, liste des messages d'erreur)
+        """
+        index = cls.build_module_index(maquettes)
+
+        modules = []
+        errors = []
+        codes_vus = set()
+
+        for module_id in module_ids:
+            try:
+                found = index.get(str(module_id))
+                if not found:
+                    error_msg = f"Module ID {module_id} non trouvé"
+                    errors.append(error_msg)
+                    logger.warning(f"⚠️ {error_msg}")
+                    continue
+
+                module_data = cls.build_module_data(found[0], found[1], module_id)
+
+                module = ModulePropose(
+                    pre_contrat=precontrat,
+                    code_module=module_data.get('id', f'MOD_{module_id}'),
+                    nom_module=module_data.get('nom', 'Module sans nom'),
+                    ue_nom=module_data.get('ue_nom', 'UE non spécifiée'),
+                    volume_heure_cours=_to_decimal(module_data.get('volume_horaire_cm')),
+                    volume_heure_td=_to_decimal(module_data.get('volume_horaire_td')),
+                    taux_horaire_cours=_to_decimal(module_data.get('taux_horaire_cm')),
+                    taux_horaire_td=_to_decimal(module_data.get('taux_horaire_td')),
+                    est_valide=False,
+                )
+
+                # Validation en mémoire : le précontrat vient d'être créé,
+                # l'unicité (pre_contrat, code_module) se vérifie sur le lot
+                module.full_clean(exclude=['pre_contrat'], validate_unique=False)
+                if module.code_module in codes_vus:
+                    raise ValidationError({
+                        NON_FIELD_ERRORS: [
+                            module.unique_error_message(
+                                ModulePropose, ('pre_contrat', 'code_module')
+                            )
+                        ]
+                    })
+                codes_vus.add(module.code_module)
+                modules.append(module)
+
+            except Exception as e:
+                error_msg = f"Erreur module {module_id}: {str(e)}"
+                errors.append(error_msg)
+                logger.error(f"❌ {error_msg}")
+
+        if modules:
+            ModulePropose.objects.bulk_create(modules)
+            logger.info(f"✅ {len(modules)} module(s) créé(s) pour le précontrat {precontrat.pk}")
+
+        return modules, errors
+
+
+# ==========================================
+# GÉNÉRATION DES CONTRATS EN MASSE
+# ==========================================
+
+class ContratGenerationService:
+    """
+    Génération ensembliste des contrats d'un précontrat validé.
+
+    Budget de requêtes constant quel que soit le nombre de modules
+    (16 requêtes SAVEPOINT compris sur SQLite) : verrou du précontrat, un UPDATE de validation des modules,
+    une lecture des modules sans contrat, maquette + profil professeur,
+    réservation des références, un INSERT des contrats, un INSERT des logs.
+
+    Idempotent : seuls les modules validés sans contrat sont traités,
+    un second appel ne crée rien.
+    """
+
+    @staticmethod
+    def _get_professeur(utilisateur):
+        """Profil Professeur de l'utilisateur (créé s'il n'existe pas)"""
+        from Utilisateur.models import Professeur
+
+        try:
+            return utilisateur.professeur
+        except Professeur.DoesNotExist:
+            logger.warning(f"⚠️ Création du profil professeur pour {utilisateur}")
+            return Professeur.objects.create(
+                user=utilisateur,
+                specialite='Non spécifiée'
+            )
+
+    @classmethod
+    def generer_contrats(cls, precontrat, user, valider_modules=True):
+        """
+        Valide les modules du précontrat et crée leurs contrats
+
+        Args:
+            precontrat: PreContrat
+            user: utilisateur à l'origine de la validation
+            valider_modules: valide d'abord tous les modules non validés
+
+        Returns:
+            dict: {'modules_valides': int, 'contrats': [Contrat, ...]}
+        """
+        with transaction.atomic():
+            # Sérialise les validations concurrentes d'un même précontrat
+            PreContrat.objects.select_for_update().filter(pk=precontrat.pk).exists()
+
+            now = timezone.now()
+            modules_valides = 0
+            if valider_modules:
+                modules_valides = precontrat.modules_proposes.filter(
+                    est_valide=False
+                ).update(est_valide=True, date_validation=now)
+
+            modules = list(
+                ModulePropose.objects.filter(
+                    pre_contrat=precontrat,
+                    est_valide=True,
+                    contrat__isnull=True,
+                ).order_by('code_module')
+            )
+
+            if not modules:
+                logger.info(f"ℹ️ Aucun contrat à créer pour le précontrat {precontrat.reference}")
+                return {'modules_valides': modules_valides, 'contrats': []}
+
+            maquette = Maquette.objects.filter(
+                classe_id=precontrat.classe_id,
+                is_active=True
+            ).first()
+            if not maquette:
+                raise ValidationError("Aucune maquette active trouvée pour cette classe")
+
+            professeur = cls._get_professeur(precontrat.professeur)
+            references = Contrat.allouer_references(len(modules))
+            # bulk_create n'appelle pas save() : année académique fixée ici
+            annee_academique = precontrat.annee_academique or Contrat.annee_academique_de(now)
+
+            contrats = [
+                Contrat(
+                    module_propose=module,
+                    reference=reference,
+                    professeur=professeur,
+                    classe_id=precontrat.classe_id,
+                    maquette=maquette,
+                    volume_heure_cours=module.volume_heure_cours,
+                    volume_heure_td=module.volume_heure_td,
+                    taux_horaire_cours=module.taux_horaire_cours,
+                    taux_horaire_td=module.taux_horaire_td,
+                    valide_par=user,
+                    date_validation=now,
+                    annee_academique=annee_academique,
+                    status='VALIDATED',
+                )
+                for module, reference in zip(modules, references)
+            ]
+            Contrat.objects.bulk_create(contrats)
+
+            # Backends sans RETURNING : relire les clés par référence
+            if any(contrat.pk is None for contrat in contrats):
+                ids = dict(
+                    Contrat.objects.filter(reference__in=references)
+                    .values_list('reference', 'pk')
+                )
+                for contrat in contrats:
+                    contrat.pk = ids[contrat.reference]
+
+            # bulk_create ne déclenche pas les signaux
+            compteurs.enregistrer(Contrat, apres=contrats)
+            cache_tableaux.invalider_modele(Contrat, contrats)
+            ProgressionService.invalider_apres_commit()
+
+            ActionLog.objects.bulk_create([
+                ActionLog(
+                    contrat=contrat,
+                    module_propose=contrat.module_propose,
+                    action='CREATED',
+                    user=user,
+                    details=f"Contrat créé automatiquement depuis le module {contrat.module_propose.code_module}"
+                )
+                for contrat in contrats
+            ])
+
+        logger.info(
+            f"✅ {len(contrats)} contrat(s) créé(s) pour le précontrat {precontrat.reference} "
+            f"({modules_valides} module(s) validé(s))"
+        )
+        return {'modules_valides': modules_valides, 'contrats': contrats}
+
+
+# ==========================================
+# SAISIE GROUPÉE DES POINTAGES
+# ==========================================
+
+class PointageBatchService:
+    """
+    Enregistrement d'une grille de pointages (plusieurs séances, plusieurs
+    contrats) : contrôle des quotas par contrat en une requête, puis
+    `bulk_create` des pointages et des lignes de la table M2M des groupes.
+    """
+
+    @staticmethod
+    def get_choices():
+        """
+        Choix partagés par toutes les lignes de la grille
+
+        Returns:
+            tuple: (choix des contrats en cours, choix des groupes actifs)
+        """
+        contrats = list(
+            Contrat.objects.filter(status='IN_PROGRESS')
+            .select_related('classe', 'professeur__user', 'module_propose')
+            .order_by('classe__nom', 'reference')
+        )
+        contrat_choices = [
+            (
+                contrat.pk,
+                f"{contrat.reference} - {contrat.module_propose.nom_module} "
+                f"({contrat.classe.nom} / {contrat.professeur.user.get_full_name()})"
+            )
+            for contrat in contrats
+        ]
+
+        classe_ids = {contrat.classe_id for contrat in contrats}
+        groupe_choices = [
+            (groupe.pk, f"{groupe.classe.nom} - {groupe.nom}")
+            for groupe in Groupe.objects.filter(
+                is_active=True,
+                classe_id__in=classe_ids
+            ).select_related('classe').order_by('classe__nom', 'nom')
+        ]
+        return contrat_choices, groupe_choices
+
+    @classmethod
+    def enregistrer(cls, lignes, user):
+        """
+        Enregistre les lignes validées de la grille
+
+        Args:
+            lignes: liste de cleaned_data (contrat, date_seance, heure_debut,
+                    heure_fin, heures_cours, heures_td, groupes)
+            user: utilisateur qui saisit
+
+        Returns:
+            list: pointages créés
+
+        Raises:
+            ValidationError: liste des erreurs (aucun pointage n'est créé)
+        """
+        contrat_ids = {ligne['contrat'] for ligne in lignes}
+
+        with transaction.atomic():
+            # Verrou + volumes et compteurs en une requête
+            contrats = {
+                contrat.pk: contrat
+                for contrat in Contrat.objects.select_for_update()
+                .filter(pk__in=contrat_ids)
+                .prefetch_related('groupes_selectionnes', 'classes_tronc_commun')
+            }
+            groupes_par_id = {
+                groupe.pk: groupe
+                for groupe in Groupe.objects.filter(
+                    pk__in={g for ligne in lignes for g in ligne['groupes']}
+                )
+            }
+
+            errors = []
+            totaux = {}
+
+            for numero, ligne in enumerate(lignes, start=1):
+                contrat = contrats.get(ligne['contrat'])
+                if contrat is None or contrat.status != 'IN_PROGRESS':
+                    errors.append(f"Ligne {numero}: ce contrat n'est pas en cours")
+                    continue
+
+                # Groupes autorisés : groupes sélectionnés du contrat + groupes
+                # actifs des classes en tronc commun
+                autorises = {g.pk for g in contrat.groupes_selectionnes.all()}
+                classes_tc = set()
+                if contrat.type_enseignement == 'TRONC_COMMUN':
+                    classes_tc = {c.pk for c in contrat.classes_tronc_commun.all()}
+                for groupe_id in ligne['groupes']:
+                    groupe = groupes_par_id.get(groupe_id)
+                    if groupe_id in autorises:
+                        continue
+                    if groupe and groupe.is_active and groupe.classe_id in classes_tc:
+                        continue
+                    errors.append(
+                        f"Ligne {numero}: le groupe "
+                        f"{groupe.nom if groupe else groupe_id} n'est pas rattaché au contrat {contrat.reference}"
+                    )
+
+                total = totaux.setdefault(contrat.pk, [Decimal('0'), Decimal('0')])
+                total[0] += ligne['heures_cours']
+                total[1] += ligne['heures_td']
+
+            for contrat_id, (cours, td) in totaux.items():
+                contrat = contrats[contrat_id]
+                if contrat.heures_cours_effectuees + cours > contrat.volume_heure_cours:
+                    errors.append(
+                        f"{contrat.reference}: les heures de cours dépassent le volume contractuel "
+                        f"({contrat.heures_cours_effectuees + cours} > {contrat.volume_heure_cours})"
+                    )
+                if contrat.heures_td_effectuees + td > contrat.volume_heure_td:
+                    errors.append(
+                        f"{contrat.reference}: les heures de TD dépassent le volume contractuel "
+                        f"({contrat.heures_td_effectuees + td} > {contrat.volume_heure_td})"
+                    )
+
+            if errors:
+                raise ValidationError(errors)
+
+            pointages = Pointage.objects.bulk_create([
+                Pointage(
+                    contrat_id=ligne['contrat'],
+                    date_seance=ligne['date_seance'],
+                    heure_debut=ligne.get('heure_debut'),
+                    heure_fin=ligne.get('heure_fin'),
+                    heures_cours=ligne['heures_cours'],
+                    heures_td=ligne['heures_td'],
+                    est_valide=True,
+                    enregistre_par=user,
+                )
+                for ligne in lignes
+            ])
+
+            Through = Pointage.groupes.through
+            Through.objects.bulk_create([
+                Through(pointage_id=pointage.pk, groupe_id=groupe_id)
+                for pointage, ligne in zip(pointages, lignes)
+                for groupe_id in set(ligne['groupes'])
+            ])
+
+            # bulk_create ne déclenche pas les signaux : compteurs à la main
+            for contrat_id, (cours, td) in totaux.items():
+                Contrat.ajuster_heures_effectuees(contrat_id, cours, td)
+            cache_tableaux.invalider_modele(Pointage, [
+                {'professeur_id': contrats[contrat_id].professeur_id} for contrat_id in totaux
+            ])
+
+        logger.info(
+            f"✅ Saisie groupée: {len(pointages)} pointage(s) sur "
+            f"{len(totaux)} contrat(s) par {user}"
+        )
+        return pointages
+
+
+# ==========================================
+# CAMPAGNES DE PAIE
+# ==========================================
+
+class CampagnePaieService:
+    """
+    Paie groupée des contrats prêts pour paiement d'une période.
+
+    Les montants sont calculés en SQL à partir des compteurs d'heures
+    effectuées du contrat (aucun rechargement des pointages), les paiements
+    sont créés par un bulk_create puis approuvés / payés en lot via les
+    transitions en masse de PaiementContratQuerySet.
+    """
+
+    # Statuts de paiement qui excluent un contrat d'une nouvelle campagne
+    STATUTS_PAIEMENT_ACTIFS = ['PENDING', 'APPROVED', 'PROCESSING', 'PAID']
+
+    @staticmethod
+    def get_taux_deductions():
+        """Taux de retenue par défaut (%), configurable dans les settings"""
+        return Decimal(str(getattr(settings, 'PAIE_TAUX_DEDUCTIONS', '0.00')))
+
+    @classmethod
+    def contrats_eligibles(cls, debut, fin, taux_deductions):
+        """
+        Contrats prêts pour paiement terminés entre `debut` et `fin`, sans
+        paiement en cours, annotés de leurs montants : brut (montant_a_payer,
+        voir ContratQuerySet.with_montants), paie_deductions et paie_net
+        """
+        montant_field = DecimalField(max_digits=14, decimal_places=2)
+        deductions = Round(
+            ExpressionWrapper(
+                F('montant_a_payer') * Value(taux_deductions) / Value(Decimal('100')),
+                output_field=montant_field
+            ),
+            2,
+            output_field=montant_field
+        )
+
+        return Contrat.objects.filter(
+            status='READY_FOR_PAYMENT',
+            date_fin_reelle__range=(debut, fin),
+        ).exclude(
+            paiements__status__in=cls.STATUTS_PAIEMENT_ACTIFS
+        ).with_montants().annotate(
+            paie_deductions=deductions,
+        ).annotate(
+            paie_net=ExpressionWrapper(
+                F('montant_a_payer') - F('paie_deductions'),
+                output_field=montant_field
+            ),
+        )
+
+    @staticmethod
+    def actualiser_totaux(campagne):
+        """Recalcule les totaux de la campagne (un agrégat SQL)"""
+        totaux = campagne.paiements.exclude(
+            status__in=['REJECTED', 'CANCELLED']
+        ).aggregate(
+            nombre=Count('pk'),
+            brut=Sum('montant_brut'),
+            deductions=Sum('montant_deductions'),
+            net=Sum('montant_net'),
+        )
+        campagne.nombre_paiements = totaux['nombre']
+        campagne.montant_brut_total = totaux['brut'] or Decimal('0.00')
+        campagne.montant_deductions_total = totaux['deductions'] or Decimal('0.00')
+        campagne.montant_net_total = totaux['net'] or Decimal('0.00')
+        campagne.save(update_fields=[
+            'nombre_paiements', 'montant_brut_total',
+            'montant_deductions_total', 'montant_net_total', 'updated_at'
+        ])
+
+    @classmethod
+    def lancer(cls, debut, fin, user, taux_deductions=None):
+        """
+        Crée la campagne et les paiements de tous les contrats éligibles
+
+        Raises:
+            ValidationError: aucun contrat éligible sur la période
+        """
+        if taux_deductions is None:
+            taux_deductions = cls.get_taux_deductions()
+
+        with transaction.atomic():
+            lignes = list(
+                cls.contrats_eligibles(debut, fin, taux_deductions)
+                .select_for_update(of=('self',))
+                .order_by('professeur_id', 'reference')
+                .values('pk', 'professeur_id', 'montant_a_payer', 'paie_deductions', 'paie_net')
+            )
+            if not lignes:
+                raise ValidationError("Aucun contrat prêt pour paiement sur cette période")
+
+            campagne = CampagnePaie.objects.create(
+                periode_debut=debut,
+                periode_fin=fin,
+                taux_deductions=taux_deductions,
+                cree_par=user,
+            )
+
+            paiements = PaiementContrat.objects.bulk_create([
+                PaiementContrat(
+                    campagne=campagne,
+                    contrat_id=ligne['pk'],
+                    professeur_id=ligne['professeur_id'],
+                    montant_brut=ligne['montant_a_payer'],
+                    montant_deductions=ligne['paie_deductions'],
+                    montant_net=ligne['paie_net'],
+                    status='PENDING',
+                    cree_par=user,
+                )
+                for ligne in lignes
+            ])
+            compteurs.enregistrer(PaiementContrat, apres=paiements)
+            cache_tableaux.invalider_modele(PaiementContrat, paiements)
+
+            ActionLog.objects.bulk_create([
+                ActionLog(
+                    contrat_id=paiement.contrat_id,
+                    paiement=paiement,
+                    action='PAYMENT_CREATED',
+                    user=user,
+                    details=f"Paiement créé ({campagne.reference}) - Montant: {paiement.montant_net} FCFA"
+                )
+                for paiement in paiements
+            ])
+
+            cls.actualiser_totaux(campagne)
+
+        logger.info(
+            f"💰 Campagne {campagne.reference}: {campagne.nombre_paiements} paiement(s), "
+            f"{campagne.montant_net_total} FCFA net"
+        )
+        return campagne
+
+    @classmethod
+    def approuver(cls, campagne, user):
+        """Approuve tous les paiements en attente de la campagne"""
+        if campagne.status != 'CREATED':
+            raise ValidationError("Seules les campagnes créées peuvent être approuvées")
+
+        with transaction.atomic():
+            resultats = campagne.paiements.approuver(user)
+            campagne.status = 'APPROVED'
+            campagne.approuve_par = user
+            campagne.date_approbation = timezone.now()
+            campagne.save(update_fields=['status', 'approuve_par', 'date_approbation', 'updated_at'])
+
+        return resultats
+
+    @classmethod
+    def payer(cls, campagne, user, mode_paiement, reference=''):
+        """Paie tous les paiements approuvés de la campagne"""
+        if campagne.status != 'APPROVED':
+            raise ValidationError("Seules les campagnes approuvées peuvent être payées")
+
+        with transaction.atomic():
+            resultats = campagne.paiements.payer(
+                user, mode_paiement, reference or campagne.reference
+            )
+            campagne.status = 'PAID'
+            campagne.paye_par = user
+            campagne.date_paiement = timezone.now()
+            campagne.save(update_fields=['status', 'paye_par', 'date_paiement', 'updated_at'])
+
+        return resultats
+
+    @staticmethod
+    def resume(campagne):
+        """
+        Synthèse de la campagne : répartition par statut et par professeur
+        (une requête GROUP BY chacune)
+        """
+        paiements = campagne.paiements.all()
+        par_professeur = list(
+            paiements.order_by().values(
+                'professeur_id',
+                'professeur__user__first_name',
+                'professeur__user__last_name',
+            ).annotate(
+                nombre=Count('pk'),
+                brut=Sum('montant_brut'),
+                deductions=Sum('montant_deductions'),
+                net=Sum('montant_net'),
+            ).order_by('professeur__user__last_name', 'professeur__user__first_name')
+        )
+        return {
+            'par_statut': compter_par(paiements, 'status', choix=PaiementContrat.STATUS_CHOICES),
+            'par_professeur': par_professeur,
+        }
+
+    @staticmethod
+    def recus_pdf(campagne):
+        """Reçus de tous les paiements payés de la campagne, en un seul PDF"""
+        from .utils import generate_recus_paiement_pdf
+
+        paiements = campagne.paiements.filter(status='PAID').select_related(
+            'professeur__user', 'contrat__maquette', 'contrat__classe'
+        ).order_by('professeur__user__last_name', 'id')
+        return generate_recus_paiement_pdf(paiements)
@@ -0,0 +1,111 @@
+"""
+Signaux Django de l'application Gestion
+"""
+
+from decimal import Decimal
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Classe, Contrat, Maquette, Pointage
+from .services import ProgressionService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================
+# SIGNAUX POINTAGE - HEURES EFFECTUÉES
+# ==========================================
+
+def _decimal(valeur):
+    """Normalise une valeur d'heures en Decimal"""
+    return valeur if isinstance(valeur, Decimal) else Decimal(str(valeur or 0))
+
+
+def _appliquer_delta(instance, contrat_id, delta_cours, delta_td):
+    """
+    Répercute un delta d'heures sur le contrat (base + instance en mémoire)
+    """
+    delta_cours, delta_td = _decimal(delta_cours), _decimal(delta_td)
+    Contrat.ajuster_heures_effectuees(contrat_id, delta_cours, delta_td)
+
+    # Garder le contrat déjà chargé sur le pointage cohérent avec la base
+    if Pointage.contrat.is_cached(instance) and instance.contrat_id == contrat_id:
+        contrat = instance.contrat
+        contrat.heures_cours_effectuees += delta_cours
+        contrat.heures_td_effectuees += delta_td
+
+
+@receiver(pre_save, sender=Pointage)
+def pointage_memoriser_heures(sender, instance, raw=False, **kwargs):
+    """
+    Mémorise les heures enregistrées avant modification d'un pointage
+    """
+    instance._heures_precedentes = None
+    if raw or instance._state.adding or not instance.pk:
+        return
+
+    instance._heures_precedentes = Pointage.objects.filter(
+        pk=instance.pk
+    ).values_list('contrat_id', 'heures_cours', 'heures_td').first()
+
+
+@receiver(post_save, sender=Pointage)
+def pointage_maj_heures_contrat(sender, instance, created, raw=False, **kwargs):
+    """
+    Met à jour les compteurs d'heures du contrat après création / modification
+    """
+    if raw:
+        return
+
+    precedentes = getattr(instance, '_heures_precedentes', None)
+    instance._heures_precedentes = None
+
+    if created or precedentes is None:
+        _appliquer_delta(instance, instance.contrat_id, instance.heures_cours, instance.heures_td)
+        return
+
+    ancien_contrat_id, anciennes_cours, anciennes_td = precedentes
+    if ancien_contrat_id != instance.contrat_id:
+        # Pointage déplacé vers un autre contrat
+        Contrat.ajuster_heures_effectuees(ancien_contrat_id, -anciennes_cours, -anciennes_td)
+        _appliquer_delta(instance, instance.contrat_id, instance.heures_cours, instance.heures_td)
+    else:
+        _appliquer_delta(
+            instance,
+            instance.contrat_id,
+            _decimal(instance.heures_cours) - anciennes_cours,
+            _decimal(instance.heures_td) - anciennes_td,
+        )
+
+
+@receiver(post_delete, sender=Pointage)
+def pointage_supprime_heures_contrat(sender, instance, **kwargs):
+    """
+    Retire les heures d'un pointage supprimé du contrat
+    """
+    _appliquer_delta(
+        instance, instance.contrat_id,
+        -_decimal(instance.heures_cours), -_decimal(instance.heures_td)
+    )
+
+
+# ==========================================
+# SIGNAUX SUIVI - CACHE DE PROGRESSION
+# ==========================================
+
+@receiver(post_save, sender=Contrat)
+@receiver(post_delete, sender=Contrat)
+@receiver(post_save, sender=Maquette)
+@receiver(post_delete, sender=Maquette)
+@receiver(post_save, sender=Classe)
+@receiver(post_delete, sender=Classe)
+def progression_invalider_cache(sender, raw=False, **kwargs):
+    """
+    Invalide la progression annuelle en cache quand un contrat, une
+    maquette ou une classe change
+    """
+    if raw:
+        return
+    ProgressionService.invalider_apres_commit()
@@ -1,3 +1,480 @@
-from django.test import TestCase
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from Utilisateur import cache_tableaux
+from Utilisateur.models import CustomUser, Professeur, Section
+
+from . import exports, views
+from .models import Classe, Contrat, ExportJob, Maquette, ModulePropose, Pointage, PreContrat
+from .services import (
+    ContratGenerationService, MaquetteViewModelService, ModuleProposeService, ProgressionService
+)
+
+
+# Création des comptes sans le coût du hachage PBKDF2
+HASHERS_RAPIDES = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+def creer_maquette(classe, nombre_modules):
+    """Maquette active d'une UE de `nombre_modules` matières"""
+    return Maquette.objects.create(
+        external_id=classe.external_id,
+        classe=classe,
+        filiere_id=1,
+        niveau_id=1,
+        anneeacademique_id=1,
+        unites_enseignement=[{
+            'libelle': 'UE 1',
+            'matieres': [
+                {
+                    'id': numero,
+                    'code': f'MOD{numero}',
+                    'nom': f'Module {numero}',
+                    'volume_horaire_cm': 20,
+                    'volume_horaire_td': 10,
+                }
+                for numero in range(1, nombre_modules + 1)
+            ],
+        }],
+        is_active=True,
+    )
+
+
+class DonneesPedagogiquesMixin:
+    """Section, responsable RH, professeur et classe avec sa maquette"""
+
+    NOMBRE_MODULES = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.section = Section.objects.create(nom='Section Test')
+        cls.rh = CustomUser.objects.create_user(
+            'rh@example.com', role='RESP_RH', first_name='Resp', last_name='RH'
+        )
+        cls.user_professeur = CustomUser.objects.create_user(
+            'prof@example.com', role='PROFESSEUR', first_name='Jean', last_name='Prof'
+        )
+        cls.professeur = Professeur.objects.create(
+            user=cls.user_professeur, date_naissance=date(1980, 1, 1)
+        )
+        cls.classe = Classe.objects.create(
+            external_id=1, nom='L1 Info', niveau='L1', filiere='INFO', section=cls.section
+        )
+        cls.maquette = creer_maquette(cls.classe, cls.NOMBRE_MODULES)
+
+    def creer_precontrat(self, nombre_modules):
+        precontrat = PreContrat.objects.create(
+            professeur=self.user_professeur, classe=self.classe, cree_par=self.rh
+        )
+        ModulePropose.objects.bulk_create([
+            ModulePropose(
+                pre_contrat=precontrat,
+                code_module=str(numero),
+                nom_module=f'Module {numero}',
+                volume_heure_cours=20,
+                volume_heure_td=10,
+                taux_horaire_cours=5000,
+                taux_horaire_td=5000,
+            )
+            for numero in range(1, nombre_modules + 1)
+        ])
+        return precontrat
+
+    def nombre_requetes(self, fonction):
+        with CaptureQueriesContext(connection) as requetes:
+            fonction()
+        return len(requetes)
+
+
+@override_settings(PASSWORD_HASHERS=HASHERS_RAPIDES)
+class ModuleProposeServiceTests(DonneesPedagogiquesMixin, TestCase):
+
+    def test_bulk_create_une_seule_requete(self):
+        precontrat = PreContrat.objects.create(
+            professeur=self.user_professeur, classe=self.classe, cree_par=self.rh
+        )
+        module_ids = list(range(1, self.NOMBRE_MODULES + 1))
+
+        with self.assertNumQueries(1):
+            modules, erreurs = ModuleProposeService.bulk_create(
+                precontrat, [self.maquette], module_ids
+            )
+
+        self.assertEqual(erreurs, [])
+        self.assertEqual(len(modules), self.NOMBRE_MODULES)
+        self.assertEqual(precontrat.modules_proposes.count(), self.NOMBRE_MODULES)
+
+    def test_bulk_create_signale_les_modules_inconnus(self):
+        precontrat = PreContrat.objects.create(
+            professeur=self.user_professeur, classe=self.classe, cree_par=self.rh
+        )
+
+        modules, erreurs = ModuleProposeService.bulk_create(
+            precontrat, [self.maquette], [1, 999, 1]
+        )
+
+        self.assertEqual(len(modules), 1)
+        self.assertEqual(len(erreurs), 2)
+
+    def test_precontrat_create_budget_de_requetes_constant(self):
+        self.client.force_login(self.rh)
+
+        def creer(nombre_modules):
+            return self.client.post(reverse('precontrat_create'), {
+                'professeur': self.user_professeur.pk,
+                'classe': self.classe.pk,
+                'selected_modules': json.dumps(list(range(1, nombre_modules + 1))),
+            })
+
+        # Premier appel : création de la ligne de séquence des références
+        creer(1)
+
+        reference = self.nombre_requetes(lambda: creer(2))
+        with self.assertNumQueries(reference):
+            reponse = creer(self.NOMBRE_MODULES)
+
+        self.assertEqual(reponse.status_code, 302)
+        self.assertEqual(
+            PreContrat.objects.order_by('-date_creation').first().modules_proposes.count(),
+            self.NOMBRE_MODULES
+        )
+
+
+@override_settings(PASSWORD_HASHERS=HASHERS_RAPIDES)
+class ContratGenerationServiceTests(DonneesPedagogiquesMixin, TestCase):
+
+    def test_budget_de_requetes_constant(self):
+        # Premier appel : création des lignes de séquence et de compteurs
+        ContratGenerationService.generer_contrats(self.creer_precontrat(1), self.rh)
+
+        petit = self.creer_precontrat(2)
+        reference = self.nombre_requetes(
+            lambda: ContratGenerationService.generer_contrats(petit, self.rh)
+        )
+
+        grand = self.creer_precontrat(self.NOMBRE_MODULES)
+        with self.assertNumQueries(reference):
+            resultat = ContratGenerationService.generer_contrats(grand, self.rh)
+
+        self.assertEqual(resultat['modules_valides'], self.NOMBRE_MODULES)
+        self.assertEqual(len(resultat['contrats']), self.NOMBRE_MODULES)
+        self.assertEqual(
+            Contrat.objects.filter(module_propose__pre_contrat=grand).count(),
+            self.NOMBRE_MODULES
+        )
+
+    def test_second_appel_ne_cree_rien(self):
+        precontrat = self.creer_precontrat(3)
+        ContratGenerationService.generer_contrats(precontrat, self.rh)
+
+        resultat = ContratGenerationService.generer_contrats(precontrat, self.rh)
+
+        self.assertEqual(resultat, {'modules_valides': 0, 'contrats': []})
+        self.assertEqual(Contrat.objects.count(), 3)
+
+    def test_recapitulatif_valide_tous_les_modules(self):
+        precontrat = self.creer_precontrat(3)
+        self.client.force_login(self.rh)
+
+        reponse = self.client.post(
+            reverse('precontrat_recapitulatif', args=[precontrat.pk]),
+            {'action': 'validate_all_modules'},
+        )
+
+        self.assertEqual(reponse.status_code, 302)
+        self.assertEqual(Contrat.objects.filter(module_propose__pre_contrat=precontrat).count(), 3)
+        self.assertIn(
+            '3 module(s) validé(s) et 3 contrat(s) créé(s)',
+            [str(message) for message in get_messages(reponse.wsgi_request)][-1]
+        )
+
+
+@override_settings(PASSWORD_HASHERS=HASHERS_RAPIDES)
+class MaquetteViewModelServiceTests(DonneesPedagogiquesMixin, TestCase):
+
+    def test_cle_suit_le_contenu_des_ues(self):
+        view_model = MaquetteViewModelService.get(self.maquette)
+        self.assertEqual(view_model['total_matieres'], self.NOMBRE_MODULES)
+
+        # Écriture du JSON sans passer par save() : dates inchangées
+        Maquette.objects.filter(pk=self.maquette.pk).update(unites_enseignement=[])
+        maquette = Maquette.objects.get(pk=self.maquette.pk)
+
+        self.assertNotEqual(
+            MaquetteViewModelService.get_cache_key(maquette),
+            MaquetteViewModelService.get_cache_key(self.maquette)
+        )
+        self.assertEqual(MaquetteViewModelService.get(maquette)['total_matieres'], 0)
+
+    def test_catalogue_suit_le_contenu_des_ues(self):
+        self.client.force_login(self.rh)
+        url = reverse('api_get_classe_modules', args=[self.classe.pk])
+        reponse = self.client.get(url)
+        etag = reponse['ETag']
+        self.assertEqual(reponse.json()['count'], self.NOMBRE_MODULES)
+
+        Maquette.objects.filter(pk=self.maquette.pk).update(unites_enseignement=[])
+
+        reponse = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(reponse.status_code, 200)
+        self.assertNotEqual(reponse['ETag'], etag)
+        self.assertEqual(reponse.json()['count'], 0)
+
+
+@override_settings(PASSWORD_HASHERS=HASHERS_RAPIDES)
+class StatistiquesTests(DonneesPedagogiquesMixin, TestCase):
+    """Compteurs des tableaux de bord : une requête quel que soit le volume"""
+
+    def test_precontrat_get_statistiques_une_requete(self):
+        for status in ['DRAFT', 'DRAFT', 'SUBMITTED', 'VALIDATED']:
+            PreContrat.objects.create(
+                professeur=self.user_professeur, classe=self.classe,
+                cree_par=self.rh, status=status
+            )
+
+        with self.assertNumQueries(1):
+            stats = PreContrat.get_statistiques()
+
+        self.assertEqual(stats['total'], 4)
+        self.assertEqual(stats['draft'], 2)
+        self.assertEqual(stats['submitted'], 1)
+        self.assertEqual(stats['validated'], 1)
+        self.assertEqual(stats['rejected'], 0)
+
+    def test_dashboard_financier_une_requete(self):
+        with self.assertNumQueries(1):
+            stats = views._dashboard_financier()
+
+        self.assertEqual(stats, {
+            'paiements_pending': 0, 'paiements_approved': 0, 'montant_a_payer': 0,
+        })
+
+    def test_dashboard_pedagogique_budget_constant(self):
+        ContratGenerationService.generer_contrats(self.creer_precontrat(1), self.rh)
+        reference = self.nombre_requetes(views._dashboard_pedagogique)
+
+        ContratGenerationService.generer_contrats(
+            self.creer_precontrat(self.NOMBRE_MODULES), self.rh
+        )
+        with self.assertNumQueries(reference):
+            stats = views._dashboard_pedagogique()
+
+        self.assertEqual(stats['contrats_a_demarrer'], self.NOMBRE_MODULES + 1)
+
+
+@override_settings(PASSWORD_HASHERS=HASHERS_RAPIDES)
+class TransitionEnMasseTests(DonneesPedagogiquesMixin, TestCase):
+
+    def setUp(self):
+        self.client.force_login(CustomUser.objects.create_user('admin@example.com', role='ADMIN'))
+
+    def poster(self, modele, transition, ids):
+        return self.client.post(
+            reverse('api_transition_en_masse', args=[modele, transition]),
+            json.dumps({'ids': ids}),
+            content_type='application/json',
+        )
+
+    def test_identifiants_invalides(self):
+        for ids in (['a'], ['1'], [1.5], [True], [None], [[1]], 'abc', {'1': 1}, [], None):
+            with self.subTest(ids=ids):
+                reponse = self.poster('contrats', 'terminer', ids)
+                self.assertEqual(reponse.status_code, 400)
+                self.assertFalse(reponse.json()['success'])
+
+        # Précontrats : clés UUID
+        reponse = self.poster('precontrats', 'soumettre', [1])
+        self.assertEqual(reponse.status_code, 400)
+
+    def test_identifiants_valides(self):
+        precontrat = self.creer_precontrat(1)
+
+        reponse = self.poster('precontrats', 'soumettre', [precontrat.pk.hex])
+        self.assertEqual(reponse.status_code, 200)
+        self.assertIn(str(precontrat.pk), reponse.json()['resultats'])
+
+        reponse = self.poster('contrats', 'terminer', [123456])
+        self.assertEqual(reponse.status_code, 200)
+        self.assertFalse(reponse.json()['resultats']['123456']['succes'])
+
+
+@override_settings(PASSWORD_HASHERS=HASHERS_RAPIDES)
+class SuiviProgressionTests(DonneesPedagogiquesMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        resultat = ContratGenerationService.generer_contrats(self.creer_precontrat(4), self.rh)
+        Contrat.objects.filter(pk=resultat['contrats'][0].pk).update(status='IN_PROGRESS')
+        Contrat.objects.filter(pk=resultat['contrats'][1].pk).update(status='COMPLETED')
+        self.annee = Contrat.annee_academique_de()
+        self.client.force_login(self.rh)
+
+    def test_suivi_et_progression_partagent_les_chiffres(self):
+        totaux = ProgressionService.get(self.annee)['totaux']
+        self.assertEqual(totaux['total_modules'], self.NOMBRE_MODULES)
+        self.assertEqual(totaux['modules_demarres'], 2)
+        self.assertEqual(totaux['progression_pourcent'], round(2 / self.NOMBRE_MODULES * 100, 1))
+
+        suivi = self.client.get(reverse('classe_suivi_annuel'), {'annee': self.annee})
+        progression = self.client.get(reverse('progression_annuelle'), {'annee': self.annee})
+        self.assertEqual(suivi.status_code, 200)
+        self.assertEqual(progression.status_code, 200)
+
+        stats_suivi = suivi.context['stats_globales']
+        stats_progression = progression.context['stats_globales']
+        self.assertEqual(stats_suivi['total_modules_planifies'], stats_progression['total_modules'])
+        self.assertEqual(stats_suivi['total_modules_demarres'], stats_progression['modules_demarres'])
+        self.assertEqual(stats_suivi['progression_globale'], stats_progression['progression_globale'])
+        self.assertEqual(stats_suivi['contrats_en_cours'], 1)
+        self.assertEqual(stats_suivi['contrats_termines'], 1)
+
+        classe = suivi.context['classes'][0]
+        self.assertEqual(
+            (classe.total_modules, classe.modules_demarres, classe.modules_restants),
+            (self.NOMBRE_MODULES, 2, self.NOMBRE_MODULES - 2)
+        )
+
+    def test_annee_par_defaut_en_cours_de_janvier_a_aout(self):
+        # Février de l'année civile courante : l'année académique en cours a
+        # commencé l'année civile précédente
+        annee_civile = timezone.now().year
+        self.annee = f'{annee_civile - 1}-{annee_civile}'
+        Contrat.objects.update(annee_academique=self.annee)
+        fevrier = timezone.make_aware(datetime(annee_civile, 2, 15))
+        annee_academique_de = Contrat.annee_academique_de
+        with mock.patch.object(
+            Contrat, 'annee_academique_de',
+            staticmethod(lambda date=None: annee_academique_de(date or fevrier))
+        ):
+            suivi = self.client.get(reverse('classe_suivi_annuel'))
+            detail = self.client.get(reverse('classe_detail_suivi', args=[self.classe.pk]))
+            progression = self.client.get(reverse('progression_annuelle'))
+            api = self.client.get(reverse('api_progression_classes')).json()
+
+        annee_debut = int(self.annee[:4])
+        self.assertEqual(suivi.context['annee_academique'], annee_debut)
+        self.assertEqual(suivi.context['stats_globales']['total_modules_demarres'], 2)
+        self.assertEqual(detail.context['annee_academique'], annee_debut)
+        self.assertEqual(len(detail.context['contrats']), 4)
+        self.assertEqual(progression.context['annee_academique'], annee_debut)
+        self.assertEqual(progression.context['stats_globales']['modules_demarres'], 2)
+        self.assertEqual(api['annee_academique'], self.annee)
+        self.assertEqual(api['classes'][0]['modules_demarres'], 2)
+
+    def test_detail_fragment_calcule_une_fois(self):
+        url = reverse('classe_detail_suivi', args=[self.classe.pk])
+
+        with mock.patch.object(
+            views, '_detail_suivi_classe', wraps=views._detail_suivi_classe
+        ) as detail:
+            premiere = self.client.get(url, {'annee': self.annee})
+            seconde = self.client.get(url, {'annee': self.annee})
+
+        self.assertEqual(detail.call_count, 1)
+        for reponse in (premiere, seconde):
+            self.assertContains(reponse, 'Module 1')
+            self.assertContains(reponse, '<h2 class="fw-bold">12</h2>')
+        self.assertEqual(premiere.context['detail_html'], seconde.context['detail_html'])
+
+    def test_annees_disponibles_academiques(self):
+        # Contrats 2025-2026 validés en février 2026 : une seule année 2025
+        Contrat.objects.update(
+            annee_academique='2025-2026',
+            date_validation=timezone.make_aware(datetime(2026, 2, 15))
+        )
+
+        suivi = self.client.get(reverse('classe_suivi_annuel'))
+        progression = self.client.get(reverse('progression_annuelle'))
+
+        self.assertEqual(suivi.context['annees_disponibles'], [2025])
+        self.assertEqual(
+            suivi.context['annees_disponibles'], progression.context['annees_disponibles']
+        )
+
+    def test_annee_invalide_ramenee_a_l_annee_en_cours(self):
+        reponse = self.client.get(reverse('progression_annuelle'), {'annee': 'abc'})
+
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(reponse.context['annee_academique'], int(self.annee[:4]))
+
+
+@override_settings(PASSWORD_HASHERS=HASHERS_RAPIDES)
+class ExportDemandeTests(DonneesPedagogiquesMixin, TestCase):
+
+    def demander(self):
+        return exports.demander('contrats_excel', {'annee': '2025'}, self.rh)
+
+    def test_demande_identique_rejoint_le_job(self):
+        job, cree = self.demander()
+        meme_job, cree_encore = self.demander()
+
+        self.assertTrue(cree)
+        self.assertFalse(cree_encore)
+        self.assertEqual(meme_job.pk, job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.nombre_demandes, 2)
+
+    def test_nouvelle_empreinte_apres_modification_des_donnees(self):
+        job, _ = self.demander()
+        ExportJob.objects.filter(pk=job.pk).update(status='DONE')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cache_tableaux.invalider('contrats')
+
+        nouveau, cree = self.demander()
+        self.assertTrue(cree)
+        self.assertNotEqual(nouveau.empreinte, job.empreinte)
+
+    def test_nouvelle_empreinte_apres_pointage(self):
+        contrat = ContratGenerationService.generer_contrats(
+            self.creer_precontrat(1), self.rh
+        )['contrats'][0]
+        job, _ = self.demander()
+        ExportJob.objects.filter(pk=job.pk).update(status='DONE')
+
+        # Les heures effectuées du contrat changent sans toucher au tag 'contrats'
+        with self.captureOnCommitCallbacks(execute=True):
+            Pointage.objects.create(
+                contrat=contrat, date_seance=date(2025, 10, 6),
+                heures_cours=Decimal('2.00'), enregistre_par=self.rh
+            )
+
+        nouveau, cree = self.demander()
+        self.assertTrue(cree)
+        self.assertNotEqual(nouveau.empreinte, job.empreinte)
+
+    def test_job_concurrent_en_echec_recree(self):
+        concurrent, _ = self.demander()
+        lectures = []
+
+        def relire(signature):
+            # 1re lecture : job concurrent pas encore visible, l'INSERT est
+            # refusé ; il échoue avant la 2e lecture
+            lectures.append(signature)
+            if len(lectures) == 2:
+                ExportJob.objects.filter(pk=concurrent.pk).update(status='FAILED')
+            return None
+
+        with mock.patch.object(exports, '_reutilisable', side_effect=relire):
+            job, cree = self.demander()
+
+        self.assertEqual(len(lectures), 2)
+        self.assertTrue(cree)
+        self.assertNotEqual(job.pk, concurrent.pk)
+
+    def test_concurrence_persistante(self):
+        self.demander()
+
+        with mock.patch.object(exports, '_reutilisable', return_value=None):
+            with self.assertRaises(exports.DemandeConcurrente):
+                self.demander()
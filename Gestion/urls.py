@@ -78,9 +78,11 @@ path('contrats/<int:pk>/imprimable/', views.contrat_imprimable, name='contrat_im
          name='document_upload'),
      # path('contrats/<int:pk>/imprimable/', views.contrat_imprimable, name='contrat_imprimable'),
      path('contrats/', views.contrat_list, name='contrat_list'),
+     path('contrats/fiches/', views.contrat_fiches_zip, name='contrat_fiches_zip'),
      path('contrat/<int:pk>/', views.contrat_detail, name='contrat_detail'),
      path('contrat/demarage/<int:pk>/', views.contrat_start, name='contrat_start'),
      path('pointage/<int:contrat_id>/', views.pointage_create, name="pointage_create"),
+     path('pointages/saisie-groupee/', views.pointage_batch_create, name='pointage_batch_create'),
      path('contrat/<int:pk>/complet/', views.contrat_complete, name='contrat_complete'),
      path('api/groupes/by-classes/', views.api_groupes_by_classes, name='api_groupes_by_classes'),
 
@@ -101,6 +103,34 @@ path('contrats/<int:pk>/imprimable/', views.contrat_imprimable, name='contrat_im
          login_required(views.paiement_execute),
          name='paiement_execute'),
 
+    # Campagnes de paie (paiement groupé des contrats prêts pour paiement)
+    path('paiements/campagnes/',
+         views.campagne_paie_list,
+         name='campagne_paie_list'),
+
+    path('paiements/campagnes/<int:pk>/',
+         views.campagne_paie_detail,
+         name='campagne_paie_detail'),
+
+    path('paiements/campagnes/<int:pk>/recus/',
+         views.campagne_paie_recus,
+         name='campagne_paie_recus'),
+
+    # ========================================================================
+    # EXPORTS EN ARRIÈRE-PLAN (demande, suivi, téléchargement)
+    # ========================================================================
+    path('exports/<str:type_export>/demander/',
+         views.api_export_demander,
+         name='api_export_demander'),
+
+    path('exports/<int:pk>/',
+         views.api_export_statut,
+         name='api_export_statut'),
+
+    path('exports/<int:pk>/telecharger/',
+         views.export_telecharger,
+         name='export_telecharger'),
+
     # ========================================================================
     # ⭐ API ENDPOINTS (AJAX) - CORRECTION APPLIQUÉE
     # ========================================================================
@@ -110,6 +140,11 @@ path('contrats/<int:pk>/imprimable/', views.contrat_imprimable, name='contrat_im
          views.api_get_classe_modules,
          name='api_get_classe_modules'),
 
+    # Transitions de workflow en masse (précontrats, contrats, paiements)
+    path('api/transitions/<str:modele>/<str:transition>/',
+         views.api_transition_en_masse,
+         name='api_transition_en_masse'),
+
     # Récupérer les maquettes d'une classe
     path('api/maquettes/',
          login_required(views.api_get_maquettes),
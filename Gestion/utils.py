@@ -1,12 +1,27 @@
 # utils.py - Utilitaires pour le système de gestion des contrats
 
-from django.http import HttpResponse
+import django
+from django.http import FileResponse
 from django.template.loader import render_to_string, get_template
 from django.utils import timezone
+from django.conf import settings
+from django.utils.text import slugify
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
-import pandas as pd
+import multiprocessing
+import os
+import tempfile
+import time
+import zipfile
 from decimal import Decimal
 
+# Pour les exports Excel
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
 # Pour la génération de PDF
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, letter
@@ -23,14 +38,73 @@ from reportlab.pdfgen import canvas
 # GÉNÉRATION DE PDF - FICHE DE CONTRAT
 # ==========================================
 
+FICHE_LOGO = settings.BASE_DIR / 'static' / 'images' / 'logo' / 'IIPEA.png'
+
+
+def donnees_fiche_contrat(contrat):
+    """
+    Valeurs affichées sur la fiche d'un contrat, déjà formatées
+
+    Dictionnaire simple (picklable, sans accès à la base) : le rendu peut
+    se faire dans un autre processus. Prévoir un select_related sur
+    professeur__user, classe et maquette, et un prefetch_related sur
+    classes_tronc_commun.
+    """
+    professeur = contrat.professeur
+    lignes_volumes = [
+        ('Cours Magistral (CM)', contrat.volume_heure_cours, contrat.taux_horaire_cours),
+        ('Travaux Dirigés (TD)', contrat.volume_heure_td, contrat.taux_horaire_td),
+    ]
+    
+    donnees = {
+        'numero': contrat.id,
+        'reference': contrat.reference,
+        'date_validation': _date_fr(contrat.date_validation),
+        'professeur': {
+            'nom': professeur.user.get_full_name(),
+            'grade': professeur.grade or '-',
+            'specialite': professeur.specialite or '-',
+            'email': professeur.user.email,
+        },
+        'classe': contrat.classe.nom,
+        'departement': contrat.classe.departement,
+        'module': f"{contrat.maquette.filiere_sigle} - {contrat.maquette.niveau_libelle}",
+        'annee_academique': contrat.maquette.annee_academique,
+        'type_enseignement': contrat.get_type_enseignement_display(),
+        'classes_tronc_commun': None,
+        'volumes': [
+            [libelle, f"{volume}", f"{taux:,.0f}", f"{volume * taux:,.0f}"]
+            for libelle, volume, taux in lignes_volumes
+        ],
+        'volume_total': f"{contrat.volume_total_contractuel}",
+        'montant_total': f"{contrat.montant_total_contractuel:,.0f}",
+        'date_debut_prevue': _date_fr(contrat.date_debut_prevue) or 'Non définie',
+        'date_fin_prevue': _date_fr(contrat.date_fin_prevue) or 'Non définie',
+        'genere_le': timezone.localtime().strftime('%d/%m/%Y à %H:%M'),
+        'logo': str(FICHE_LOGO) if FICHE_LOGO.is_file() else None,
+    }
+    
+    if contrat.type_enseignement == 'TRONC_COMMUN':
+        donnees['classes_tronc_commun'] = ', '.join(c.nom for c in contrat.classes_tronc_commun.all())
+    
+    return donnees
+
+
 def generate_fiche_contrat_pdf(contrat):
     """
     Génère la fiche de contrat en PDF
+    """
+    return rendre_fiche_contrat_pdf(donnees_fiche_contrat(contrat))
+
+
+def rendre_fiche_contrat_pdf(donnees):
+    """
+    Rendu ReportLab de la fiche d'un contrat (voir donnees_fiche_contrat)
     
     Contient:
     - Informations du professeur
     - Informations de la classe et du module
-    - Volumes horaires (CM, TD, TP)
+    - Volumes horaires (CM, TD)
     - Taux horaires
     - Montant total contractuel
     - Dates
@@ -62,14 +136,10 @@ def generate_fiche_contrat_pdf(contrat):
         alignment=1,  # Centré
     )
     
-    # En-tête
-    logo_path = 'static/images/logo_iipea.png'  # Ajuster le chemin
-    try:
-        logo = Image(logo_path, width=3*cm, height=3*cm)
-        elements.append(logo)
+    # En-tête (Image ne lit le fichier qu'au rendu : existence vérifiée avant)
+    if donnees['logo']:
+        elements.append(Image(donnees['logo'], width=3*cm, height=3*cm))
         elements.append(Spacer(1, 0.5*cm))
-    except:
-        pass  # Si le logo n'existe pas
     
     # Titre
     title = Paragraph("FICHE DE CONTRAT D'ENSEIGNEMENT", title_style)
@@ -77,7 +147,7 @@ def generate_fiche_contrat_pdf(contrat):
     elements.append(Spacer(1, 0.5*cm))
     
     # Numéro de contrat et date
-    info_contrat = f"<b>Contrat N°:</b> {contrat.id} | <b>Date:</b> {contrat.date_validation.strftime('%d/%m/%Y')}"
+    info_contrat = f"<b>Contrat N°:</b> {donnees['numero']} | <b>Date:</b> {donnees['date_validation']}"
     elements.append(Paragraph(info_contrat, styles['Normal']))
     elements.append(Spacer(1, 0.8*cm))
     
@@ -85,11 +155,12 @@ def generate_fiche_contrat_pdf(contrat):
     elements.append(Paragraph("<b>1. INFORMATIONS DU PROFESSEUR</b>", styles['Heading2']))
     elements.append(Spacer(1, 0.3*cm))
     
+    professeur = donnees['professeur']
     prof_data = [
-        ['Nom complet:', f"{contrat.professeur.user.get_full_name()}"],
-        ['Grade:', contrat.professeur.grade if hasattr(contrat.professeur, 'grade') else '-'],
-        ['Spécialité:', contrat.professeur.specialite if hasattr(contrat.professeur, 'specialite') else '-'],
-        ['Contact:', contrat.professeur.user.email],
+        ['Nom complet:', professeur['nom']],
+        ['Grade:', professeur['grade']],
+        ['Spécialité:', professeur['specialite']],
+        ['Contact:', professeur['email']],
     ]
     
     prof_table = Table(prof_data, colWidths=[4*cm, 12*cm])
@@ -110,16 +181,15 @@ def generate_fiche_contrat_pdf(contrat):
     elements.append(Spacer(1, 0.3*cm))
     
     module_data = [
-        ['Classe:', contrat.classe.nom],
-        ['Département:', contrat.classe.departement],
-        ['Module:', f"{contrat.maquette.filiere_sigle} - {contrat.maquette.niveau_libelle}"],
-        ['Année académique:', contrat.maquette.annee_academique],
-        ['Type d\'enseignement:', contrat.get_type_enseignement_display()],
+        ['Classe:', donnees['classe']],
+        ['Département:', donnees['departement']],
+        ['Module:', donnees['module']],
+        ['Année académique:', donnees['annee_academique']],
+        ['Type d\'enseignement:', donnees['type_enseignement']],
     ]
     
-    if contrat.type_enseignement == 'TRONC_COMMUN':
-        classes_tc = ', '.join([c.nom for c in contrat.classes_tronc_commun.all()])
-        module_data.append(['Classes en tronc commun:', classes_tc])
+    if donnees['classes_tronc_commun'] is not None:
+        module_data.append(['Classes en tronc commun:', donnees['classes_tronc_commun']])
     
     module_table = Table(module_data, colWidths=[4*cm, 12*cm])
     module_table.setStyle(TableStyle([
@@ -140,30 +210,8 @@ def generate_fiche_contrat_pdf(contrat):
     
     volumes_data = [
         ['Type', 'Volume (heures)', 'Taux horaire (FCFA)', 'Montant (FCFA)'],
-        [
-            'Cours Magistral (CM)',
-            f"{contrat.volume_heure_cours}",
-            f"{contrat.taux_horaire_cours:,.0f}",
-            f"{contrat.volume_heure_cours * contrat.taux_horaire_cours:,.0f}"
-        ],
-        [
-            'Travaux Dirigés (TD)',
-            f"{contrat.volume_heure_td}",
-            f"{contrat.taux_horaire_td:,.0f}",
-            f"{contrat.volume_heure_td * contrat.taux_horaire_td:,.0f}"
-        ],
-        [
-            'Travaux Pratiques (TP)',
-            f"{contrat.volume_heure_tp}",
-            f"{contrat.taux_horaire_tp:,.0f}",
-            f"{contrat.volume_heure_tp * contrat.taux_horaire_tp:,.0f}"
-        ],
-        [
-            'TOTAL',
-            f"<b>{contrat.volume_total_contractuel}</b>",
-            '',
-            f"<b>{contrat.montant_total_contractuel:,.0f}</b>"
-        ],
+        *donnees['volumes'],
+        ['TOTAL', donnees['volume_total'], '', donnees['montant_total']],
     ]
     
     volumes_table = Table(volumes_data, colWidths=[4*cm, 3*cm, 4*cm, 5*cm])
@@ -186,9 +234,9 @@ def generate_fiche_contrat_pdf(contrat):
     elements.append(Spacer(1, 0.3*cm))
     
     dates_data = [
-        ['Date de validation:', contrat.date_validation.strftime('%d/%m/%Y')],
-        ['Date de début prévue:', contrat.date_debut_prevue.strftime('%d/%m/%Y') if contrat.date_debut_prevue else 'Non définie'],
-        ['Date de fin prévue:', contrat.date_fin_prevue.strftime('%d/%m/%Y') if contrat.date_fin_prevue else 'Non définie'],
+        ['Date de validation:', donnees['date_validation']],
+        ['Date de début prévue:', donnees['date_debut_prevue']],
+        ['Date de fin prévue:', donnees['date_fin_prevue']],
     ]
     
     dates_table = Table(dates_data, colWidths=[4*cm, 12*cm])
@@ -223,7 +271,7 @@ def generate_fiche_contrat_pdf(contrat):
     
     # Pied de page
     elements.append(Spacer(1, 1*cm))
-    footer_text = f"<i>Document généré le {timezone.now().strftime('%d/%m/%Y à %H:%M')}</i>"
+    footer_text = f"<i>Document généré le {donnees['genere_le']}</i>"
     elements.append(Paragraph(footer_text, styles['Normal']))
     
     # Construire le PDF
@@ -235,6 +283,129 @@ def generate_fiche_contrat_pdf(contrat):
     return pdf
 
 
+# ==========================================
+# GÉNÉRATION EN MASSE - FICHES DE CONTRAT (ZIP)
+# ==========================================
+
+FICHES_PROCESSUS = getattr(settings, 'FICHES_PROCESSUS', None)  # None : nombre de cœurs
+# En dessous, démarrer les processus coûte plus que le rendu lui-même
+FICHES_SEUIL_PARALLELE = 8
+
+
+def ordonner_contrats_fiches(contrats):
+    """Contrats d'un lot de fiches, relations chargées, dans un ordre stable"""
+    return contrats.select_related(
+        'professeur__user', 'classe', 'maquette'
+    ).prefetch_related('classes_tronc_commun').order_by(
+        'classe__nom', 'professeur__user__last_name', 'professeur__user__first_name', 'id'
+    )
+
+
+def nombre_processus_fiches(nombre, processus=None):
+    """Taille du pool pour `nombre` fiches (1 : rendu dans le processus courant)"""
+    if nombre < FICHES_SEUIL_PARALLELE:
+        return 1
+    return max(1, min(processus or FICHES_PROCESSUS or os.cpu_count() or 1, nombre))
+
+
+def _nom_fiche(donnees):
+    reference = (donnees['reference'] or str(donnees['numero'])).replace('/', '-')
+    return f"{slugify(donnees['classe']) or 'classe'}/{reference}_{slugify(donnees['professeur']['nom'])}.pdf"
+
+
+def rendre_fiches(contrats, processus=None):
+    """
+    Fiches PDF d'un lot de contrats, rendues en parallèle
+    
+    Les données sont lues dans le processus courant, puis le rendu
+    ReportLab (CPU) est réparti sur un pool de processus `spawn` (aucune
+    connexion ni état Django partagés). Les fiches sortent dans l'ordre des
+    contrats, chacune dès qu'elle et ses précédentes sont prêtes.
+    
+    Yields:
+        tuple: (nom du fichier dans l'archive, contenu PDF)
+    """
+    donnees = [donnees_fiche_contrat(contrat) for contrat in ordonner_contrats_fiches(contrats)]
+    processus = nombre_processus_fiches(len(donnees), processus)
+    
+    if processus == 1:
+        for fiche in donnees:
+            yield _nom_fiche(fiche), rendre_fiche_contrat_pdf(fiche)
+        return
+    
+    # Les processus `spawn` importent ce module (et donc les modèles) :
+    # Django y est initialisé avant la première fiche
+    with ProcessPoolExecutor(
+        max_workers=processus,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=django.setup
+    ) as pool:
+        chunksize = max(1, min(16, len(donnees) // (processus * 4)))
+        pdfs = pool.map(rendre_fiche_contrat_pdf, donnees, chunksize=chunksize)
+        for fiche, pdf in zip(donnees, pdfs):
+            yield _nom_fiche(fiche), pdf
+
+
+class _SortieZip:
+    """Sortie non positionnable de zipfile : les octets écrits sont repris au fil de l'eau"""
+    
+    def __init__(self):
+        self.morceaux = []
+    
+    def write(self, donnees):
+        self.morceaux.append(bytes(donnees))
+        return len(donnees)
+    
+    def flush(self):
+        pass
+    
+    def vider(self):
+        donnees = b''.join(self.morceaux)
+        self.morceaux = []
+        return donnees
+
+
+def flux_fiches_zip(contrats, processus=None, bilan=None):
+    """
+    Archive ZIP des fiches d'un lot de contrats, produite par morceaux
+    (une entrée par fiche, envoyée dès qu'elle est rendue)
+    
+    Args:
+        bilan: dict complété avec nombre, processus, duree et pdf_par_seconde
+    """
+    start = time.perf_counter()
+    sortie = _SortieZip()
+    nombre = 0
+    with zipfile.ZipFile(sortie, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for nom, pdf in rendre_fiches(contrats, processus):
+            archive.writestr(nom, pdf)
+            nombre += 1
+            yield sortie.vider()
+    yield sortie.vider()
+    
+    if bilan is not None:
+        duree = time.perf_counter() - start
+        bilan.update({
+            'nombre': nombre,
+            'processus': nombre_processus_fiches(nombre, processus),
+            'duree': duree,
+            'pdf_par_seconde': nombre / duree if duree else 0,
+        })
+
+
+def ecrire_fiches_zip(contrats, fichier, processus=None):
+    """
+    Écrit l'archive des fiches dans un fichier
+    
+    Returns:
+        dict: bilan (nombre, processus, duree, pdf_par_seconde)
+    """
+    bilan = {}
+    for morceau in flux_fiches_zip(contrats, processus, bilan):
+        fichier.write(morceau)
+    return bilan
+
+
 # ==========================================
 # GÉNÉRATION DE PDF - REÇU DE PAIEMENT
 # ==========================================
@@ -243,11 +414,37 @@ def generate_recu_paiement_pdf(paiement):
     """
     Génère un reçu de paiement en PDF
     """
+    return generate_recus_paiement_pdf([paiement])
+
+
+def generate_recus_paiement_pdf(paiements):
+    """
+    Génère les reçus de plusieurs paiements dans un seul PDF (une page par
+    reçu, un seul passage de rendu). Prévoir un select_related sur
+    professeur__user, contrat__maquette et contrat__classe.
+    """
     buffer = BytesIO()
     
     doc = SimpleDocTemplate(buffer, pagesize=A4)
-    elements = []
     styles = getSampleStyleSheet()
+    elements = []
+    
+    for index, paiement in enumerate(paiements):
+        if index:
+            elements.append(PageBreak())
+        elements.extend(_elements_recu_paiement(paiement, styles))
+    
+    doc.build(elements)
+    
+    pdf = buffer.getvalue()
+    buffer.close()
+    
+    return pdf
+
+
+def _elements_recu_paiement(paiement, styles):
+    """Éléments ReportLab d'un reçu de paiement"""
+    elements = []
     
     # Titre
     title_style = ParagraphStyle(
@@ -333,131 +530,164 @@ def generate_recu_paiement_pdf(paiement):
     signature_text = "Signature du comptable: _______________________"
     elements.append(Paragraph(signature_text, styles['Normal']))
     
-    doc.build(elements)
-    
-    pdf = buffer.getvalue()
-    buffer.close()
-    
-    return pdf
+    return elements
 
 
 # ==========================================
 # EXPORTS EXCEL
 # ==========================================
 
+# Colonnes d'un export : titre, largeur fixe (le mode écriture seule
+# d'openpyxl impose les largeurs avant la première ligne) et valeur d'une ligne
+ColonneExcel = namedtuple('ColonneExcel', ['titre', 'largeur', 'valeur'])
+
+EXCEL_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+EXCEL_CHUNK_SIZE = 500
+
+
+def _date_fr(valeur):
+    return valeur.strftime('%d/%m/%Y') if valeur else ''
+
+
+def _nom_complet(user):
+    return user.get_full_name() if user else ''
+
+
+def ecrire_excel(fichier, feuille, colonnes, lignes):
+    """
+    Écrit un classeur en mode écriture seule (openpyxl write_only)
+
+    Les lignes sont consommées une à une (itérateur de queryset) et
+    écrites sur disque au fil de l'eau : la mémoire ne dépend pas du
+    nombre de lignes.
+
+    Returns:
+        int: nombre de lignes écrites (hors en-tête)
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(feuille)
+    for index, colonne in enumerate(colonnes, start=1):
+        worksheet.column_dimensions[get_column_letter(index)].width = colonne.largeur
+    worksheet.freeze_panes = 'A2'
+
+    entete = []
+    for colonne in colonnes:
+        cellule = WriteOnlyCell(worksheet, value=colonne.titre)
+        cellule.font = Font(bold=True)
+        entete.append(cellule)
+    worksheet.append(entete)
+
+    nombre = 0
+    for ligne in lignes:
+        worksheet.append([colonne.valeur(ligne) for colonne in colonnes])
+        nombre += 1
+
+    workbook.save(fichier)
+    return nombre
+
+
+def reponse_excel(ecrire, queryset, filename):
+    """
+    Réponse HTTP d'un export Excel : le classeur est écrit dans un fichier
+    temporaire puis envoyé par blocs (FileResponse), supprimé à la fermeture
+    """
+    fichier = tempfile.TemporaryFile(suffix='.xlsx')
+    ecrire(queryset, fichier)
+    fichier.seek(0)
+    return FileResponse(
+        fichier,
+        as_attachment=True,
+        filename=filename,
+        content_type=EXCEL_CONTENT_TYPE,
+    )
+
+
+COLONNES_CONTRATS = [
+    ColonneExcel('ID', 8, lambda c: c.id),
+    ColonneExcel('Référence', 24, lambda c: c.reference),
+    ColonneExcel('Année académique', 12, lambda c: c.annee_academique),
+    ColonneExcel('Professeur', 30, lambda c: _nom_complet(c.professeur.user)),
+    ColonneExcel('Classe', 40, lambda c: c.classe.nom),
+    ColonneExcel('Module', 30, lambda c: f"{c.maquette.filiere_sigle} - {c.maquette.niveau_libelle}"),
+    ColonneExcel('Statut', 22, lambda c: c.get_status_display()),
+    ColonneExcel('Type', 16, lambda c: c.get_type_enseignement_display()),
+    ColonneExcel('Volume Cours (h)', 12, lambda c: float(c.volume_heure_cours)),
+    ColonneExcel('Volume TD (h)', 12, lambda c: float(c.volume_heure_td)),
+    ColonneExcel('Volume Total (h)', 12, lambda c: float(c.volume_contractuel)),
+    ColonneExcel('Heures Cours Effectuées', 12, lambda c: float(c.heures_cours_effectuees)),
+    ColonneExcel('Heures TD Effectuées', 12, lambda c: float(c.heures_td_effectuees)),
+    ColonneExcel('Heures Total Effectuées', 12, lambda c: float(c.volume_effectue)),
+    ColonneExcel(
+        'Taux Réalisation (%)', 12,
+        lambda c: round(float(c.volume_effectue / c.volume_contractuel * 100), 2) if c.volume_contractuel else 0
+    ),
+    ColonneExcel('Montant Contractuel (FCFA)', 18, lambda c: float(c.montant_contractuel)),
+    ColonneExcel('Montant À Payer (FCFA)', 18, lambda c: float(c.montant_a_payer)),
+    ColonneExcel('Date Validation', 12, lambda c: _date_fr(c.date_validation)),
+    ColonneExcel('Date Début', 12, lambda c: _date_fr(c.date_debut_reelle)),
+    ColonneExcel('Date Fin', 12, lambda c: _date_fr(c.date_fin_reelle)),
+    ColonneExcel('Support Cours', 10, lambda c: 'Oui' if c.support_cours_uploaded else 'Non'),
+    ColonneExcel('Syllabus', 10, lambda c: 'Oui' if c.syllabus_uploaded else 'Non'),
+]
+
+
+def ecrire_contrats_excel(contrats, fichier):
+    """
+    Écrit les contrats d'un queryset dans un classeur Excel
+
+    Volumes et montants calculés en SQL (with_montants), relations jointes,
+    lecture par lots de EXCEL_CHUNK_SIZE (iterator).
+    """
+    contrats = contrats.select_related(
+        'professeur__user', 'classe', 'maquette'
+    ).with_montants().order_by('id')
+    return ecrire_excel(
+        fichier, 'Contrats', COLONNES_CONTRATS, contrats.iterator(chunk_size=EXCEL_CHUNK_SIZE)
+    )
+
+
 def export_contrats_to_excel(contrats, filename='contrats.xlsx'):
     """
-    Exporte une liste de contrats vers Excel
+    Exporte un queryset de contrats vers Excel
     """
-    # Préparer les données
-    data = []
-    for contrat in contrats:
-        heures_effectuees = contrat.get_heures_effectuees()
-        
-        data.append({
-            'ID': contrat.id,
-            'Professeur': contrat.professeur.user.get_full_name(),
-            'Classe': contrat.classe.nom,
-            'Module': f"{contrat.maquette.filiere_sigle} - {contrat.maquette.niveau_libelle}",
-            'Statut': contrat.get_status_display(),
-            'Type': contrat.get_type_enseignement_display(),
-            'Volume Cours (h)': float(contrat.volume_heure_cours),
-            'Volume TD (h)': float(contrat.volume_heure_td),
-            'Volume TP (h)': float(contrat.volume_heure_tp),
-            'Volume Total (h)': float(contrat.volume_total_contractuel),
-            'Heures Cours Effectuées': float(heures_effectuees['cours']),
-            'Heures TD Effectuées': float(heures_effectuees['td']),
-            'Heures TP Effectuées': float(heures_effectuees['tp']),
-            'Heures Total Effectuées': float(contrat.volume_total_effectue),
-            'Taux Réalisation (%)': round(contrat.taux_realisation, 2),
-            'Montant Contractuel (FCFA)': float(contrat.montant_total_contractuel),
-            'Montant À Payer (FCFA)': float(contrat.calculate_montant_a_payer()),
-            'Date Validation': contrat.date_validation.strftime('%d/%m/%Y'),
-            'Date Début': contrat.date_debut_reelle.strftime('%d/%m/%Y') if contrat.date_debut_reelle else '',
-            'Date Fin': contrat.date_fin_reelle.strftime('%d/%m/%Y') if contrat.date_fin_reelle else '',
-            'Support Cours': 'Oui' if contrat.support_cours_uploaded else 'Non',
-            'Syllabus': 'Oui' if contrat.syllabus_uploaded else 'Non',
-        })
-    
-    # Créer le DataFrame
-    df = pd.DataFrame(data)
-    
-    # Créer le fichier Excel
-    output = BytesIO()
-    
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='Contrats', index=False)
-        
-        # Formater les colonnes
-        worksheet = writer.sheets['Contrats']
-        
-        # Largeur des colonnes
-        for idx, col in enumerate(df.columns):
-            max_length = max(
-                df[col].astype(str).apply(len).max(),
-                len(col)
-            )
-            worksheet.column_dimensions[chr(65 + idx)].width = min(max_length + 2, 50)
-    
-    output.seek(0)
-    
-    # Créer la réponse HTTP
-    response = HttpResponse(
-        output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return reponse_excel(ecrire_contrats_excel, contrats, filename)
+
+
+COLONNES_PAIEMENTS = [
+    ColonneExcel('ID', 8, lambda p: p.id),
+    ColonneExcel('Professeur', 30, lambda p: _nom_complet(p.professeur.user)),
+    ColonneExcel('Contrat', 24, lambda p: p.contrat.reference or f"#{p.contrat_id}"),
+    ColonneExcel('Module', 14, lambda p: p.contrat.maquette.filiere_sigle),
+    ColonneExcel('Statut', 18, lambda p: p.get_status_display()),
+    ColonneExcel('Montant Brut (FCFA)', 18, lambda p: float(p.montant_brut)),
+    ColonneExcel('Déductions (FCFA)', 18, lambda p: float(p.montant_deductions)),
+    ColonneExcel('Montant Net (FCFA)', 18, lambda p: float(p.montant_net)),
+    ColonneExcel('Mode Paiement', 16, lambda p: p.get_mode_paiement_display() if p.mode_paiement else ''),
+    ColonneExcel('Référence', 20, lambda p: p.reference_paiement or ''),
+    ColonneExcel('Date Création', 12, lambda p: _date_fr(p.date_creation)),
+    ColonneExcel('Date Approbation', 12, lambda p: _date_fr(p.date_approbation)),
+    ColonneExcel('Date Paiement', 12, lambda p: _date_fr(p.date_paiement)),
+    ColonneExcel('Créé Par', 24, lambda p: _nom_complet(p.cree_par)),
+    ColonneExcel('Approuvé Par', 24, lambda p: _nom_complet(p.approuve_par)),
+    ColonneExcel('Payé Par', 24, lambda p: _nom_complet(p.paye_par)),
+]
+
+
+def ecrire_paiements_excel(paiements, fichier):
+    """Écrit les paiements d'un queryset dans un classeur Excel (lecture par lots)"""
+    paiements = paiements.select_related(
+        'professeur__user', 'contrat__maquette', 'cree_par', 'approuve_par', 'paye_par'
+    ).order_by('id')
+    return ecrire_excel(
+        fichier, 'Paiements', COLONNES_PAIEMENTS, paiements.iterator(chunk_size=EXCEL_CHUNK_SIZE)
     )
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    return response
 
 
 def export_paiements_to_excel(paiements, filename='paiements.xlsx'):
     """
-    Exporte une liste de paiements vers Excel
-    """
-    data = []
-    for paiement in paiements:
-        data.append({
-            'ID': paiement.id,
-            'Professeur': paiement.professeur.user.get_full_name(),
-            'Contrat': f"#{paiement.contrat.id}",
-            'Module': f"{paiement.contrat.maquette.filiere_sigle}",
-            'Statut': paiement.get_status_display(),
-            'Montant Brut (FCFA)': float(paiement.montant_brut),
-            'Déductions (FCFA)': float(paiement.montant_deductions),
-            'Montant Net (FCFA)': float(paiement.montant_net),
-            'Mode Paiement': paiement.get_mode_paiement_display() if paiement.mode_paiement else '',
-            'Référence': paiement.reference_paiement or '',
-            'Date Création': paiement.date_creation.strftime('%d/%m/%Y'),
-            'Date Approbation': paiement.date_approbation.strftime('%d/%m/%Y') if paiement.date_approbation else '',
-            'Date Paiement': paiement.date_paiement.strftime('%d/%m/%Y') if paiement.date_paiement else '',
-            'Créé Par': paiement.cree_par.get_full_name() if paiement.cree_par else '',
-            'Approuvé Par': paiement.approuve_par.get_full_name() if paiement.approuve_par else '',
-            'Payé Par': paiement.paye_par.get_full_name() if paiement.paye_par else '',
-        })
-    
-    df = pd.DataFrame(data)
-    
-    output = BytesIO()
-    
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='Paiements', index=False)
-        
-        worksheet = writer.sheets['Paiements']
-        
-        for idx, col in enumerate(df.columns):
-            max_length = max(df[col].astype(str).apply(len).max(), len(col))
-            worksheet.column_dimensions[chr(65 + idx)].width = min(max_length + 2, 50)
-    
-    output.seek(0)
-    
-    response = HttpResponse(
-        output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    return response
+    Exporte un queryset de paiements vers Excel
+    """
+    return reponse_excel(ecrire_paiements_excel, paiements, filename)
 
 
 # ==========================================
@@ -467,13 +697,28 @@ def export_paiements_to_excel(paiements, filename='paiements.xlsx'):
 def generate_statistiques_contrats(date_debut, date_fin):
     """
     Génère des statistiques détaillées sur les contrats
+    
+    Trois requêtes quel que soit le nombre de contrats : un agrégat pour les
+    compteurs, volumes et montants (calculés en SQL), un GROUP BY par statut
+    et un par type d'enseignement.
     """
     from .models import Contrat
     from django.db.models import Sum, Avg, Count
+    from Utilisateur.aggregations import compter_par, compter_si
     
     contrats = Contrat.objects.filter(
         date_validation__range=[date_debut, date_fin]
     )
+    agregats = compter_si(
+        contrats.with_montants(),
+        total='nombre_contrats',
+        nombre_professeurs=Count('professeur', distinct=True),
+        nombre_classes=Count('classe', distinct=True),
+        total_heures=Sum('volume_contractuel'),
+        moyenne_heures=Avg('volume_contractuel'),
+        total_contractuel=Sum('montant_contractuel'),
+        total_a_payer=Sum('montant_a_payer'),
+    )
     
     stats = {
         'periode': {
@@ -481,37 +726,33 @@ def generate_statistiques_contrats(date_debut, date_fin):
             'fin': date_fin,
         },
         'general': {
-            'nombre_contrats': contrats.count(),
-            'nombre_professeurs': contrats.values('professeur').distinct().count(),
-            'nombre_classes': contrats.values('classe').distinct().count(),
+            'nombre_contrats': agregats['nombre_contrats'],
+            'nombre_professeurs': agregats['nombre_professeurs'],
+            'nombre_classes': agregats['nombre_classes'],
         },
         'volumes': {
-            'total_heures_contractuelles': contrats.aggregate(
-                total=Sum('volume_heure_cours') + Sum('volume_heure_td') + Sum('volume_heure_tp')
-            )['total'] or 0,
-            'moyenne_heures_par_contrat': contrats.aggregate(
-                moyenne=Avg('volume_heure_cours') + Avg('volume_heure_td') + Avg('volume_heure_tp')
-            )['moyenne'] or 0,
+            'total_heures_contractuelles': agregats['total_heures'] or 0,
+            'moyenne_heures_par_contrat': agregats['moyenne_heures'] or 0,
         },
         'financier': {
-            'montant_total_contractuel': sum([c.montant_total_contractuel for c in contrats]),
-            'montant_total_a_payer': sum([c.calculate_montant_a_payer() for c in contrats]),
+            'montant_total_contractuel': agregats['total_contractuel'] or Decimal('0.00'),
+            'montant_total_a_payer': agregats['total_a_payer'] or Decimal('0.00'),
         },
         'statuts': {},
         'par_type_enseignement': {},
     }
     
-    # Stats par statut
+    # Stats par statut (un seul GROUP BY)
+    par_statut = compter_par(contrats, 'status', total=None)
     for status_code, status_label in Contrat.STATUS_CHOICES:
-        count = contrats.filter(status=status_code).count()
-        if count > 0:
-            stats['statuts'][status_label] = count
+        if par_statut.get(status_code):
+            stats['statuts'][status_label] = par_statut[status_code]
     
     # Stats par type d'enseignement
+    par_type = compter_par(contrats, 'type_enseignement', total=None)
     for type_code, type_label in Contrat.TYPE_ENSEIGNEMENT_CHOICES:
-        count = contrats.filter(type_enseignement=type_code).count()
-        if count > 0:
-            stats['par_type_enseignement'][type_label] = count
+        if par_type.get(type_code):
+            stats['par_type_enseignement'][type_label] = par_type[type_code]
     
     return stats
 
@@ -519,12 +760,24 @@ def generate_statistiques_contrats(date_debut, date_fin):
 def generate_rapport_professeur(professeur, annee_academique):
     """
     Génère un rapport détaillé pour un professeur
+    
+    Deux requêtes : les lignes de contrats (volumes et montants calculés en
+    SQL) et l'agrégat des totaux.
     """
     from .models import Contrat
+    from django.db.models import Count, Sum
     
     contrats = Contrat.objects.filter(
         professeur=professeur,
-        maquette__annee_academique=annee_academique
+        annee_academique=Contrat.normaliser_annee(annee_academique)
+    ).with_montants()
+    
+    totaux = contrats.aggregate(
+        nombre=Count('pk'),
+        heures_contractuelles=Sum('volume_contractuel'),
+        heures_effectuees=Sum('volume_effectue'),
+        total_contractuel=Sum('montant_contractuel'),
+        montant_paye=Sum('montant_a_payer'),
     )
     
     rapport = {
@@ -534,39 +787,39 @@ def generate_rapport_professeur(professeur, annee_academique):
             'grade': professeur.grade if hasattr(professeur, 'grade') else '-',
         },
         'annee_academique': annee_academique,
-        'nombre_contrats': contrats.count(),
+        'nombre_contrats': totaux['nombre'],
         'contrats': [],
         'totaux': {
-            'heures_contractuelles': Decimal('0.00'),
-            'heures_effectuees': Decimal('0.00'),
-            'montant_contractuel': Decimal('0.00'),
-            'montant_paye': Decimal('0.00'),
+            'heures_contractuelles': totaux['heures_contractuelles'] or Decimal('0.00'),
+            'heures_effectuees': totaux['heures_effectuees'] or Decimal('0.00'),
+            'montant_contractuel': totaux['total_contractuel'] or Decimal('0.00'),
+            'montant_paye': totaux['montant_paye'] or Decimal('0.00'),
         }
     }
     
-    for contrat in contrats:
-        heures_effectuees = contrat.get_heures_effectuees()
-        total_effectue = heures_effectuees['cours'] + heures_effectuees['td'] + heures_effectuees['tp']
-        
-        contrat_info = {
-            'id': contrat.id,
-            'classe': contrat.classe.nom,
-            'module': f"{contrat.maquette.filiere_sigle} - {contrat.maquette.niveau_libelle}",
-            'statut': contrat.get_status_display(),
-            'heures_contractuelles': float(contrat.volume_total_contractuel),
-            'heures_effectuees': float(total_effectue),
-            'taux_realisation': float(contrat.taux_realisation),
-            'montant_contractuel': float(contrat.montant_total_contractuel),
-            'montant_a_payer': float(contrat.calculate_montant_a_payer()),
-        }
-        
-        rapport['contrats'].append(contrat_info)
+    statuts = dict(Contrat.STATUS_CHOICES)
+    lignes = contrats.order_by('classe__nom', 'id').values(
+        'id', 'status', 'classe__nom',
+        'maquette__filiere_sigle', 'maquette__niveau_libelle',
+        'volume_contractuel', 'volume_effectue',
+        'montant_contractuel', 'montant_a_payer',
+    )
+    
+    for ligne in lignes:
+        volume_contractuel = ligne['volume_contractuel'] or Decimal('0.00')
+        volume_effectue = ligne['volume_effectue'] or Decimal('0.00')
         
-        # Mise à jour des totaux
-        rapport['totaux']['heures_contractuelles'] += contrat.volume_total_contractuel
-        rapport['totaux']['heures_effectuees'] += total_effectue
-        rapport['totaux']['montant_contractuel'] += contrat.montant_total_contractuel
-        rapport['totaux']['montant_paye'] += contrat.calculate_montant_a_payer()
+        rapport['contrats'].append({
+            'id': ligne['id'],
+            'classe': ligne['classe__nom'],
+            'module': f"{ligne['maquette__filiere_sigle']} - {ligne['maquette__niveau_libelle']}",
+            'statut': statuts.get(ligne['status'], ligne['status']),
+            'heures_contractuelles': float(volume_contractuel),
+            'heures_effectuees': float(volume_effectue),
+            'taux_realisation': float(volume_effectue / volume_contractuel * 100) if volume_contractuel else 0,
+            'montant_contractuel': float(ligne['montant_contractuel'] or 0),
+            'montant_a_payer': float(ligne['montant_a_payer'] or 0),
+        })
     
     return rapport
 
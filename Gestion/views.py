@@ -1,27 +1,41 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponse, JsonResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.db.models import Sum, Q
+from django.urls import reverse
 from django.utils import timezone
 from django.core.exceptions import ValidationError, PermissionDenied
 from decimal import Decimal
+from Utilisateur import cache_tableaux, compteurs
+from Utilisateur.aggregations import compter_si
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage  # ⭐ AJOUTEZ CETTE LIGNE
 # Ajoutez cette ligne dans vos imports
-from .forms import PreContratCreateForm, ContratStartForm, PointageForm
+from .forms import (
+    PreContratCreateForm, ContratStartForm, PointageForm, PointageBatchFormSet,
+    CampagnePaieForm, PaiementExecuteForm
+)
 import json
 import logging
+import re
 
 from .models import (
     PreContrat, ModulePropose, Contrat, Pointage,
-    PaiementContrat, ActionLog, Classe, Maquette, Groupe  
+    PaiementContrat, ActionLog, Classe, Maquette, Groupe,
+    CampagnePaie, ExportJob
 )
 from .permissions import (
     role_required,
 )
-from .utils import generate_recu_paiement_pdf
+from .utils import flux_fiches_zip, generate_recu_paiement_pdf
+from . import exports
 from django.db import transaction
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_http_methods, condition
+from .services import (
+    CampagnePaieService, ContratGenerationService, MaquetteViewModelService,
+    ModuleCatalogueService, ModuleProposeService, PointageBatchService,
+    ProgressionService, SerieProgressionService
+)
 
 logger = logging.getLogger(__name__)                                                    
 
@@ -63,50 +77,7 @@ def find_module_in_maquettes(maquettes, module_id):
                 if matiere_id == module_id_str:
                     logger.info(f"✅ Module trouvé: {matiere.get('nom', 'Sans nom')}")
                     
-                    # ⭐ GESTION ROBUSTE DES VOLUMES HORAIRES
-                    def safe_float(value, default=0.0):
-                        """Convertit en float de manière sécurisée"""
-                        try:
-                            if value is None or value == '':
-                                return default
-                            return float(value)
-                        except (TypeError, ValueError):
-                            return default
-                    
-                    # Récupération des volumes avec valeurs par défaut intelligentes
-                    volume_cm = safe_float(matiere.get('volume_horaire_cm'), 20.0)
-                    volume_td = safe_float(matiere.get('volume_horaire_td'), 20.0)
-                    
-                    # ⭐ CORRECTION CRITIQUE : Si tous les volumes sont à 0, on met des valeurs par défaut
-                    if volume_cm <= 0 and volume_td <= 0:
-                        logger.warning(f"⚠️ Module {module_id} a tous les volumes à 0, utilisation de valeurs par défaut")
-                        volume_cm = 20.0
-                        volume_td = 20.0
-                    
-                    # ⭐ GESTION ROBUSTE DES TAUX HORAIRES
-                    taux_cm = safe_float(matiere.get('taux_horaire_cm'), 5000.0)
-                    taux_td = safe_float(matiere.get('taux_horaire_td'), 5000.0)
-                    
-                    # ⭐ VÉRIFICATION : Si volume > 0 mais taux = 0, on corrige
-                    if volume_cm > 0 and taux_cm <= 0:
-                        logger.warning(f"⚠️ Module {module_id}: Volume CM > 0 mais taux CM = 0, correction à 5000")
-                        taux_cm = 5000.0
-                    
-                    if volume_td > 0 and taux_td <= 0:
-                        logger.warning(f"⚠️ Module {module_id}: Volume TD > 0 mais taux TD = 0, correction à 5000")
-                        taux_td = 5000.0
-                    
-                    # Données du module trouvé
-                    module_data = {
-                        'id': matiere.get('id'),
-                        'code': matiere.get('code', f'MOD_{module_id}'),
-                        'nom': matiere.get('nom', 'Module sans nom'),
-                        'ue_nom': ue.get('libelle', 'UE non spécifiée'),
-                        'volume_horaire_cm': volume_cm,
-                        'volume_horaire_td': volume_td,
-                        'taux_horaire_cm': taux_cm,
-                        'taux_horaire_td': taux_td,
-                    }
+                    module_data = ModuleProposeService.build_module_data(matiere, ue, module_id)
                     
                     logger.debug(f"📊 Données module: {module_data}")
                     return module_data
@@ -118,8 +89,29 @@ def find_module_in_maquettes(maquettes, module_id):
 # NOUVEL ENDPOINT API - RÉCUPÉRATION DES MODULES
 # ==========================================
 
+def _catalogue_etag(request, classe_id):
+    """ETag du catalogue de modules d'une classe (version des maquettes)"""
+    return ModuleCatalogueService.get_version(request, classe_id)[0]
+
+
+def _catalogue_last_modified(request, classe_id):
+    """Last-Modified du catalogue de modules d'une classe"""
+    return ModuleCatalogueService.get_version(request, classe_id)[1]
+
+
+def _catalogue_response(payload):
+    """
+    Réponse JSON du catalogue : le navigateur la garde en cache mais
+    doit la revalider (If-None-Match / If-Modified-Since → 304)
+    """
+    response = JsonResponse(payload)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 @login_required
 @require_http_methods(["GET"])
+@condition(etag_func=_catalogue_etag, last_modified_func=_catalogue_last_modified)
 def api_get_classe_modules(request, classe_id):
     """
     ⭐ NOUVEAU ENDPOINT ⭐
@@ -134,48 +126,17 @@ def api_get_classe_modules(request, classe_id):
         # Récupérer la classe
         classe = get_object_or_404(Classe, pk=classe_id)
         
-        # Récupérer les maquettes actives de cette classe
-        maquettes = Maquette.objects.filter(
-            classe=classe,
-            is_active=True
-        )
+        # Catalogue servi depuis le cache versionné de la classe
+        payload = ModuleCatalogueService.get_payload(request, classe, 'api')
         
-        if not maquettes.exists():
+        if payload is None:
             return JsonResponse({
                 'success': False,
                 'error': 'Aucune maquette trouvée pour cette classe',
                 'modules': []
             })
         
-        # Extraire tous les modules de toutes les UEs
-        modules = []
-        
-        for maquette in maquettes:
-            # Les UE sont stockées dans le champ JSON unites_enseignement
-            ues = maquette.unites_enseignement or []
-            
-            for ue in ues:
-                # Parcourir les matières de chaque UE
-                matieres = ue.get('matieres', [])
-                
-                for matiere in matieres:
-                    module = {
-                        'id': matiere.get('id'),
-                        'code': matiere.get('code', ''),
-                        'nom': matiere.get('libelle', ''),
-                        'ue_nom': ue.get('nom', ''),
-                        'volume_cm': float(matiere.get('volume_horaire_cm', 5)),
-                        'volume_td': float(matiere.get('volume_horaire_td', 5)),
-                        'taux_cm': float(matiere.get('taux_horaire_cm', 5000)),
-                        'taux_td': float(matiere.get('taux_horaire_td', 5000)),
-                    }
-                    modules.append(module)
-        
-        return JsonResponse({
-            'success': True,
-            'modules': modules,
-            'count': len(modules)
-        })
+        return _catalogue_response(payload)
         
     except Classe.DoesNotExist:
         return JsonResponse({
@@ -259,81 +220,20 @@ def precontrat_create(request):
                     precontrat.save()
                     logger.info(f"✅ Précontrat créé: {precontrat.id}")
                     
-                    # Récupération des maquettes
-                    maquettes = Maquette.objects.filter(
+                    # Récupération des maquettes (un seul chargement)
+                    maquettes = list(Maquette.objects.filter(
                         classe=classe,
                         is_active=True
-                    )
-                    
-                    logger.info(f"🔍 Maquettes trouvées: {maquettes.count()}")
+                    ))
                     
-                    # Création des modules proposés
-                    modules_crees = 0
-                    modules_errors = []
+                    logger.info(f"🔍 Maquettes trouvées: {len(maquettes)}")
                     
-                    # Dans la boucle de création des modules
-                    # Dans la boucle de création des modules
-                    for module_id in selected_modules_ids:
-                        try:
-                            module_data = find_module_in_maquettes(maquettes, module_id)
-                            
-                            if module_data:
-                                # ⭐ LOGS DÉTAILLÉS POUR LES VOLUMES ET TAUX
-                                logger.info(f"📊 Module {module_id}:")
-                                logger.info(f"   Volumes: CM={module_data.get('volume_horaire_cm')}, TD={module_data.get('volume_horaire_td')}")
-                                logger.info(f"   Taux: CM={module_data.get('taux_horaire_cm')}, TD={module_data.get('taux_horaire_td')}")
-                                
-                                # Conversion sécurisée des Decimal
-                                def safe_decimal(value, default=0):
-                                    try:
-                                        return Decimal(str(value)) if value is not None else Decimal(default)
-                                    except (TypeError, ValueError):
-                                        return Decimal(default)
-                                
-                                # Récupérer les valeurs
-                                volume_cm = safe_decimal(module_data.get('volume_horaire_cm'))
-                                volume_td = safe_decimal(module_data.get('volume_horaire_td'))
-                                taux_cm = safe_decimal(module_data.get('taux_horaire_cm'))
-                                taux_td = safe_decimal(module_data.get('taux_horaire_td'))
-                                
-                                # ⭐ VÉRIFICATION FINALE DES TAUX
-                                if volume_td > 0 and taux_td <= 0:
-                                    logger.warning(f"⚠️ Module {module_id}: Volume TD > 0 mais taux TD = 0, correction automatique")
-                                    taux_td = Decimal('5000')
-                                
-                                if volume_cm > 0 and taux_cm <= 0:
-                                    logger.warning(f"⚠️ Module {module_id}: Volume CM > 0 mais taux CM = 0, correction automatique")
-                                    taux_cm = Decimal('5000')
-                                
-                                # Vérification finale des volumes
-                                if volume_cm <= 0 and volume_td <= 0:
-                                    logger.warning(f"⚠️ Module {module_id} a tous les volumes à 0, utilisation de valeurs par défaut")
-                                    volume_cm = Decimal('20')
-                                    volume_td = Decimal('20')
-                                
-                                # Création du module
-                                ModulePropose.objects.create(
-                                    pre_contrat=precontrat,
-                                    code_module=module_data.get('id', f'MOD_{module_id}'),
-                                    nom_module=module_data.get('nom', 'Module sans nom'),
-                                    ue_nom=module_data.get('ue_nom', 'UE non spécifiée'),
-                                    volume_heure_cours=volume_cm,
-                                    volume_heure_td=volume_td,
-                                    taux_horaire_cours=taux_cm,
-                                    taux_horaire_td=taux_td,
-                                    est_valide=False,
-                                )
-                                modules_crees += 1
-                                logger.info(f"✅ Module créé: {module_data.get('nom')}")
-                            else:
-                                error_msg = f"Module ID {module_id} non trouvé"
-                                modules_errors.append(error_msg)
-                                logger.warning(f"⚠️ {error_msg}")
-                                
-                        except Exception as e:
-                            error_msg = f"Erreur module {module_id}: {str(e)}"
-                            modules_errors.append(error_msg)
-                            logger.error(f"❌ {error_msg}")
+                    # Création des modules proposés : validation en mémoire
+                    # puis un seul INSERT
+                    modules, modules_errors = ModuleProposeService.bulk_create(
+                        precontrat, maquettes, selected_modules_ids
+                    )
+                    modules_crees = len(modules)
                     
                     # Vérification finale
                     if modules_crees == 0:
@@ -379,6 +279,7 @@ def precontrat_create(request):
 
 @login_required
 @require_http_methods(["GET"])
+@condition(etag_func=_catalogue_etag, last_modified_func=_catalogue_last_modified)
 def get_modules_par_classe(request, classe_id):
     """
     API pour récupérer les modules d'une classe (AJAX)
@@ -388,47 +289,17 @@ def get_modules_par_classe(request, classe_id):
         # Récupérer la classe
         classe = get_object_or_404(Classe, id=classe_id, is_active=True)
         
-        # Récupérer les maquettes (SANS select_related)
-        maquettes = Maquette.objects.filter(
-            classe=classe,
-            is_active=True
-        )
+        # Catalogue servi depuis le cache versionné de la classe
+        payload = ModuleCatalogueService.get_payload(request, classe, 'precontrat')
         
-        if not maquettes.exists():
+        if payload is None:
             return JsonResponse({
                 'success': False,
                 'error': 'Aucune maquette trouvée pour cette classe',
                 'modules': []
             })
         
-        # Extraire les modules du champ JSON
-        modules_data = []
-        
-        for maquette in maquettes:
-            # Accès au champ JSON unites_enseignement
-            ues = maquette.unites_enseignement or []
-            
-            for ue in ues:
-                matieres = ue.get('matieres', [])
-                
-                for matiere in matieres:
-                    modules_data.append({
-                        'id': matiere.get('id'),
-                        'code': matiere.get('code', ''),
-                        'nom': matiere.get('nom', ''),
-                        'ue_nom': ue.get('libelle', ''),
-                        'volume_cm': float(matiere.get('volume_horaire_cm', 5)),
-                        'volume_td': float(matiere.get('volume_horaire_td', 5)),
-                        'taux_cm': float(matiere.get('taux_horaire_cm', 5000)),
-                        'taux_td': float(matiere.get('taux_horaire_td', 5000)),
-                    })
-        
-        return JsonResponse({
-            'success': True,
-            'classe': classe.nom,
-            'modules': modules_data,
-            'count': len(modules_data)
-        })
+        return _catalogue_response(payload)
         
     except Classe.DoesNotExist:
         return JsonResponse({
@@ -558,27 +429,20 @@ def precontrat_recapitulatif(request, pk):
             # Valider tous les modules en une fois
             logger.info("🔄 Validation de tous les modules")
             try:
-                modules_valides = 0
-                for module in precontrat.modules_proposes.all():
-                    if not module.est_valide:
-                        module.est_valide = True
-                        module.valide_par = request.user
-                        module.date_validation = timezone.now()
-                        module.save()
-                        
-                        logger.info(f"🔄 Création contrat pour module: {module.nom_module}")
-                        
-                        # Créer le contrat
-                        from .utils import create_contrat_from_module
-                        create_contrat_from_module(module, request.user)
-                        
-                        modules_valides += 1
+                # Un UPDATE pour les modules, un INSERT pour les contrats
+                resultat = ContratGenerationService.generer_contrats(
+                    precontrat, request.user
+                )
                 
                 # Mettre à jour le statut du précontrat
                 precontrat.update_status()
                 
-                if modules_valides > 0:
-                    messages.success(request, f"✅ {modules_valides} module(s) validé(s) et contrat(s) créé(s) avec succès !")
+                if resultat['contrats']:
+                    messages.success(
+                        request,
+                        f"✅ {resultat['modules_valides']} module(s) validé(s) et "
+                        f"{len(resultat['contrats'])} contrat(s) créé(s) avec succès !"
+                    )
                 else:
                     messages.info(request, "ℹ️ Tous les modules étaient déjà validés.")
                     
@@ -828,6 +692,121 @@ def precontrat_rejeter(request, pk):
         }, status=400)
 
 
+# ==========================================
+# API - TRANSITIONS EN MASSE
+# ==========================================
+
+# modèle -> (classe, {transition: rôles autorisés})
+TRANSITIONS_EN_MASSE = {
+    'precontrats': (PreContrat, {
+        'soumettre': ['RESP_RH', 'ADMIN'],
+        'valider': ['RESP_RH', 'ADMIN'],
+    }),
+    'contrats': (Contrat, {
+        'terminer': ['RESP_PEDA', 'ADMIN'],
+    }),
+    'paiements': (PaiementContrat, {
+        'approuver': ['COMPTABLE', 'ADMIN'],
+    }),
+}
+
+
+def _cles_en_masse(model, ids):
+    """
+    Clés primaires d'une sélection : entiers, ou chaînes UUID pour les
+    précontrats. None si la liste est vide ou si une clé est invalide.
+    """
+    if not isinstance(ids, list) or not ids:
+        return None
+    champ = model._meta.pk
+    type_attendu = str if champ.get_internal_type() == 'UUIDField' else int
+    cles = []
+    for valeur in ids:
+        # bool est une sous-classe d'int : True ne doit pas valoir 1
+        if type(valeur) is not type_attendu:
+            return None
+        try:
+            cles.append(champ.to_python(valeur))
+        except ValidationError:
+            return None
+    return cles
+
+
+@login_required
+@require_http_methods(["POST"])
+def api_transition_en_masse(request, modele, transition):
+    """
+    Applique une transition de workflow à plusieurs objets en une passe
+    (UPDATE conditionnel + journalisation groupée)
+    
+    Corps JSON : {"ids": [...], "notes": "..."}
+    Réponse : bilan global et résultat par objet
+    """
+    model, transitions = TRANSITIONS_EN_MASSE.get(modele, (None, {}))
+    roles = transitions.get(transition)
+    if roles is None:
+        return JsonResponse({
+            'success': False,
+            'error': 'Transition inconnue'
+        }, status=404)
+    
+    if request.user.role not in roles:
+        return JsonResponse({
+            'success': False,
+            'error': 'Permission refusée'
+        }, status=403)
+    
+    try:
+        data = json.loads(request.body or '{}')
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Corps JSON invalide'
+        }, status=400)
+    
+    if not isinstance(data, dict) or not data.get('ids'):
+        return JsonResponse({
+            'success': False,
+            'error': 'Aucun objet sélectionné'
+        }, status=400)
+    
+    ids = _cles_en_masse(model, data['ids'])
+    if ids is None:
+        return JsonResponse({
+            'success': False,
+            'error': 'Identifiants invalides'
+        }, status=400)
+    
+    kwargs = {'user': request.user}
+    if transition == 'valider':
+        kwargs['notes'] = data.get('notes', '')
+    
+    try:
+        queryset = model.objects.filter(pk__in=ids)
+        resultats = getattr(queryset, transition)(**kwargs)
+    except ValidationError as e:
+        return JsonResponse({
+            'success': False,
+            'error': ' '.join(e.messages)
+        }, status=400)
+    
+    resultats = {str(pk): resultat for pk, resultat in resultats.items()}
+    for pk in map(str, ids):
+        resultats.setdefault(pk, {
+            'reference': None,
+            'succes': False,
+            'message': 'Objet introuvable',
+        })
+    
+    traites = sum(1 for resultat in resultats.values() if resultat['succes'])
+    return JsonResponse({
+        'success': True,
+        'traites': traites,
+        'refuses': len(resultats) - traites,
+        'resultats': resultats,
+    })
+
+
 # ==========================================
 # VUE POUR LA LISTE DES PRÉCONTRATS
 # ==========================================
@@ -841,11 +820,9 @@ def precontrat_list(request):
     status_filter = request.GET.get('status', '')
     annee_filter = request.GET.get('annee', '')
     
-    # Base queryset avec prefetch_related pour optimiser les requêtes
-    precontrats = PreContrat.objects.select_related(
+    # Base queryset : statistiques des modules annotées (une seule requête)
+    precontrats = PreContrat.objects.with_stats().select_related(
         'professeur', 'classe', 'cree_par'
-    ).prefetch_related(
-        'modules_proposes'
     ).order_by('-date_creation')
     
     # Appliquer les filtres
@@ -877,14 +854,7 @@ def precontrat_list(request):
         precontrats_page = paginator.page(paginator.num_pages)
     
     # Calculer les statistiques
-    stats = {
-        'total': PreContrat.objects.count(),
-        'draft': PreContrat.objects.filter(status='DRAFT').count(),
-        'submitted': PreContrat.objects.filter(status='SUBMITTED').count(),
-        'under_review': PreContrat.objects.filter(status='UNDER_REVIEW').count(),
-        'validated': PreContrat.objects.filter(status='VALIDATED').count(),
-        'rejected': PreContrat.objects.filter(status='REJECTED').count(),
-    }
+    stats = PreContrat.get_statistiques()
     
     # Récupérer les années académiques distinctes pour le filtre
     years = PreContrat.objects.values_list('annee_academique', flat=True).distinct().order_by('-annee_academique')
@@ -1287,6 +1257,18 @@ def contrat_imprimable(request, pk):
         'title': f'CONTRAT #{contrat.id} - {contrat.professeur.user.get_full_name().upper()}',  # ⭐ MAJUSCULES
     }
     
+    # Corps du contrat mis en cache ({% cache %}) : la clé change dès que le
+    # contrat, le professeur, la classe, la maquette ou les groupes changent
+    context.update(cache_tableaux.contexte_fragment(
+        contrat.updated_at,
+        contrat.professeur.updated_at,
+        contrat.professeur.user.updated_at,
+        contrat.classe.updated_at,
+        MaquetteViewModelService.get_version(contrat.maquette),
+        [(groupe.pk, groupe.nom) for groupe in groupes],
+        [(classe.pk, classe.nom) for classe in classes_tronc_commun],
+    ))
+    
     return render(request, 'contrats/contrat_imprimable.html', context)
 
 # ==========================================
@@ -1535,6 +1517,58 @@ def pointage_create(request, contrat_id):
     return render(request, 'contrats/pointage_form.html', context)
 
 
+@login_required
+@role_required(['RESP_PEDA', 'ADMIN'])
+def pointage_batch_create(request):
+    """
+    Saisie groupée des pointages : une grille contrat × date × heures × groupes
+    """
+    contrat_choices, groupe_choices = PointageBatchService.get_choices()
+    form_kwargs = {
+        'contrat_choices': contrat_choices,
+        'groupe_choices': groupe_choices,
+    }
+    
+    if request.method == 'POST':
+        formset = PointageBatchFormSet(request.POST, form_kwargs=form_kwargs)
+        
+        if formset.is_valid():
+            lignes = [
+                form.cleaned_data for form in formset
+                if form.cleaned_data and form.has_changed()
+            ]
+            try:
+                pointages = PointageBatchService.enregistrer(lignes, request.user)
+                messages.success(
+                    request,
+                    f"✅ {len(pointages)} pointage(s) enregistré(s) "
+                    f"sur {len({l['contrat'] for l in lignes})} contrat(s)"
+                )
+                return redirect('contrat_list')
+            
+            except ValidationError as e:
+                for error in e.messages:
+                    messages.error(request, f"❌ {error}")
+            except Exception as e:
+                logger.error(f"Erreur saisie groupée des pointages: {str(e)}", exc_info=True)
+                messages.error(request, f"❌ Erreur lors de l'enregistrement des pointages: {str(e)}")
+        else:
+            for error in formset.non_form_errors():
+                messages.error(request, f"❌ {error}")
+    else:
+        formset = PointageBatchFormSet(
+            form_kwargs=form_kwargs,
+            initial=[{'date_seance': timezone.now().date()}]
+        )
+    
+    context = {
+        'formset': formset,
+        'has_contrats': bool(contrat_choices),
+        'title': 'Saisie groupée des pointages'
+    }
+    return render(request, 'contrats/pointage_batch_form.html', context)
+
+
 # ==========================================
 # VUES POUR LES CONTRATS
 # ==========================================
@@ -1710,10 +1744,226 @@ def paiement_execute(request, pk):
     return render(request, 'paiements/paiement_execute.html', context)
 
 
+# ==========================================
+# CAMPAGNES DE PAIE
+# ==========================================
+
+@login_required
+@role_required(['COMPTABLE', 'ADMIN'])
+def campagne_paie_list(request):
+    """
+    Liste des campagnes de paie et lancement d'une nouvelle campagne
+    """
+    if request.method == 'POST':
+        form = CampagnePaieForm(request.POST)
+        if form.is_valid():
+            try:
+                campagne = CampagnePaieService.lancer(
+                    form.cleaned_data['periode_debut'],
+                    form.cleaned_data['periode_fin'],
+                    request.user,
+                    taux_deductions=form.cleaned_data['taux_deductions'],
+                )
+                messages.success(
+                    request,
+                    f"Campagne {campagne.reference} créée : {campagne.nombre_paiements} paiement(s), "
+                    f"{campagne.montant_net_total:,.0f} FCFA net"
+                )
+                return redirect(campagne)
+            except ValidationError as e:
+                messages.error(request, ' '.join(e.messages))
+    else:
+        form = CampagnePaieForm(initial={
+            'taux_deductions': CampagnePaieService.get_taux_deductions()
+        })
+    
+    context = {
+        'title': 'Campagnes de paie',
+        'form': form,
+        'campagnes': CampagnePaie.objects.select_related('cree_par'),
+        'contrats_prets': Contrat.objects.filter(status='READY_FOR_PAYMENT').exclude(
+            paiements__status__in=CampagnePaieService.STATUTS_PAIEMENT_ACTIFS
+        ).count(),
+    }
+    return render(request, 'contrats/campagne_paie_list.html', context)
+
+
+@login_required
+@role_required(['COMPTABLE', 'ADMIN'])
+def campagne_paie_detail(request, pk):
+    """
+    Synthèse d'une campagne de paie, approbation et paiement en lot
+    """
+    campagne = get_object_or_404(CampagnePaie, pk=pk)
+    
+    if request.method == 'POST':
+        action = request.POST.get('action')
+        try:
+            if action == 'approuver':
+                resultats = CampagnePaieService.approuver(campagne, request.user)
+                messages.success(
+                    request,
+                    f"{sum(1 for r in resultats.values() if r['succes'])} paiement(s) approuvé(s)"
+                )
+            elif action == 'payer':
+                form = PaiementExecuteForm(request.POST)
+                if not form.is_valid():
+                    messages.error(request, "Veuillez sélectionner un mode de paiement")
+                    return redirect(campagne)
+                resultats = CampagnePaieService.payer(
+                    campagne,
+                    request.user,
+                    form.cleaned_data['methode_paiement'],
+                    form.cleaned_data['reference_paiement'],
+                )
+                messages.success(
+                    request,
+                    f"{sum(1 for r in resultats.values() if r['succes'])} paiement(s) effectué(s) - "
+                    f"{campagne.montant_net_total:,.0f} FCFA"
+                )
+            else:
+                messages.error(request, "Action inconnue")
+        except ValidationError as e:
+            messages.error(request, ' '.join(e.messages))
+        return redirect(campagne)
+    
+    context = {
+        'title': f'Campagne {campagne.reference}',
+        'campagne': campagne,
+        'resume': CampagnePaieService.resume(campagne),
+        'paiements': campagne.paiements.select_related(
+            'contrat', 'professeur__user'
+        ).order_by('professeur__user__last_name', 'contrat__reference'),
+        'form_paiement': PaiementExecuteForm(),
+    }
+    return render(request, 'contrats/campagne_paie_detail.html', context)
+
+
+@login_required
+@role_required(['COMPTABLE', 'ADMIN'])
+def campagne_paie_recus(request, pk):
+    """
+    Reçus de la campagne (tous les paiements payés) en un seul PDF
+    """
+    campagne = get_object_or_404(CampagnePaie, pk=pk)
+    
+    if campagne.status != 'PAID':
+        messages.error(request, "Les reçus sont disponibles une fois la campagne payée")
+        return redirect(campagne)
+    
+    response = HttpResponse(CampagnePaieService.recus_pdf(campagne), content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="recus_{campagne.reference}.pdf"'
+    return response
+
+
+@login_required
+@role_required(['RESP_RH', 'RESP_PEDA', 'ADMIN'])
+@require_http_methods(["GET"])
+def contrat_fiches_zip(request):
+    """
+    Fiches PDF des contrats d'une classe et / ou d'une année académique,
+    rendues en parallèle et envoyées dans une archive ZIP au fil du rendu
+
+    Paramètres GET : classe (id), annee (2025 ou 2025-2026), status
+    """
+    classe_id = request.GET.get('classe', '')
+    annee = request.GET.get('annee', '')
+    status = request.GET.get('status', '')
+    
+    if not classe_id and not annee:
+        return JsonResponse({
+            'success': False,
+            'error': 'Précisez une classe ou une année académique'
+        }, status=400)
+    if classe_id and not classe_id.isdigit():
+        return JsonResponse({
+            'success': False,
+            'error': 'Classe invalide'
+        }, status=400)
+    
+    contrats = Contrat.objects.all()
+    if classe_id:
+        contrats = contrats.filter(classe_id=classe_id)
+    if annee:
+        annee = Contrat.normaliser_annee(annee)
+        contrats = contrats.filter(annee_academique=annee)
+    if status:
+        contrats = contrats.filter(status=status)
+    
+    if not contrats.exists():
+        return JsonResponse({
+            'success': False,
+            'error': 'Aucun contrat pour ces critères'
+        }, status=404)
+    
+    suffixe = '_'.join(part for part in (f'classe{classe_id}' if classe_id else '', annee) if part)
+    response = StreamingHttpResponse(flux_fiches_zip(contrats), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="fiches_contrats_{suffixe}.zip"'
+    return response
+
+
 # ==========================================
 # VUES POUR LE DASHBOARD
 # ==========================================
 
+def _dashboard_rh():
+    """Stats pour RH"""
+    return {
+        'precontrats_pending': PreContrat.objects.filter(
+            status__in=['SUBMITTED', 'UNDER_REVIEW']
+        ).count(),
+        'contrats_actifs': Contrat.objects.filter(
+            status__in=['VALIDATED', 'IN_PROGRESS']
+        ).count(),
+        'modules_a_valider': ModulePropose.objects.filter(
+            est_valide=False,
+            pre_contrat__status__in=['SUBMITTED', 'UNDER_REVIEW']
+        ).count(),
+    }
+
+
+def _dashboard_pedagogique():
+    """Stats pour responsable pédagogique"""
+    contrats = compteurs.lire('contrats')['contrats']
+    return {
+        'contrats_a_demarrer': contrats['status:VALIDATED'] + contrats['status:READY_TO_START'],
+        'contrats_en_cours': contrats['status:IN_PROGRESS'],
+        'contrats_sans_documents': contrats['status:PENDING_DOCUMENTS'],
+        'pointages_today': Pointage.objects.filter(
+            date_seance=timezone.now().date()
+        ).count(),
+    }
+
+
+def _dashboard_financier():
+    """Stats financières"""
+    stats = compter_si(
+        PaiementContrat.objects.all(),
+        total=None,
+        paiements_pending=Q(status='PENDING'),
+        paiements_approved=Q(status='APPROVED'),
+        montant_a_payer=Sum('montant_net', filter=Q(status__in=['PENDING', 'APPROVED'])),
+    )
+    stats['montant_a_payer'] = stats['montant_a_payer'] or 0
+    return stats
+
+
+def _dashboard_professeur(professeur):
+    """Contrats et paiements récents du professeur"""
+    return {
+        'mes_contrats': list(Contrat.objects.filter(
+            professeur=professeur
+        ).order_by('-date_validation')[:10]),
+        'contrats_en_cours': Contrat.objects.filter(
+            professeur=professeur,
+            status='IN_PROGRESS'
+        ).count(),
+        'paiements_recents': list(PaiementContrat.objects.filter(
+            professeur=professeur
+        ).order_by('-date_creation')[:5]),
+    }
+
+
 @login_required
 def dashboard(request):
     """
@@ -1723,69 +1973,29 @@ def dashboard(request):
     context = {'user': user}
     
     if user.role == 'RESP_RH':
-        # Stats pour RH
-        context.update({
-            'precontrats_pending': PreContrat.objects.filter(
-                status__in=['SUBMITTED', 'UNDER_REVIEW']
-            ).count(),
-            'contrats_actifs': Contrat.objects.filter(
-                status__in=['VALIDATED', 'IN_PROGRESS']
-            ).count(),
-            'modules_a_valider': ModulePropose.objects.filter(
-                est_valide=False,
-                pre_contrat__status__in=['SUBMITTED', 'UNDER_REVIEW']
-            ).count(),
-        })
+        context.update(cache_tableaux.fragment('gestion_rh', _dashboard_rh))
         template = 'dashboard/rh_dashboard.html'
     
     elif user.role == 'RESP_PEDA':
-        # Stats pour responsable pédagogique
-        context.update({
-            'contrats_a_demarrer': Contrat.objects.filter(
-                status__in=['VALIDATED', 'READY_TO_START']
-            ).count(),
-            'contrats_en_cours': Contrat.objects.filter(
-                status='IN_PROGRESS'
-            ).count(),
-            'contrats_sans_documents': Contrat.objects.filter(
-                status='PENDING_DOCUMENTS'
-            ).count(),
-            'pointages_today': Pointage.objects.filter(
-                date_seance=timezone.now().date()
-            ).count(),
-        })
+        # Les pointages du jour changent de clé chaque jour
+        context.update(cache_tableaux.fragment(
+            'gestion_pedagogique', _dashboard_pedagogique, portee=timezone.now().date().isoformat()
+        ))
         template = 'dashboard/pedagogique_dashboard.html'
     
     elif user.role in ['COMPTABLE', 'COMPTABLE']:
-        # Stats financières
-        context.update({
-            'paiements_pending': PaiementContrat.objects.filter(
-                status='PENDING'
-            ).count(),
-            'paiements_approved': PaiementContrat.objects.filter(
-                status='APPROVED'
-            ).count(),
-            'montant_a_payer': PaiementContrat.objects.filter(
-                status__in=['PENDING', 'APPROVED']
-            ).aggregate(total=Sum('montant_net'))['total'] or 0,
-        })
+        context.update(cache_tableaux.fragment('gestion_financier', _dashboard_financier))
         template = 'dashboard/financier_dashboard.html'
     
     elif user.role == 'PROFESSEUR':
-        # Dashboard professeur
+        # Dashboard professeur : uniquement ses propres données
         professeur = user.professeur  # Supposant une relation OneToOne
-        context.update({
-            'mes_contrats': Contrat.objects.filter(
-                professeur=professeur
-            ).order_by('-date_validation')[:10],
-            'contrats_en_cours': Contrat.objects.filter(
-                professeur=professeur,
-                status='IN_PROGRESS'
-            ).count(),
-            'paiements_recents': PaiementContrat.objects.filter(
-                professeur=professeur
-            ).order_by('-date_creation')[:5],
-        })
+        context.update(cache_tableaux.fragment(
+            'gestion_professeur',
+            lambda: _dashboard_professeur(professeur),
+            portee=professeur.pk,
+            tags=[cache_tableaux.tag_professeur(professeur.pk)]
+        ))
         template = 'dashboard/professeur_dashboard.html'
     
     else:
@@ -1925,101 +2135,82 @@ def api_groupes_by_classes(request):
 # VUE POUR LE SUIVI DES CLASSES ET MODULES
 # ==========================================
 
-from django.db.models import Count, Q, F, ExpressionWrapper, DecimalField
+from django.db.models import Count, Max, Q, F, ExpressionWrapper, DecimalField
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template.loader import render_to_string
 from django.utils import timezone
 from datetime import datetime
 # ==========================================
 # VUES CORRIGÉES POUR LE SUIVI DES CLASSES
 # ==========================================
 
+def _annee_suivi(request):
+    """
+    Année académique du paramètre `annee` des vues de suivi ('2025' ou
+    '2025-2026'), celle en cours à défaut (de janvier à août, l'année
+    commencée en septembre précédent)
+
+    Returns:
+        tuple: (année académique '2025-2026', année de début 2025)
+    """
+    annee = Contrat.normaliser_annee(request.GET.get('annee') or Contrat.annee_academique_de())
+    if not re.fullmatch(r'\d{4}-\d{4}', annee):
+        annee = Contrat.annee_academique_de()
+    return annee, int(annee[:4])
+
+
 @login_required
 def classe_suivi_annuel(request):
     """
-    Vue principale pour le suivi annuel des classes et modules - CORRIGÉE
+    Vue principale pour le suivi annuel des classes et modules
+
+    Les chiffres par classe et les totaux proviennent de ProgressionService
+    (cache par année), comme pour la progression annuelle ; seules les
+    classes actives sont relues pour le gabarit.
     """
-    # Récupérer l'année académique (paramètre ou année courante)
-    annee_academique = request.GET.get('annee', timezone.now().year)
+    # Récupérer l'année académique (paramètre ou année en cours)
+    annee_academique, annee_debut = _annee_suivi(request)
     
-    # Récupérer toutes les classes actives avec statistiques
-    classes = Classe.objects.filter(
-        is_active=True
-    ).prefetch_related(
-        'maquettes',
-        'contrats'
-    ).annotate(
-        # Nombre total de modules dans les maquettes actives
-        total_modules=Count(
-            'maquettes__unites_enseignement',
-            filter=Q(maquettes__is_active=True)
-        ),
-        # Modules avec contrats démarrés
-        modules_demarres=Count(
-            'contrats',
-            filter=Q(
-                contrats__status__in=['IN_PROGRESS', 'COMPLETED', 'READY_FOR_PAYMENT'],
-                contrats__date_validation__year=annee_academique
-            ),
-            distinct=True
-        ),
-        # Contrats en cours
-        contrats_en_cours=Count(
-            'contrats',
-            filter=Q(
-                contrats__status='IN_PROGRESS',
-                contrats__date_validation__year=annee_academique
-            )
-        ),
-        # Contrats terminés
-        contrats_termines=Count(
-            'contrats',
-            filter=Q(
-                contrats__status__in=['COMPLETED', 'READY_FOR_PAYMENT'],
-                contrats__date_validation__year=annee_academique
-            )
-        )
-    ).order_by('niveau', 'nom')
+    progression = ProgressionService.get(annee_academique)
+    lignes = {ligne['classe']['id']: ligne for ligne in progression['classes']}
+    totaux = progression['totaux']
 
-    # Calculer le pourcentage de progression et modules restants pour chaque classe
+    classes = list(Classe.objects.filter(is_active=True).order_by('niveau', 'nom'))
     for classe in classes:
-        total_mods = classe.total_modules or 0
-        modules_dems = classe.modules_demarres or 0
-        
-        # Calculer les modules restants
-        classe.modules_restants = max(total_mods - modules_dems, 0)
-        
-        if total_mods > 0:
-            classe.progression_pourcentage = round((modules_dems / total_mods) * 100, 1)
-        else:
-            classe.progression_pourcentage = 0
+        ligne = lignes.get(classe.pk, {})
+        classe.total_modules = ligne.get('total_modules', 0)
+        classe.modules_demarres = ligne.get('modules_demarres', 0)
+        classe.modules_restants = ligne.get('modules_restants', 0)
+        classe.progression_pourcentage = ligne.get('progression_pourcent', 0)
+        classe.contrats_en_cours = ligne.get('contrats_en_cours', 0)
+        classe.contrats_termines = ligne.get('contrats_termines', 0)
 
     # Statistiques globales
     stats_globales = {
-        'total_classes': classes.count(),
-        'total_modules_demarres': sum((c.modules_demarres or 0) for c in classes),
-        'total_modules_planifies': sum((c.total_modules or 0) for c in classes),
-        'contrats_en_cours': sum((c.contrats_en_cours or 0) for c in classes),
-        'contrats_termines': sum((c.contrats_termines or 0) for c in classes),
+        'total_classes': len(classes),
+        'total_modules_demarres': totaux['modules_demarres'],
+        'total_modules_planifies': totaux['total_modules'],
+        'progression_globale': totaux['progression_pourcent'],
+        'contrats_en_cours': totaux['contrats_en_cours'],
+        'contrats_termines': totaux['contrats_termines'],
     }
 
-    if stats_globales['total_modules_planifies'] > 0:
-        stats_globales['progression_globale'] = round(
-            (stats_globales['total_modules_demarres'] / stats_globales['total_modules_planifies']) * 100, 1
-        )
-    else:
-        stats_globales['progression_globale'] = 0
-
-    # Récupérer les années académiques disponibles pour le filtre
-    annees_disponibles = Contrat.objects.exclude(
-        date_validation__isnull=True
-    ).dates('date_validation', 'year').order_by('-date_validation')
+    # Années académiques disponibles pour le filtre (année de début)
+    annees_disponibles = sorted({
+        int(annee[:4])
+        for annee in Contrat.objects.exclude(
+            annee_academique=''
+        ).values_list('annee_academique', flat=True).distinct()
+    }, reverse=True)
 
     context = {
         'title': 'Suivi Annuel des Classes et Modules',
         'active_page': 'suivi_classes',
         'classes': classes,
         'stats_globales': stats_globales,
-        'annee_academique': annee_academique,
-        'annees_disponibles': [date.year for date in annees_disponibles],
+        'annee_academique': annee_debut,
+        'annees_disponibles': annees_disponibles,
     }
 
     return render(request, 'contrats/suivi/classe_suivi_annuel.html', context)
@@ -2031,7 +2222,7 @@ def classe_detail_suivi(request, classe_id):
     Vue détaillée du suivi pour une classe spécifique - CORRIGÉE
     """
     classe = get_object_or_404(Classe, pk=classe_id, is_active=True)
-    annee_academique = request.GET.get('annee', timezone.now().year)
+    annee_academique, annee_debut = _annee_suivi(request)
 
     # Récupérer la maquette active de la classe
     maquette = Maquette.objects.filter(
@@ -2043,17 +2234,83 @@ def classe_detail_suivi(request, classe_id):
         messages.error(request, f"Aucune maquette active trouvée pour la classe {classe.nom}")
         return redirect('classe_suivi_annuel')
 
-    # Extraire tous les modules de la maquette
+    # Récupérer les contrats existants pour cette classe - CORRECTION: utilisation de date_validation
+    # Une seule requête : heures réalisées et volume contractuel annotés
+    contrats = Contrat.objects.filter(
+        classe=classe,
+        annee_academique=annee_academique
+    ).select_related(
+        'professeur__user', 'module_propose'
+    ).annotate(
+        volume_effectue=F('heures_cours_effectuees') + F('heures_td_effectuees'),
+        volume_contractuel=F('volume_heure_cours') + F('volume_heure_td'),
+    )
+
+    context = {
+        'title': f'Suivi détaillé - {classe.nom}',
+        'active_page': 'suivi_classes',
+        'classe': classe,
+        'maquette': maquette,
+        'contrats': contrats,
+        'annee_academique': annee_debut,
+    }
+
+    # Version du fragment de détail : classe, maquette et état des contrats
+    # de l'année (une requête d'agrégat). Si le fragment est déjà en cache,
+    # le détail n'est pas recalculé.
+    etat_contrats = contrats.aggregate(
+        nombre=Count('pk'),
+        modifie=Max('updated_at'),
+        professeurs=Max('professeur__user__updated_at'),
+    )
+    context.update(cache_tableaux.contexte_fragment(
+        classe.updated_at,
+        MaquetteViewModelService.get_version(maquette),
+        annee_academique,
+        etat_contrats['nombre'],
+        etat_contrats['modifie'],
+        etat_contrats['professeurs'],
+    ))
+
+    # Le fragment est produit ici (et non par {% cache %} dans la page) : un
+    # fragment expiré entre la vérification et le rendu serait sinon mis en
+    # cache sans les données du détail
+    fragment_key = make_template_fragment_key(
+        'classe_suivi_detail', [classe.pk, context['fragment_version']]
+    )
+    context['detail_html'] = cache.get_or_set(
+        fragment_key,
+        lambda: render_to_string(
+            'contrats/suivi/classe_detail_suivi_contenu.html',
+            {**context, **_detail_suivi_classe(maquette, contrats)},
+            request=request,
+        ),
+        context['fragment_duree'],
+    )
+
+    return render(request, 'contrats/suivi/classe_detail_suivi.html', context)
+
+
+def _detail_suivi_classe(maquette, contrats):
+    """
+    Modules démarrés / non démarrés, statistiques et progression par UE
+    d'une classe à partir de sa maquette et de ses contrats annotés
+    """
+    # Extraire tous les modules de la maquette, indexés par id ; la
+    # progression par UE est comptée dans la même passe
     tous_les_modules = []
+    modules_par_id = {}
+    progression_par_ue = {}
     ues = maquette.unites_enseignement or []
     
     for ue in ues:
+        ue_nom = ue.get('libelle', 'UE non spécifiée')
         for matiere in ue.get('matieres', []):
             module_data = {
                 'id': matiere.get('id'),
                 'code': matiere.get('code', ''),
                 'nom': matiere.get('nom', 'Module sans nom'),
-                'ue_nom': ue.get('libelle', 'UE non spécifiée'),
+                'ue_nom': ue_nom,
                 'volume_cm': float(matiere.get('volume_horaire_cm', 0)),
                 'volume_td': float(matiere.get('volume_horaire_td', 0)),
                 'taux_cm': float(matiere.get('taux_horaire_cm', 5000)),
@@ -2064,56 +2321,68 @@ def classe_detail_suivi(request, classe_id):
                 'progression': 0,
             }
             tous_les_modules.append(module_data)
+            # Premier module rencontré pour un id (comme l'ancien parcours linéaire)
+            modules_par_id.setdefault(str(module_data['id']), module_data)
+            
+            ue_data = progression_par_ue.setdefault(ue_nom, {
+                'total_modules': 0,
+                'modules_demarres': 0,
+                'progression': 0
+            })
+            ue_data['total_modules'] += 1
 
-    # Récupérer les contrats existants pour cette classe - CORRECTION: utilisation de date_validation
-    contrats = Contrat.objects.filter(
-        classe=classe,
-        date_validation__year=annee_academique
-    ).select_related('professeur', 'professeur__user', 'valide_par', 'module_propose')
-
-    # Marquer les modules démarrés
+    # Marquer les modules démarrés et totaliser les contrats en une passe
     modules_demarres = []
-    modules_ids_demarres = set()
+    contrats_total = contrats_en_cours = contrats_termines = 0
+    volume_total_effectue = 0.0
     
     for contrat in contrats:
+        contrats_total += 1
+        if contrat.status == 'IN_PROGRESS':
+            contrats_en_cours += 1
+        elif contrat.status in ('COMPLETED', 'READY_FOR_PAYMENT'):
+            contrats_termines += 1
+        volume_total_effectue += float(contrat.volume_effectue)
+        
         module_propose = contrat.module_propose
-        if module_propose:
-            # Trouver le module correspondant dans la liste
-            for module in tous_les_modules:
-                if str(module['id']) == str(module_propose.code_module):
-                    module['est_demarre'] = True
-                    module['contrat'] = contrat
-                    module['statut_contrat'] = contrat.get_status_display()
-                    module['professeur'] = contrat.professeur.user.get_full_name()
-                    
-                    # Calculer la progression du module
-                    heures_effectuees = contrat.get_heures_effectuees()
-                    volume_total = contrat.volume_total_contractuel
-                    
-                    if volume_total > 0:
-                        module['progression'] = round(
-                            (contrat.volume_total_effectue / volume_total) * 100, 1
-                        )
-                    else:
-                        module['progression'] = 0
-                    
-                    modules_demarres.append(module)
-                    modules_ids_demarres.add(module['id'])
-                    break
+        if not module_propose:
+            continue
+        module = modules_par_id.get(str(module_propose.code_module))
+        if module is None:
+            continue
+        
+        if not module['est_demarre']:
+            progression_par_ue[module['ue_nom']]['modules_demarres'] += 1
+        module['est_demarre'] = True
+        module['contrat'] = contrat
+        module['statut_contrat'] = contrat.get_status_display()
+        module['professeur'] = contrat.professeur.user.get_full_name()
+        
+        # Progression du module à partir des heures annotées
+        if contrat.volume_contractuel > 0:
+            module['progression'] = round(
+                (contrat.volume_effectue / contrat.volume_contractuel) * 100, 1
+            )
+        else:
+            module['progression'] = 0
+        
+        modules_demarres.append(module)
 
     # Séparer les modules démarrés et non démarrés
-    modules_non_demarres = [m for m in tous_les_modules if m['id'] not in modules_ids_demarres]
+    modules_non_demarres = [
+        m for m in tous_les_modules if not modules_par_id[str(m['id'])]['est_demarre']
+    ]
 
     # Statistiques de la classe
     stats_classe = {
         'total_modules': len(tous_les_modules),
         'modules_demarres': len(modules_demarres),
         'modules_non_demarres': len(modules_non_demarres),
-        'contrats_total': contrats.count(),
-        'contrats_en_cours': contrats.filter(status='IN_PROGRESS').count(),
-        'contrats_termines': contrats.filter(status__in=['COMPLETED', 'READY_FOR_PAYMENT']).count(),
+        'contrats_total': contrats_total,
+        'contrats_en_cours': contrats_en_cours,
+        'contrats_termines': contrats_termines,
         'volume_total_prevue': sum(m['volume_cm'] + m['volume_td'] for m in tous_les_modules),
-        'volume_total_effectue': sum(float(c.volume_total_effectue) for c in contrats),
+        'volume_total_effectue': volume_total_effectue,
     }
 
     if stats_classe['total_modules'] > 0:
@@ -2123,136 +2392,61 @@ def classe_detail_suivi(request, classe_id):
     else:
         stats_classe['progression_globale'] = 0
 
-    # Progression par UE
-    progression_par_ue = {}
-    for module in tous_les_modules:
-        ue_nom = module['ue_nom']
-        if ue_nom not in progression_par_ue:
-            progression_par_ue[ue_nom] = {
-                'total_modules': 0,
-                'modules_demarres': 0,
-                'progression': 0
-            }
-        
-        progression_par_ue[ue_nom]['total_modules'] += 1
-        if module['est_demarre']:
-            progression_par_ue[ue_nom]['modules_demarres'] += 1
-    
-    # Calculer le pourcentage par UE
-    for ue_nom, data in progression_par_ue.items():
+    # Pourcentage par UE
+    for data in progression_par_ue.values():
         if data['total_modules'] > 0:
             data['progression'] = round((data['modules_demarres'] / data['total_modules']) * 100, 1)
 
-    context = {
-        'title': f'Suivi détaillé - {classe.nom}',
-        'active_page': 'suivi_classes',
-        'classe': classe,
-        'maquette': maquette,
+    return {
         'modules_demarres': modules_demarres,
         'modules_non_demarres': modules_non_demarres,
         'stats_classe': stats_classe,
         'progression_par_ue': progression_par_ue,
-        'contrats': contrats,
-        'annee_academique': annee_academique,
     }
 
-    return render(request, 'contrats/suivi/classe_detail_suivi.html', context)
-
 
 @login_required
 def progression_annuelle(request):
     """
-    Vue globale de la progression annuelle avec graphiques - CORRIGÉE
+    Vue globale de la progression annuelle avec graphiques
+
+    Les chiffres proviennent de ProgressionService et les courbes cumulées
+    de SerieProgressionService (cache par année).
     """
-    annee_academique = request.GET.get('annee', timezone.now().year)
+    annee_academique, annee_debut = _annee_suivi(request)
+    frequence = request.GET.get('frequence', 'semaine')
     
-    # Récupérer toutes les classes avec leurs statistiques
-    classes = Classe.objects.filter(is_active=True).order_by('niveau', 'nom')
+    progression = ProgressionService.get(annee_academique)
+    serie_progression = SerieProgressionService.get(annee_academique, frequence)
+    donnees_progression = progression['classes']
+    totaux = progression['totaux']
     
-    donnees_progression = []
     donnees_graphique = {
-        'labels': [],
-        'modules_demarres': [],
-        'modules_restants': [],
-        'progression_pourcent': []
+        'labels': [item['classe']['nom'] for item in donnees_progression],
+        'modules_demarres': [item['modules_demarres'] for item in donnees_progression],
+        'modules_restants': [item['modules_restants'] for item in donnees_progression],
+        'progression_pourcent': [item['progression_pourcent'] for item in donnees_progression],
     }
     
-    for classe in classes:
-        # Calculer les statistiques pour chaque classe
-        total_modules = 0
-        # Compter les modules via les maquettes actives
-        maquettes_actives = Maquette.objects.filter(classe=classe, is_active=True)
-        for maquette in maquettes_actives:
-            ues = maquette.unites_enseignement or []
-            for ue in ues:
-                total_modules += len(ue.get('matieres', []))
-        
-        # Modules démarrés via les contrats
-        modules_demarres = Contrat.objects.filter(
-            classe=classe,
-            date_validation__year=annee_academique,
-            status__in=['IN_PROGRESS', 'COMPLETED', 'READY_FOR_PAYMENT']
-        ).count()
-        
-        modules_restants = max(total_modules - modules_demarres, 0)
-        
-        if total_modules > 0:
-            progression_pourcent = round((modules_demarres / total_modules) * 100, 1)
-        else:
-            progression_pourcent = 0
-        
-        # Données pour le graphique
-        donnees_graphique['labels'].append(classe.nom)
-        donnees_graphique['modules_demarres'].append(modules_demarres)
-        donnees_graphique['modules_restants'].append(modules_restants)
-        donnees_graphique['progression_pourcent'].append(progression_pourcent)
-        
-        # Données détaillées
-        donnees_progression.append({
-            'classe': classe,
-            'total_modules': total_modules,
-            'modules_demarres': modules_demarres,
-            'modules_restants': modules_restants,
-            'progression_pourcent': progression_pourcent,
-            'contrats_en_cours': Contrat.objects.filter(
-                classe=classe,
-                date_validation__year=annee_academique,
-                status='IN_PROGRESS'
-            ).count(),
-            'contrats_termines': Contrat.objects.filter(
-                classe=classe,
-                date_validation__year=annee_academique,
-                status__in=['COMPLETED', 'READY_FOR_PAYMENT']
-            ).count(),
-        })
-    
     # Statistiques globales
-    total_modules_global = sum(item['total_modules'] for item in donnees_progression)
-    total_demarres_global = sum(item['modules_demarres'] for item in donnees_progression)
-    
-    if total_modules_global > 0:
-        progression_globale = round((total_demarres_global / total_modules_global) * 100, 1)
-    else:
-        progression_globale = 0
-    
-    # Utilisation de date_validation pour les statistiques globales
-    contrats_globaux = Contrat.objects.filter(date_validation__year=annee_academique)
-    
     stats_globales = {
-        'total_classes': len(classes),
-        'total_modules': total_modules_global,
-        'modules_demarres': total_demarres_global,
-        'modules_restants': total_modules_global - total_demarres_global,
-        'progression_globale': progression_globale,
-        'contrats_total': contrats_globaux.count(),
-        'contrats_en_cours': contrats_globaux.filter(status='IN_PROGRESS').count(),
-        'contrats_termines': contrats_globaux.filter(status__in=['COMPLETED', 'READY_FOR_PAYMENT']).count(),
+        'total_classes': totaux['classes'],
+        'total_modules': totaux['total_modules'],
+        'modules_demarres': totaux['modules_demarres'],
+        'modules_restants': totaux['modules_restants'],
+        'progression_globale': totaux['progression_pourcent'],
+        'contrats_total': totaux['contrats_total'],
+        'contrats_en_cours': totaux['contrats_en_cours'],
+        'contrats_termines': totaux['contrats_termines'],
     }
     
-    # Récupérer les années académiques disponibles
-    annees_disponibles = Contrat.objects.exclude(
-        date_validation__isnull=True
-    ).dates('date_validation', 'year').order_by('-date_validation')
+    # Années académiques disponibles (année de début)
+    annees_disponibles = sorted({
+        int(annee[:4])
+        for annee in Contrat.objects.exclude(
+            annee_academique=''
+        ).values_list('annee_academique', flat=True).distinct()
+    }, reverse=True)
     
     # CORRECTION : Utiliser des clés sans espaces pour le dictionnaire
     statuts_contrats = {
@@ -2270,8 +2464,10 @@ def progression_annuelle(request):
         'stats_globales': stats_globales,
         'donnees_graphique': donnees_graphique,
         'statuts_contrats': statuts_contrats,
-        'annee_academique': annee_academique,
-        'annees_disponibles': [date.year for date in annees_disponibles],
+        'annee_academique': annee_debut,
+        'annees_disponibles': annees_disponibles,
+        'serie_progression': serie_progression,
+        'frequence': serie_progression['frequence'],
     }
     
     return render(request, 'contrats/suivi/progression_annuelle.html', context)
@@ -2280,40 +2476,138 @@ def progression_annuelle(request):
 @require_http_methods(["GET"])
 def api_progression_classes(request):
     """
-    API pour récupérer les données de progression des classes (AJAX) - CORRIGÉE
+    API pour récupérer les données de progression des classes (AJAX)
     """
-    annee_academique = request.GET.get('annee', timezone.now().year)
+    annee_academique, _ = _annee_suivi(request)
     
-    classes = Classe.objects.filter(is_active=True).order_by('niveau', 'nom')
-    
-    data = []
-    for classe in classes:
-        # CORRECTION: Calcul correct des modules
-        total_modules = 0
-        maquettes_actives = Maquette.objects.filter(classe=classe, is_active=True)
-        for maquette in maquettes_actives:
-            ues = maquette.unites_enseignement or []
-            for ue in ues:
-                total_modules += len(ue.get('matieres', []))
-        
-        modules_demarres = Contrat.objects.filter(
-            classe=classe,
-            date_validation__year=annee_academique,
-            status__in=['IN_PROGRESS', 'COMPLETED', 'READY_FOR_PAYMENT']
-        ).count()
-        
-        data.append({
-            'id': classe.id,
-            'nom': classe.nom,
-            'niveau': classe.niveau,
-            'total_modules': total_modules,
-            'modules_demarres': modules_demarres,
-            'modules_restants': max(total_modules - modules_demarres, 0),
-            'progression_pourcent': round((modules_demarres / total_modules * 100), 1) if total_modules > 0 else 0,
-        })
+    data = [
+        {
+            'id': item['classe']['id'],
+            'nom': item['classe']['nom'],
+            'niveau': item['classe']['niveau'],
+            'total_modules': item['total_modules'],
+            'modules_demarres': item['modules_demarres'],
+            'modules_restants': item['modules_restants'],
+            'progression_pourcent': item['progression_pourcent'],
+        }
+        for item in ProgressionService.get(annee_academique)['classes']
+    ]
     
     return JsonResponse({
         'success': True,
         'annee_academique': annee_academique,
         'classes': data,
-    })
\ No newline at end of file
+    })
+
+
+# ==========================================
+# EXPORTS EN ARRIÈRE-PLAN
+# ==========================================
+
+def _export_job_json(job):
+    definition = exports.TYPES.get(job.type_export)
+    return {
+        'id': job.pk,
+        'type': job.type_export,
+        'libelle': definition.libelle if definition else job.type_export,
+        'parametres': job.parametres,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'created_at': job.created_at.isoformat(),
+        'date_fin': job.date_fin.isoformat() if job.date_fin else None,
+        'expire_le': job.expire_le.isoformat() if job.expire_le else None,
+        'taille': job.taille,
+        'erreur': job.erreur,
+        'url': reverse('export_telecharger', args=[job.pk]) if job.est_disponible else None,
+    }
+
+
+def _export_autorise(request, job):
+    definition = exports.TYPES.get(job.type_export)
+    return definition is not None and request.user.role in definition.roles
+
+
+@login_required
+@require_http_methods(["POST"])
+def api_export_demander(request, type_export):
+    """
+    Demande un export produit en arrière-plan
+
+    Paramètres : corps JSON ou POST (voir Gestion.exports.TYPES).
+    Réponse 202 avec le job ; une demande identique rejoint le job existant.
+    """
+    definition = exports.TYPES.get(type_export)
+    if definition is None:
+        return JsonResponse({
+            'success': False,
+            'error': "Type d'export inconnu"
+        }, status=404)
+    
+    if request.user.role not in definition.roles:
+        return JsonResponse({
+            'success': False,
+            'error': 'Permission refusée'
+        }, status=403)
+    
+    if request.content_type == 'application/json':
+        try:
+            donnees = json.loads(request.body or '{}')
+        except json.JSONDecodeError:
+            return JsonResponse({
+                'success': False,
+                'error': 'Corps JSON invalide'
+            }, status=400)
+    else:
+        donnees = request.POST
+    
+    try:
+        job, cree = exports.demander(type_export, donnees, request.user)
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    except exports.DemandeConcurrente:
+        return JsonResponse({
+            'success': False,
+            'error': 'Export identique en cours de traitement, réessayez dans un instant'
+        }, status=503)
+    
+    return JsonResponse({
+        'success': True,
+        'cree': cree,
+        'job': _export_job_json(job),
+        'url_statut': reverse('api_export_statut', args=[job.pk]),
+    }, status=202)
+
+
+@login_required
+@require_http_methods(["GET"])
+def api_export_statut(request, pk):
+    """Statut d'un export (à interroger jusqu'à DONE ou FAILED)"""
+    job = get_object_or_404(ExportJob, pk=pk)
+    if not _export_autorise(request, job):
+        return JsonResponse({
+            'success': False,
+            'error': 'Permission refusée'
+        }, status=403)
+    
+    return JsonResponse({'success': True, 'job': _export_job_json(job)})
+
+
+@login_required
+@require_http_methods(["GET"])
+def export_telecharger(request, pk):
+    """Téléchargement du fichier d'un export terminé et non expiré"""
+    job = get_object_or_404(ExportJob, pk=pk)
+    if not _export_autorise(request, job):
+        raise PermissionDenied
+    if not job.est_disponible:
+        raise Http404("Export non disponible")
+    
+    extension = exports.TYPES[job.type_export].extension
+    return FileResponse(
+        job.fichier.open('rb'),
+        as_attachment=True,
+        filename=f"{job.type_export}_{timezone.localtime(job.date_fin):%Y%m%d_%H%M}.{extension}",
+    )
@@ -249,6 +249,39 @@ MYIIPEA_API_BASE_URL = "https://myiipea.ci/api"
 MYIIPEA_API_TIMEOUT = 30  # secondes
 MYIIPEA_CACHE_TIMEOUT = 300  # 5 minutes
 
+# ==========================================
+# CACHE
+# ==========================================
+# Redis partagé par tous les processus (workers, commandes) si REDIS_URL est
+# défini, sinon cache mémoire propre à chaque processus. Les versions
+# d'invalidation des tableaux de bord et des exports sont en base (voir
+# Utilisateur.cache_tableaux) : un cache local reste cohérent.
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'pedago',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# View-model compilé des maquettes (clé versionnée, invalidée par la sync)
+MAQUETTE_VM_CACHE_TIMEOUT = 60 * 60 * 24  # 24 heures
+
+# Catalogue des modules par classe (wizard précontrat, ETag / 304)
+MODULE_CATALOGUE_CACHE_TIMEOUT = 60 * 60  # 1 heure
+
+# Campagnes de paie : taux de retenue par défaut sur le montant brut (%)
+PAIE_TAUX_DEDUCTIONS = '0.00'
+
 
 
 
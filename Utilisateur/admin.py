@@ -8,8 +8,9 @@ from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from .models import (
     Section, CustomUser, Professeur,
-    Comptable
+    Comptable, CompteurStatistique
 )
+from . import compteurs
 
 # ========================================
 # CONFIGURATION ADMIN - SECTION
@@ -74,7 +75,7 @@ class SectionAdmin(admin.ModelAdmin):
     
     @admin.action(description='Activer les sections sélectionnées')
     def activer_sections(self, request, queryset):
-        updated = queryset.update(is_active=True)
+        updated = compteurs.mettre_a_jour(queryset, is_active=True)
         self.message_user(
             request,
             f'{updated} section(s) activée(s) avec succès.',
@@ -83,7 +84,7 @@ class SectionAdmin(admin.ModelAdmin):
     
     @admin.action(description='Désactiver les sections sélectionnées')
     def desactiver_sections(self, request, queryset):
-        updated = queryset.update(is_active=False)
+        updated = compteurs.mettre_a_jour(queryset, is_active=False)
         self.message_user(
             request,
             f'{updated} section(s) désactivée(s) avec succès.',
@@ -251,13 +252,13 @@ class ProfesseurAdmin(admin.ModelAdmin):
     
     def marquer_actif(self, request, queryset):
         """Marquer comme actif"""
-        count = queryset.update(is_active=True)
+        count = compteurs.mettre_a_jour(queryset, is_active=True)
         self.message_user(request, f'{count} professeur(s) marqué(s) comme actif(s).')
     marquer_actif.short_description = "Marquer comme actif"
     
     def marquer_inactif(self, request, queryset):
         """Marquer comme inactif"""
-        count = queryset.update(is_active=False)
+        count = compteurs.mettre_a_jour(queryset, is_active=False)
         self.message_user(request, f'{count} professeur(s) marqué(s) comme inactif(s).')
     marquer_inactif.short_description = "Marquer comme inactif"
     
@@ -497,6 +498,22 @@ class ComptableAdmin(admin.ModelAdmin):
         self.message_user(request, message, messages.INFO)
 
 
+# ========================================
+# CONFIGURATION ADMIN - COMPTEURS STATISTIQUES
+# ========================================
+
+@admin.register(CompteurStatistique)
+class CompteurStatistiqueAdmin(admin.ModelAdmin):
+    list_display = ['domaine', 'cle', 'valeur', 'updated_at']
+    list_filter = ['domaine']
+    search_fields = ['cle']
+    readonly_fields = ['domaine', 'cle', 'valeur', 'updated_at']
+    
+    def has_add_permission(self, request):
+        # Alimentés par les signaux et la commande rebuild_compteurs
+        return False
+
+
 # ========================================
 # PERSONNALISATION DU SITE ADMIN
 # ========================================
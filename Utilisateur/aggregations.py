@@ -0,0 +1,66 @@
+"""
+Agrégations de comptage partagées par les tableaux de bord
+
+Chaque helper calcule ses compteurs en une seule requête SQL par modèle :
+un GROUP BY pour les répartitions (statut, rôle, grade...) et un agrégat
+conditionnel (COUNT ... FILTER) pour les compteurs nommés.
+"""
+
+from django.db.models import Count, Q
+
+
+def compter_par(queryset, champ, *dimensions, choix=None, total='total', distinct=False):
+    """
+    Compte les lignes d'un queryset par valeur de `champ` (un seul GROUP BY)
+
+    - `dimensions` : champs de regroupement supplémentaires, les clés du
+      résultat deviennent alors des tuples (champ, dimension...)
+    - `choix` : valeurs attendues (liste de valeurs ou `choices` Django),
+      initialisées à 0 lorsqu'elles n'apparaissent pas en base
+    - `total` : clé du total général, None pour l'omettre
+    - `distinct` : compter les lignes distinctes (querysets avec jointures)
+    """
+    champs = (champ, *dimensions)
+    lignes = (
+        queryset.order_by()
+        .values(*champs)
+        .annotate(_nombre=Count('pk', distinct=distinct))
+        .values_list(*champs, '_nombre')
+    )
+
+    resultat = {}
+    if choix and not dimensions:
+        for valeur in choix:
+            resultat[valeur[0] if isinstance(valeur, (list, tuple)) else valeur] = 0
+
+    for *cle, nombre in lignes:
+        resultat[tuple(cle) if dimensions else cle[0]] = nombre
+
+    if total:
+        resultat[total] = sum(resultat.values())
+    return resultat
+
+
+def compter_si(queryset, total='total', distinct=False, **conditions):
+    """
+    Calcule plusieurs compteurs nommés en une seule requête (agrégat conditionnel)
+
+    Chaque condition est un `Q`, un dict de lookups, ou directement une
+    expression d'agrégat (Sum, Avg...) à calculer dans la même requête.
+
+        compter_si(Contrat.objects.all(),
+                   en_cours=Q(status='IN_PROGRESS'),
+                   termines={'status__in': ['COMPLETED', 'READY_FOR_PAYMENT']})
+    """
+    agregats = {}
+    for nom, condition in conditions.items():
+        if isinstance(condition, dict):
+            condition = Q(**condition)
+        if isinstance(condition, Q):
+            condition = Count('pk', filter=condition, distinct=distinct)
+        agregats[nom] = condition
+
+    if total:
+        agregats[total] = Count('pk', distinct=distinct)
+
+    return queryset.order_by().aggregate(**agregats)
@@ -0,0 +1,233 @@
+"""
+Cache des contextes de tableaux de bord invalidé par tags
+
+Chaque fragment de contexte (statistiques d'un tableau de bord) dépend de
+tags : un tag par type de données (contrats, paiements, pointages,
+utilisateurs...) et un tag par professeur pour ses propres données. Le
+fragment est mis en cache sous une clé construite avec la version courante
+de ses tags ; modifier un contrat incrémente la version de `contrats` et de
+`professeur:<id>`, les fragments qui en dépendent changent de clé et les
+anciennes entrées expirent d'elles-mêmes.
+
+Les versions sont incrémentées par les signaux post_save / post_delete
+(voir Utilisateur.signals) et par les écritures en masse
+(`compteurs.mettre_a_jour`, bulk_create des services). Elles sont
+conservées en base (CompteurStatistique, domaine `versions_cache`) et non
+dans le cache : une invalidation faite par un worker ou par une commande
+(`traiter_exports`...) est vue par tous les processus, même avec un cache
+local à chaque processus. Les succès et échecs de lecture sont comptés
+par fragment (`statistiques`, commande `cache_tableaux`).
+"""
+
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+
+from .models import CompteurStatistique
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'tableau'
+CACHE_TIMEOUT = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 60 * 5)
+
+# Tag global modifié par les écritures de chaque modèle
+TAGS_PAR_MODELE = {
+    'Utilisateur.CustomUser': 'utilisateurs',
+    'Utilisateur.Professeur': 'professeurs',
+    'Utilisateur.Comptable': 'comptables',
+    'Utilisateur.Section': 'sections',
+    'Gestion.PreContrat': 'precontrats',
+    'Gestion.ModulePropose': 'precontrats',
+    'Gestion.Contrat': 'contrats',
+    'Gestion.PaiementContrat': 'paiements',
+    'Gestion.Pointage': 'pointages',
+}
+
+# Fragments de contexte (widgets `<tableau>.<widget>`, voir
+# Utilisateur.widgets, et tableaux Gestion) et tags dont ils dépendent
+FRAGMENTS = {
+    'admin.compteurs': ('utilisateurs', 'professeurs', 'comptables', 'sections'),
+    'admin.roles': ('utilisateurs',),
+    'admin.recents': ('utilisateurs', 'professeurs'),
+    'admin.sections': ('sections', 'professeurs'),
+    'resp_peda.compteurs': ('utilisateurs', 'professeurs', 'sections'),
+    'resp_peda.repartition': ('utilisateurs', 'professeurs', 'sections'),
+    'resp_peda.recents': ('utilisateurs', 'professeurs', 'sections'),
+    'resp_rh.compteurs': ('professeurs', 'comptables'),
+    'resp_rh.recrutements': ('utilisateurs', 'professeurs', 'comptables'),
+    'comptable.compteurs': ('professeurs', 'sections'),
+    'informaticien.compteurs': ('utilisateurs',),
+    'informaticien.roles': ('utilisateurs',),
+    'informaticien.connexions': ('utilisateurs',),
+    'service_data.compteurs': ('utilisateurs', 'professeurs', 'comptables', 'sections'),
+    'service_data.graphiques': ('utilisateurs', 'professeurs', 'sections'),
+    'gestion_rh': ('precontrats', 'contrats'),
+    'gestion_pedagogique': ('contrats', 'pointages'),
+    'gestion_financier': ('paiements',),
+    'gestion_professeur': (),  # uniquement le tag professeur:<id>
+}
+
+
+def tag_professeur(professeur_id):
+    return f'professeur:{professeur_id}'
+
+
+# ==========================================
+# VERSIONS DES TAGS
+# ==========================================
+
+DOMAINE_VERSIONS = 'versions_cache'
+
+
+def versions(tags):
+    """Version courante de chaque tag, en une requête (0 tant qu'il n'a pas été invalidé)"""
+    tags = list(dict.fromkeys(tags))
+    if not tags:
+        return {}
+    trouvees = dict(CompteurStatistique.objects.filter(
+        domaine=DOMAINE_VERSIONS, cle__in=tags
+    ).values_list('cle', 'valeur'))
+    return {tag: trouvees.get(tag, 0) for tag in tags}
+
+
+def incrementer(tags):
+    """Incrémente immédiatement la version des tags (UPDATE F(), créée au besoin)"""
+    # Import local : compteurs importe ce module
+    from .compteurs import appliquer
+
+    appliquer({(DOMAINE_VERSIONS, tag): 1 for tag in tags})
+
+
+def invalider(*tags):
+    """Incrémente la version des tags une fois la transaction validée"""
+    tags = set(tags)
+    if tags:
+        transaction.on_commit(lambda: incrementer(tags))
+
+
+def tags_des_lignes(modele, lignes=()):
+    """Tag global du modèle et tags professeur des lignes (instances ou dicts)"""
+    tags = set()
+    tag = TAGS_PAR_MODELE.get(modele._meta.label)
+    if tag:
+        tags.add(tag)
+
+    for ligne in lignes:
+        if isinstance(ligne, dict):
+            professeur_id = ligne.get('professeur_id')
+        elif modele._meta.label == 'Utilisateur.Professeur':
+            professeur_id = ligne.pk
+        elif modele._meta.label == 'Gestion.Pointage':
+            try:
+                professeur_id = ligne.contrat.professeur_id
+            except ObjectDoesNotExist:
+                # Contrat supprimé en cascade
+                professeur_id = None
+        else:
+            professeur_id = getattr(ligne, 'professeur_id', None)
+        if professeur_id:
+            tags.add(tag_professeur(professeur_id))
+    return tags
+
+
+def invalider_modele(modele, lignes=()):
+    """Invalide les fragments dépendant des lignes écrites d'un modèle"""
+    invalider(*tags_des_lignes(modele, lignes))
+
+
+# ==========================================
+# FRAGMENTS
+# ==========================================
+
+def _compter(nom, succes):
+    cle = f"{CACHE_PREFIX}_stats_{nom}_{'hits' if succes else 'misses'}"
+    try:
+        cache.incr(cle)
+    except ValueError:
+        cache.add(cle, 0, None)
+        cache.incr(cle)
+
+
+def fragment(nom, construire, portee='global', tags=(), duree=None):
+    """
+    Fragment de contexte depuis le cache, construit au besoin
+
+    Args:
+        nom: nom du fragment (clé de FRAGMENTS)
+        construire: fonction sans argument retournant le fragment (picklable)
+        portee: identifiant de portée (utilisateur, professeur, jour...)
+        tags: tags supplémentaires propres à la portée
+        duree: durée de cache propre au fragment (DASHBOARD_CACHE_TIMEOUT par défaut)
+    """
+    tags = (*FRAGMENTS[nom], *tags)
+    signature = '.'.join(str(version) for version in versions(tags).values())
+    cache_key = f'{CACHE_PREFIX}_{nom}_{portee}_{signature}'
+
+    valeur = cache.get(cache_key)
+    _compter(nom, valeur is not None)
+    if valeur is not None:
+        logger.debug(f"⚡ Tableau de bord {nom} ({portee}) servi depuis le cache")
+        return valeur
+
+    valeur = construire()
+    cache.set(cache_key, valeur, duree or CACHE_TIMEOUT)
+    return valeur
+
+
+def statistiques():
+    """Succès, échecs et taux de succès du cache par fragment"""
+    cles = {
+        nom: (f'{CACHE_PREFIX}_stats_{nom}_hits', f'{CACHE_PREFIX}_stats_{nom}_misses')
+        for nom in FRAGMENTS
+    }
+    valeurs = cache.get_many([cle for paire in cles.values() for cle in paire])
+
+    resultat = []
+    for nom, (cle_hits, cle_misses) in cles.items():
+        hits, misses = valeurs.get(cle_hits, 0), valeurs.get(cle_misses, 0)
+        resultat.append({
+            'fragment': nom,
+            'hits': hits,
+            'misses': misses,
+            'ratio': round(hits / (hits + misses) * 100, 1) if hits + misses else 0,
+        })
+    return resultat
+
+
+def reinitialiser_statistiques():
+    cache.delete_many([
+        f'{CACHE_PREFIX}_stats_{nom}_{type_}' for nom in FRAGMENTS for type_ in ('hits', 'misses')
+    ])
+
+
+# ==========================================
+# FRAGMENTS DE GABARITS PAR OBJET
+# ==========================================
+
+FRAGMENT_CACHE_TIMEOUT = getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def version_fragment(*elements):
+    """
+    Empreinte courte des éléments dont dépend un fragment de gabarit
+    (dates de modification, identifiants, versions...). Toute modification
+    d'un élément change la clé du bloc {% cache %} ; l'ancienne entrée
+    expire d'elle-même.
+    """
+    parties = [
+        element.isoformat() if hasattr(element, 'isoformat') else str(element)
+        for element in elements
+    ]
+    return hashlib.sha1('|'.join(parties).encode()).hexdigest()[:16]
+
+
+def contexte_fragment(*elements):
+    """Variables attendues par les blocs {% cache fragment_duree ... fragment_version %}"""
+    return {
+        'fragment_version': version_fragment(*elements),
+        'fragment_duree': FRAGMENT_CACHE_TIMEOUT,
+    }
@@ -0,0 +1,277 @@
+"""
+Compteurs statistiques maintenus de façon incrémentale
+
+Les tableaux de bord lisent leurs comptages globaux (utilisateurs par rôle,
+professeurs par grade et statut, contrats et paiements par statut...) dans
+la table CompteurStatistique au lieu de recompter les tables à chaque
+affichage.
+
+Chaque domaine déclare les champs qu'il lit et la fonction qui, pour une
+ligne, retourne les compteurs auxquels elle contribue. Les signaux
+appliquent la différence avant / après de chaque save() et delete(), les
+UPDATE / INSERT en masse passent par `mettre_a_jour` et `enregistrer`, et
+la commande `rebuild_compteurs` reconstruit ou vérifie les tables.
+"""
+
+from collections import Counter, namedtuple
+
+from django.apps import apps as registre_global
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from . import cache_tableaux
+from .models import CompteurStatistique
+
+Domaine = namedtuple('Domaine', ['modele', 'champs', 'cles'])
+
+
+# ==========================================
+# DÉFINITION DES DOMAINES
+# ==========================================
+
+def _jour(date_heure):
+    """Clé du compteur journalier de création"""
+    return f'jour:{timezone.localdate(date_heure).isoformat()}'
+
+
+def _cles_utilisateur(ligne):
+    cles = {'total': 1, f"role:{ligne['role']}": 1, _jour(ligne['created_at']): 1}
+    if ligne['is_active']:
+        cles['actifs'] = 1
+        if ligne['is_active_user']:
+            cles['comptes_actifs'] = 1
+            cles[f"role_actifs:{ligne['role']}"] = 1
+    if not ligne['is_active_user']:
+        cles['comptes_desactives'] = 1
+    return cles
+
+
+def _cles_professeur(ligne):
+    cles = {
+        'total': 1,
+        f"grade:{ligne['grade']}": 1,
+        f"statut:{ligne['statut']}": 1,
+        _jour(ligne['created_at']): 1,
+    }
+    if ligne['is_active']:
+        cles['actifs'] = 1
+        cles['experience_actifs'] = ligne['annee_experience'] or 0
+    else:
+        cles['inactifs'] = 1
+    return cles
+
+
+def _cles_comptable(ligne):
+    cles = {'total': 1, _jour(ligne['created_at']): 1}
+    if ligne['is_active']:
+        cles['actifs'] = 1
+    return cles
+
+
+def _cles_section(ligne):
+    return {'total': 1, 'actives' if ligne['is_active'] else 'inactives': 1}
+
+
+def _cles_statut(ligne):
+    return {'total': 1, f"status:{ligne['status']}": 1}
+
+
+DOMAINES = {
+    'utilisateurs': Domaine(
+        'Utilisateur.CustomUser',
+        ('role', 'is_active', 'is_active_user', 'created_at'),
+        _cles_utilisateur,
+    ),
+    'professeurs': Domaine(
+        'Utilisateur.Professeur',
+        ('grade', 'statut', 'is_active', 'annee_experience', 'created_at'),
+        _cles_professeur,
+    ),
+    'comptables': Domaine('Utilisateur.Comptable', ('is_active', 'created_at'), _cles_comptable),
+    'sections': Domaine('Utilisateur.Section', ('is_active',), _cles_section),
+    'contrats': Domaine('Gestion.Contrat', ('status',), _cles_statut),
+    'paiements': Domaine('Gestion.PaiementContrat', ('status',), _cles_statut),
+}
+
+
+def modeles_suivis():
+    """Modèles dont les écritures alimentent les compteurs"""
+    return [registre_global.get_model(label) for label in {d.modele for d in DOMAINES.values()}]
+
+
+def domaines_du_modele(modele):
+    label = modele._meta.label
+    return [nom for nom, domaine in DOMAINES.items() if domaine.modele == label]
+
+
+def champs_du_modele(modele):
+    """Champs lus par les domaines du modèle (ordre stable)"""
+    champs = []
+    for nom in domaines_du_modele(modele):
+        champs.extend(c for c in DOMAINES[nom].champs if c not in champs)
+    return champs
+
+
+# ==========================================
+# MISE À JOUR INCRÉMENTALE
+# ==========================================
+
+def _contributions(modele, lignes, signe, deltas):
+    for nom in domaines_du_modele(modele):
+        domaine = DOMAINES[nom]
+        for ligne in lignes:
+            if not isinstance(ligne, dict):
+                ligne = {champ: getattr(ligne, champ) for champ in domaine.champs}
+            for cle, valeur in domaine.cles(ligne).items():
+                deltas[(nom, cle)] += signe * valeur
+
+
+def appliquer(deltas):
+    """Ajoute chaque delta {(domaine, cle): n} à son compteur (UPDATE F())"""
+    now = timezone.now()
+    for (domaine, cle), delta in deltas.items():
+        if not delta:
+            continue
+        compteur = CompteurStatistique.objects.filter(domaine=domaine, cle=cle)
+        if compteur.update(valeur=F('valeur') + delta, updated_at=now):
+            continue
+        try:
+            with transaction.atomic():
+                CompteurStatistique.objects.create(domaine=domaine, cle=cle, valeur=delta)
+        except IntegrityError:
+            # Créé entre-temps par une écriture concurrente
+            compteur.update(valeur=F('valeur') + delta, updated_at=now)
+
+
+def enregistrer(modele, avant=(), apres=()):
+    """
+    Répercute sur les compteurs le passage des lignes `avant` aux lignes
+    `apres` (instances ou dicts des champs suivis). Pour un bulk_create,
+    seules les lignes `apres` sont fournies ; pour une suppression, `avant`.
+    """
+    deltas = Counter()
+    _contributions(modele, avant, -1, deltas)
+    _contributions(modele, apres, 1, deltas)
+    appliquer(deltas)
+
+
+def mettre_a_jour(queryset, **valeurs):
+    """
+    queryset.update(**valeurs) en tenant à jour les compteurs et le cache
+    des tableaux de bord (les signaux ne sont pas déclenchés)
+
+    Returns:
+        int: nombre de lignes modifiées
+    """
+    modele = queryset.model
+    champs = champs_du_modele(modele)
+    if not set(champs) & set(valeurs):
+        champs = []
+    portee = ['professeur_id'] if any(f.attname == 'professeur_id' for f in modele._meta.concrete_fields) else []
+
+    with transaction.atomic():
+        avant = list(queryset.order_by().values('pk', *champs, *portee))
+        nombre = queryset.update(**valeurs)
+        if champs:
+            apres = list(
+                modele._default_manager.filter(pk__in=[ligne['pk'] for ligne in avant]).values(*champs)
+            )
+            enregistrer(modele, avant, apres)
+        cache_tableaux.invalider_modele(modele, avant)
+    return nombre
+
+
+# ==========================================
+# LECTURE
+# ==========================================
+
+def lire(*domaines):
+    """
+    Compteurs des domaines demandés en une requête
+
+    Returns:
+        dict: {domaine: Counter({cle: valeur})}, une clé absente vaut 0
+    """
+    resultat = {nom: Counter() for nom in domaines}
+    for domaine, cle, valeur in CompteurStatistique.objects.filter(
+        domaine__in=domaines
+    ).values_list('domaine', 'cle', 'valeur'):
+        resultat[domaine][cle] = valeur
+    return resultat
+
+
+def par_prefixe(compteurs, prefixe):
+    """{valeur: nombre} des clés `prefixe:valeur` non nulles"""
+    debut = f'{prefixe}:'
+    return {
+        cle[len(debut):]: valeur
+        for cle, valeur in compteurs.items()
+        if cle.startswith(debut) and valeur
+    }
+
+
+def crees_depuis(compteurs, date_heure):
+    """Nombre de lignes créées depuis `date_heure` (compteurs journaliers)"""
+    depuis = timezone.localdate(date_heure).isoformat()
+    return sum(valeur for jour, valeur in par_prefixe(compteurs, 'jour').items() if jour >= depuis)
+
+
+# ==========================================
+# RECONSTRUCTION ET VÉRIFICATION
+# ==========================================
+
+def compter(nom, registre=registre_global):
+    """Valeurs réelles des compteurs d'un domaine, recalculées depuis la base"""
+    domaine = DOMAINES[nom]
+    modele = registre.get_model(domaine.modele)
+
+    resultat = Counter()
+    lignes = modele._default_manager.order_by().values(*domaine.champs).annotate(_nombre=Count('pk'))
+    for ligne in lignes.iterator(chunk_size=2000):
+        nombre = ligne.pop('_nombre')
+        for cle, valeur in domaine.cles(ligne).items():
+            resultat[cle] += valeur * nombre
+    return resultat
+
+
+def reconstruire(domaines=None, registre=registre_global):
+    """
+    Remplace les compteurs des domaines par les valeurs réelles
+
+    Returns:
+        dict: {domaine: nombre de compteurs écrits}
+    """
+    modele_compteur = registre.get_model('Utilisateur', 'CompteurStatistique')
+
+    resultat = {}
+    for nom in domaines or DOMAINES:
+        with transaction.atomic():
+            valeurs = compter(nom, registre)
+            modele_compteur.objects.filter(domaine=nom).delete()
+            modele_compteur.objects.bulk_create([
+                modele_compteur(domaine=nom, cle=cle, valeur=valeur)
+                for cle, valeur in valeurs.items()
+                if valeur
+            ])
+        resultat[nom] = sum(1 for valeur in valeurs.values() if valeur)
+    return resultat
+
+
+def verifier(domaines=None):
+    """
+    Compare les compteurs aux valeurs réelles
+
+    Returns:
+        list: (domaine, cle, valeur du compteur, valeur réelle) en écart
+    """
+    noms = list(domaines or DOMAINES)
+    enregistres = lire(*noms)
+
+    ecarts = []
+    for nom in noms:
+        reels = compter(nom)
+        for cle in sorted(set(reels) | set(enregistres[nom])):
+            if reels[cle] != enregistres[nom][cle]:
+                ecarts.append((nom, cle, enregistres[nom][cle], reels[cle]))
+    return ecarts
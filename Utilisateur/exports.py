@@ -0,0 +1,149 @@
+"""
+Exports de données en flux (CSV / NDJSON)
+
+Chaque table exportable déclare ses champs et la façon d'appliquer les
+filtres (section, statut, actif). Les lignes sont lues par lots
+(`.values_list().iterator(chunk_size=...)`), sérialisées à la volée et
+regroupées en blocs d'environ BLOC_TAILLE caractères : la réponse
+(StreamingHttpResponse) commence dès l'en-tête et la mémoire ne dépend pas
+du nombre de lignes. `compresser` gzip les blocs au fil de l'eau.
+"""
+
+import csv
+import json
+import zlib
+from collections import namedtuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comptable, Professeur, Section
+
+EXPORT_CHUNK_SIZE = 2000
+BLOC_TAILLE = 64 * 1024
+
+Table = namedtuple('Table', ['modele', 'champs', 'filtrer'])
+
+
+# ==========================================
+# TABLES EXPORTABLES
+# ==========================================
+
+def _filtrer_actif(queryset, filtres):
+    if filtres.get('actif') is not None:
+        queryset = queryset.filter(is_active=filtres['actif'])
+    return queryset
+
+
+def _filtrer_professeurs(queryset, filtres):
+    if filtres.get('section'):
+        queryset = queryset.filter(sections=filtres['section']).distinct()
+    if filtres.get('statut'):
+        queryset = queryset.filter(statut=filtres['statut'])
+    return _filtrer_actif(queryset, filtres)
+
+
+def _filtrer_comptables(queryset, filtres):
+    if filtres.get('section'):
+        queryset = queryset.filter(user__section_principale=filtres['section'])
+    return _filtrer_actif(queryset, filtres)
+
+
+def _filtrer_sections(queryset, filtres):
+    if filtres.get('section'):
+        queryset = queryset.filter(pk=filtres['section'])
+    return _filtrer_actif(queryset, filtres)
+
+
+TABLES = {
+    'professeurs': Table(
+        Professeur,
+        ('matricule', 'user__first_name', 'user__last_name', 'grade', 'statut', 'is_active'),
+        _filtrer_professeurs,
+    ),
+    'comptables': Table(
+        Comptable,
+        ('matricule', 'code_unique', 'user__first_name', 'user__last_name', 'is_active'),
+        _filtrer_comptables,
+    ),
+    'sections': Table(
+        Section,
+        ('nom', 'adresse', 'is_active'),
+        _filtrer_sections,
+    ),
+}
+
+
+def tables_demandees(data_type):
+    """Noms des tables d'un paramètre `type` ('all' = toutes), KeyError si inconnu"""
+    if data_type == 'all':
+        return list(TABLES)
+    TABLES[data_type]
+    return [data_type]
+
+
+def lignes(nom, filtres):
+    """Tuples des champs de la table, lus par lots, dans l'ordre des clés primaires"""
+    table = TABLES[nom]
+    queryset = table.filtrer(table.modele.objects.order_by('pk'), filtres)
+    return queryset.values_list(*table.champs).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+# ==========================================
+# SÉRIALISATION EN FLUX
+# ==========================================
+
+class _Echo:
+    """Pseudo-fichier pour csv.writer : writerow() retourne la ligne"""
+
+    def write(self, valeur):
+        return valeur
+
+
+def _par_blocs(morceaux):
+    """
+    Regroupe les morceaux de texte en blocs d'environ BLOC_TAILLE caractères
+    (le premier morceau part seul, pour que la réponse démarre aussitôt)
+    """
+    bloc, taille, seuil = [], 0, 0
+    for morceau in morceaux:
+        bloc.append(morceau)
+        taille += len(morceau)
+        if taille >= seuil:
+            yield ''.join(bloc)
+            bloc, taille, seuil = [], 0, BLOC_TAILLE
+    if bloc:
+        yield ''.join(bloc)
+
+
+def flux_csv(nom, filtres):
+    """CSV d'une table (BOM UTF-8 pour Excel), en-tête envoyé immédiatement"""
+    writer = csv.writer(_Echo(), delimiter=';')
+    yield '\ufeff' + writer.writerow(TABLES[nom].champs)
+    yield from _par_blocs(writer.writerow(ligne) for ligne in lignes(nom, filtres))
+
+
+def flux_ndjson(noms, filtres):
+    """Un objet JSON par ligne, avec sa table dans la clé `type`"""
+    for nom in noms:
+        champs = TABLES[nom].champs
+        yield from _par_blocs(
+            json.dumps(
+                {'type': nom, **dict(zip(champs, ligne))},
+                cls=DjangoJSONEncoder,
+                ensure_ascii=False,
+            ) + '\n'
+            for ligne in lignes(nom, filtres)
+        )
+
+
+def compresser(blocs):
+    """Encode les blocs en UTF-8 et les compresse en gzip au fil de l'eau"""
+    compresseur = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for bloc in blocs:
+        yield compresseur.compress(bloc.encode('utf-8')) + compresseur.flush(zlib.Z_SYNC_FLUSH)
+    yield compresseur.flush()
+
+
+def encoder(blocs):
+    for bloc in blocs:
+        yield bloc.encode('utf-8')
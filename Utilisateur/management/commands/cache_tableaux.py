@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from Utilisateur import cache_tableaux
+
+
+class Command(BaseCommand):
+    help = 'Afficher le taux de succès du cache des tableaux de bord par fragment'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Remettre les compteurs de succès / échecs à zéro après affichage',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('\n' + '=' * 70))
+        self.stdout.write(self.style.SUCCESS('    CACHE DES TABLEAUX DE BORD'))
+        self.stdout.write(self.style.SUCCESS('=' * 70 + '\n'))
+
+        stats = cache_tableaux.statistiques()
+        self.stdout.write(f"{'Fragment':<28}{'Succès':>10}{'Échecs':>10}{'Taux':>10}")
+        for ligne in stats:
+            self.stdout.write(
+                f"{ligne['fragment']:<28}{ligne['hits']:>10}{ligne['misses']:>10}{ligne['ratio']:>9}%"
+            )
+
+        hits = sum(ligne['hits'] for ligne in stats)
+        total = hits + sum(ligne['misses'] for ligne in stats)
+        ratio = round(hits / total * 100, 1) if total else 0
+        self.stdout.write(f'\n📊 Global: {hits}/{total} lecture(s) servie(s) depuis le cache ({ratio}%)')
+
+        if options['reset']:
+            cache_tableaux.reinitialiser_statistiques()
+            self.stdout.write(self.style.SUCCESS('✅ Statistiques remises à zéro'))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Utilisateur import compteurs
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruire les compteurs statistiques des tableaux de bord à partir '
+        'des données (tâche nocturne), ou vérifier leur cohérence avec --check'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Comparer les compteurs aux valeurs réelles sans les modifier',
+        )
+        parser.add_argument(
+            '--domaine',
+            action='append',
+            choices=sorted(compteurs.DOMAINES),
+            help='Limiter à un domaine (option répétable)',
+        )
+
+    def handle(self, *args, **options):
+        domaines = options['domaine'] or list(compteurs.DOMAINES)
+
+        self.stdout.write(self.style.SUCCESS('\n' + '=' * 70))
+        self.stdout.write(self.style.SUCCESS('    COMPTEURS STATISTIQUES'))
+        self.stdout.write(self.style.SUCCESS('=' * 70 + '\n'))
+
+        if not options['check']:
+            for domaine, nombre in compteurs.reconstruire(domaines).items():
+                self.stdout.write(f'🔄 {domaine}: {nombre} compteur(s) reconstruit(s)')
+            self.stdout.write(self.style.SUCCESS('\n✅ Compteurs reconstruits'))
+            return
+
+        ecarts = compteurs.verifier(domaines)
+        if not ecarts:
+            self.stdout.write(self.style.SUCCESS('✅ Compteurs cohérents avec les données'))
+            return
+
+        for domaine, cle, enregistre, reel in ecarts:
+            self.stdout.write(
+                self.style.WARNING(f'⚠️  {domaine} / {cle}: compteur {enregistre} → réel {reel}')
+            )
+        self.stdout.write('ℹ️  Relancez sans --check pour reconstruire')
+        raise CommandError(f'{len(ecarts)} compteur(s) en écart')
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:08
+
+from django.db import migrations, models
+
+
+def initialiser_compteurs(apps, schema_editor):
+    """Calcule les compteurs à partir des données existantes"""
+    from Utilisateur.compteurs import reconstruire
+
+    reconstruire(registre=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Gestion', '0007_maquette_nombre_modules'),
+        ('Utilisateur', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompteurStatistique',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('domaine', models.CharField(max_length=50, verbose_name='Domaine')),
+                ('cle', models.CharField(max_length=150, verbose_name='Clé')),
+                ('valeur', models.BigIntegerField(default=0, verbose_name='Valeur')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Dernière modification')),
+            ],
+            options={
+                'verbose_name': 'Compteur statistique',
+                'verbose_name_plural': 'Compteurs statistiques',
+                'ordering': ['domaine', 'cle'],
+                'constraints': [models.UniqueConstraint(fields=('domaine', 'cle'), name='compteur_domaine_cle_unique')],
+            },
+        ),
+        migrations.RunPython(initialiser_compteurs, migrations.RunPython.noop),
+    ]
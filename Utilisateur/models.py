@@ -16,6 +16,10 @@ import uuid
 import os
 import logging
 
+from django.db.models import Q
+
+from .aggregations import compter_si
+
 logger = logging.getLogger(__name__)
 
 # ==========================================
@@ -907,18 +911,44 @@ class Comptable(models.Model):
     @classmethod
     def statistiques(cls):
         """Retourne des statistiques sur les comptables"""
-        queryset = cls.objects.all()
-        
-        return {
-            'total': queryset.count(),
-            'actifs': queryset.filter(is_active=True).count(),
-            'inactifs': queryset.filter(is_active=False).count(),
-            'pleinement_actifs': queryset.filter(is_active=True, user__is_active=True).count(),
-            'avec_email': queryset.exclude(user__email='').count(),
-            'connectes_recemment': queryset.filter(
+        return compter_si(
+            cls.objects.all(),
+            actifs=Q(is_active=True),
+            inactifs=Q(is_active=False),
+            pleinement_actifs=Q(is_active=True, user__is_active=True),
+            avec_email=~Q(user__email=''),
+            connectes_recemment=Q(
                 user__last_login__gte=timezone.now() - timezone.timedelta(days=30)
-            ).count()
-        }
+            ),
+        )
+
+# ==========================================
+# COMPTEURS STATISTIQUES
+# ==========================================
+
+class CompteurStatistique(models.Model):
+    """
+    Compteur global lu par les tableaux de bord (voir Utilisateur.compteurs)
+
+    Un compteur est identifié par son domaine (utilisateurs, professeurs,
+    contrats...) et sa clé (total, role:ADMIN, status:PAID, jour:2025-01-31...).
+    """
+    domaine = models.CharField(max_length=50, verbose_name="Domaine")
+    cle = models.CharField(max_length=150, verbose_name="Clé")
+    valeur = models.BigIntegerField(default=0, verbose_name="Valeur")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Dernière modification")
+
+    class Meta:
+        verbose_name = "Compteur statistique"
+        verbose_name_plural = "Compteurs statistiques"
+        ordering = ['domaine', 'cle']
+        constraints = [
+            models.UniqueConstraint(fields=['domaine', 'cle'], name='compteur_domaine_cle_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.domaine} / {self.cle} = {self.valeur}"
+
 
 # ==========================================
 # SIGNAUX
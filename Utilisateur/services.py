@@ -3,6 +3,7 @@ from django.utils import timezone
 from dateutil import parser as date_parser
 from .models import Section
 from Gestion.models import Classe, Maquette, Groupe
+from Gestion.services import MaquetteViewModelService
 from .api_client import MyIIPEAAPIClient
 import logging
 
@@ -281,6 +282,9 @@ class SyncService:
                 else:
                     self._sync_maquette_ues(maquette, force=force)
                 
+                # Précalculer le view-model des pages maquette
+                MaquetteViewModelService.warm(maquette)
+                
             except Exception as e:
                 error_msg = f"Erreur maquette {external_id}: {str(e)}"
                 logger.error(f"❌ {error_msg}")
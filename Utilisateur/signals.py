@@ -4,7 +4,8 @@ Signaux Django pour le système de gestion IIPEA
 CORRECTION : Éviter les contraintes de clés étrangères et les boucles infinies
 """
 
-from django.db.models.signals import post_save, pre_delete, pre_save
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.apps import apps
 from django.dispatch import receiver
 from django.core.mail import send_mail
 from django.conf import settings
@@ -12,6 +13,7 @@ from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.core.exceptions import ValidationError
 from .models import Professeur, CustomUser, Comptable
+from . import cache_tableaux, compteurs
 import logging
 
 logger = logging.getLogger(__name__)
@@ -193,8 +195,8 @@ def sync_user_with_profiles(sender, instance, created, update_fields=None, **kwa
             # Si l'utilisateur est désactivé, désactiver aussi le comptable
             if not instance.is_active and comptable.is_active:
                 # Utiliser update_fields pour éviter les boucles
-                Comptable.objects.filter(pk=comptable.pk).update(
-                    is_active=False
+                compteurs.mettre_a_jour(
+                    Comptable.objects.filter(pk=comptable.pk), is_active=False
                 )
                 logger.info(
                     f"Comptable {comptable.matricule} désactivé "
@@ -208,8 +210,8 @@ def sync_user_with_profiles(sender, instance, created, update_fields=None, **kwa
             # Si l'utilisateur est désactivé, désactiver aussi le professeur
             if not instance.is_active and professeur.is_active:
                 # Utiliser update_fields pour éviter les boucles
-                Professeur.objects.filter(pk=professeur.pk).update(
-                    is_active=False
+                compteurs.mettre_a_jour(
+                    Professeur.objects.filter(pk=professeur.pk), is_active=False
                 )
                 logger.info(
                     f"Professeur {professeur.matricule} désactivé "
@@ -378,6 +380,85 @@ def validate_professeur_user(sender, instance, **kwargs):
         
         logger.info(f"Validation professeur OK pour {instance.user.email}")
 
+# ==========================================
+# SIGNAUX COMPTEURS STATISTIQUES
+# ==========================================
+
+def compteurs_memoriser(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Mémorise les champs suivis tels qu'enregistrés avant modification
+    """
+    instance._compteurs_avant = None
+    if raw or instance._state.adding or not instance.pk:
+        return
+
+    champs = compteurs.champs_du_modele(sender)
+    if update_fields is not None and not set(update_fields) & set(champs):
+        # Aucun champ suivi modifié
+        instance._compteurs_avant = False
+        return
+
+    instance._compteurs_avant = sender._default_manager.filter(
+        pk=instance.pk
+    ).values(*champs).first()
+
+
+def compteurs_enregistrer(sender, instance, created, raw=False, **kwargs):
+    """
+    Applique aux compteurs la différence avant / après enregistrement
+    """
+    if raw:
+        return
+
+    avant = getattr(instance, '_compteurs_avant', None)
+    instance._compteurs_avant = None
+    if avant is False:
+        return
+
+    compteurs.enregistrer(sender, avant=[avant] if avant else [], apres=[instance])
+
+
+def compteurs_supprimer(sender, instance, **kwargs):
+    """
+    Retire des compteurs une ligne supprimée
+    """
+    compteurs.enregistrer(sender, avant=[instance])
+
+
+for _modele in compteurs.modeles_suivis():
+    _label = _modele._meta.label
+    pre_save.connect(compteurs_memoriser, sender=_modele, dispatch_uid=f'compteurs_memoriser_{_label}')
+    post_save.connect(compteurs_enregistrer, sender=_modele, dispatch_uid=f'compteurs_enregistrer_{_label}')
+    post_delete.connect(compteurs_supprimer, sender=_modele, dispatch_uid=f'compteurs_supprimer_{_label}')
+
+
+# ==========================================
+# SIGNAUX CACHE DES TABLEAUX DE BORD
+# ==========================================
+
+# Champs dont l'enregistrement seul n'invalide aucun fragment : last_login
+# est écrit à chaque connexion (update_last_login) et les widgets qui
+# l'affichent ont leur propre durée courte
+CHAMPS_SANS_INVALIDATION = {'last_login'}
+
+
+def tableaux_invalider(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Invalide les fragments de tableaux de bord dépendant de l'instance
+    """
+    if raw:
+        return
+    if update_fields is not None and set(update_fields) <= CHAMPS_SANS_INVALIDATION:
+        return
+    cache_tableaux.invalider_modele(sender, [instance])
+
+
+for _label in cache_tableaux.TAGS_PAR_MODELE:
+    _modele = apps.get_model(_label)
+    post_save.connect(tableaux_invalider, sender=_modele, dispatch_uid=f'tableaux_save_{_label}')
+    post_delete.connect(tableaux_invalider, sender=_modele, dispatch_uid=f'tableaux_delete_{_label}')
+
+
 # ==========================================
 # UTILITAIRES
 # ==========================================
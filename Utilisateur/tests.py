@@ -1,3 +1,257 @@
-from django.test import TestCase
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from Gestion.models import Classe, Contrat, Maquette, ModulePropose, PreContrat
+from Gestion.services import ContratGenerationService
+
+from . import cache_tableaux, compteurs, widgets
+from .aggregations import compter_par, compter_si
+from .models import Comptable, CustomUser, GradesProfesseurs, Professeur, Section
+
+
+# Création des comptes sans le coût du hachage PBKDF2
+HASHERS_RAPIDES = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+class DonneesUtilisateursMixin:
+    """Sections, responsable pédagogique et quelques comptes de chaque type"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.section = Section.objects.create(nom='Section Test')
+        cls.resp_peda = CustomUser.objects.create_user(
+            'peda@example.com', role='RESP_PEDA', first_name='Resp', last_name='Peda',
+            section_principale=cls.section
+        )
+        cls.resp_peda.sections_autorisees.add(cls.section)
+        cls.numero = 0
+        cls.ajouter_comptes(2)
+
+    @classmethod
+    def ajouter_comptes(cls, nombre):
+        """`nombre` professeurs (dans la section) et comptables de plus"""
+        for _ in range(nombre):
+            cls.numero += 1
+            user = CustomUser.objects.create_user(
+                f'prof{cls.numero}@example.com', role='PROFESSEUR',
+                first_name='Prof', last_name=str(cls.numero)
+            )
+            professeur = Professeur.objects.create(
+                user=user, date_naissance=date(1980, 1, 1), annee_experience=cls.numero,
+                grade=GradesProfesseurs.choices[cls.numero % len(GradesProfesseurs.choices)][0],
+            )
+            professeur.sections.add(cls.section)
+
+            user = CustomUser.objects.create_user(
+                f'compta{cls.numero}@example.com', role='COMPTABLE',
+                first_name='Compta', last_name=str(cls.numero)
+            )
+            Comptable.objects.create(
+                user=user, date_naissance=date(1985, 1, 1), is_active=cls.numero % 2 == 0
+            )
+
+    def nombre_requetes(self, fonction):
+        with CaptureQueriesContext(connection) as requetes:
+            fonction()
+        return len(requetes)
+
+
+@override_settings(PASSWORD_HASHERS=HASHERS_RAPIDES)
+class AggregationsTests(DonneesUtilisateursMixin, TestCase):
+
+    def test_compter_par_une_requete(self):
+        with self.assertNumQueries(1):
+            stats = compter_par(CustomUser.objects.all(), 'role', choix=CustomUser.ROLE_CHOICES)
+
+        self.assertEqual(stats['PROFESSEUR'], 2)
+        self.assertEqual(stats['COMPTABLE'], 2)
+        self.assertEqual(stats['ADMIN'], 0)
+        self.assertEqual(stats['total'], 5)
+
+    def test_compter_si_une_requete(self):
+        with self.assertNumQueries(1):
+            stats = compter_si(
+                Comptable.objects.all(),
+                actifs=Q(is_active=True),
+                inactifs={'is_active': False},
+            )
+
+        self.assertEqual(stats, {'actifs': 1, 'inactifs': 1, 'total': 2})
+
+
+@override_settings(PASSWORD_HASHERS=HASHERS_RAPIDES)
+class ComptableStatistiquesTests(DonneesUtilisateursMixin, TestCase):
+
+    def test_une_requete_quel_que_soit_le_nombre(self):
+        with self.assertNumQueries(1):
+            Comptable.statistiques()
+
+        self.ajouter_comptes(10)
+        with self.assertNumQueries(1):
+            stats = Comptable.statistiques()
+
+        self.assertEqual(stats['total'], 12)
+        self.assertEqual(stats['actifs'] + stats['inactifs'], 12)
+        self.assertEqual(stats['avec_email'], 12)
+
+
+@override_settings(PASSWORD_HASHERS=HASHERS_RAPIDES)
+class TableauxDeBordTests(DonneesUtilisateursMixin, TestCase):
+    """Le nombre de requêtes des widgets et des statistiques ne dépend pas du volume"""
+
+    def test_widgets_budget_constant(self):
+        budgets = {
+            (tableau, nom): self.nombre_requetes(lambda: widget.construire(self.resp_peda))
+            for tableau, definition in widgets.TABLEAUX.items()
+            for nom, widget in definition.widgets.items()
+        }
+
+        self.ajouter_comptes(10)
+
+        for (tableau, nom), budget in budgets.items():
+            widget = widgets.TABLEAUX[tableau].widgets[nom]
+            with self.subTest(widget=f'{tableau}.{nom}'), self.assertNumQueries(budget):
+                widget.construire(self.resp_peda)
+
+    def test_statistiques_budget_constant(self):
+        self.client.force_login(self.resp_peda)
+        url = reverse('statistiques')
+        budget = self.nombre_requetes(lambda: self.client.get(url))
+
+        self.ajouter_comptes(10)
+
+        with self.assertNumQueries(budget):
+            reponse = self.client.get(url)
+        self.assertEqual(reponse.status_code, 200)
+
+    def test_erreur_de_widget_sans_detail(self):
+        cache.clear()
+        self.client.force_login(self.resp_peda)
+
+        def echec(user):
+            raise RuntimeError('détail interne')
+
+        with mock.patch.dict(
+            widgets.TABLEAUX['resp_peda'].widgets,
+            {'compteurs': widgets.Widget(echec, 60, False)}
+        ):
+            reponse = self.client.get(reverse('dashboard_widget', args=['resp_peda', 'compteurs']))
+
+        self.assertEqual(reponse.status_code, 500)
+        self.assertNotIn('détail interne', reponse.json()['error'])
+
+
+@override_settings(PASSWORD_HASHERS=HASHERS_RAPIDES)
+class CompteursTests(DonneesUtilisateursMixin, TestCase):
+    """Les compteurs suivent save(), les UPDATE en masse et les suppressions"""
+
+    def creer_contrats(self, nombre):
+        classe = Classe.objects.create(
+            external_id=1, nom='L1 Info', niveau='L1', filiere='INFO', section=self.section
+        )
+        Maquette.objects.create(
+            external_id=1, classe=classe, filiere_id=1, niveau_id=1, anneeacademique_id=1,
+            unites_enseignement=[{'libelle': 'UE 1', 'matieres': [
+                {'id': numero, 'nom': f'Module {numero}'} for numero in range(1, nombre + 1)
+            ]}],
+            is_active=True,
+        )
+        precontrat = PreContrat.objects.create(
+            professeur=Professeur.objects.first().user, classe=classe, cree_par=self.resp_peda
+        )
+        ModulePropose.objects.bulk_create([
+            ModulePropose(
+                pre_contrat=precontrat, code_module=str(numero), nom_module=f'Module {numero}',
+                volume_heure_cours=20, volume_heure_td=10,
+                taux_horaire_cours=5000, taux_horaire_td=5000,
+            )
+            for numero in range(1, nombre + 1)
+        ])
+        return ContratGenerationService.generer_contrats(precontrat, self.resp_peda)['contrats']
+
+    def test_compteurs_coherents_apres_ecritures(self):
+        self.assertEqual(compteurs.verifier(), [])
+
+        # save() : deltas des signaux pre_save / post_save
+        professeur = Professeur.objects.first()
+        professeur.grade = GradesProfesseurs.choices[-1][0]
+        professeur.annee_experience += 5
+        professeur.save()
+        self.resp_peda.is_active = False
+        self.resp_peda.save()
+
+        # UPDATE en masse
+        compteurs.mettre_a_jour(Comptable.objects.all(), is_active=False)
+
+        # Transition en masse des contrats
+        contrats = self.creer_contrats(3)
+        compteurs.mettre_a_jour(
+            Contrat.objects.filter(pk__in=[contrat.pk for contrat in contrats[:2]]),
+            status='IN_PROGRESS'
+        )
+        resultats = Contrat.objects.all().terminer(self.resp_peda)
+        self.assertEqual(sum(resultat['succes'] for resultat in resultats.values()), 2)
+
+        # Suppression en cascade : utilisateur -> comptable
+        CustomUser.objects.filter(role='COMPTABLE').delete()
+
+        self.assertEqual(compteurs.verifier(), [])
+        lus = compteurs.lire('comptables', 'contrats')
+        self.assertEqual(lus['comptables']['total'], 0)
+        self.assertEqual(lus['contrats']['status:PENDING_DOCUMENTS'], 2)
+
+
+class CacheTableauxTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_versions_partagees_en_base(self):
+        self.assertEqual(
+            cache_tableaux.versions(['contrats', 'paiements']), {'contrats': 0, 'paiements': 0}
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cache_tableaux.invalider('contrats')
+        # Cache local vide (autre processus) : la version vient de la base
+        cache.clear()
+
+        with self.assertNumQueries(1):
+            versions = cache_tableaux.versions(['contrats', 'paiements'])
+        self.assertEqual(versions, {'contrats': 1, 'paiements': 0})
+
+    def test_fragment_reconstruit_apres_invalidation(self):
+        appels = []
+
+        def construire():
+            appels.append(1)
+            return {'valeur': len(appels)}
+
+        self.assertEqual(cache_tableaux.fragment('gestion_financier', construire), {'valeur': 1})
+        self.assertEqual(cache_tableaux.fragment('gestion_financier', construire), {'valeur': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cache_tableaux.invalider('paiements')
+
+        self.assertEqual(cache_tableaux.fragment('gestion_financier', construire), {'valeur': 2})
+
+    @override_settings(PASSWORD_HASHERS=HASHERS_RAPIDES)
+    def test_connexion_n_invalide_pas_les_utilisateurs(self):
+        user = CustomUser.objects.create_user('info@example.com', password='secret')
+        version = cache_tableaux.versions(['utilisateurs'])['utilisateurs']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.login(email='info@example.com', password='secret')
+        self.assertEqual(cache_tableaux.versions(['utilisateurs'])['utilisateurs'], version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.first_name = 'Info'
+            user.save()
+        self.assertEqual(cache_tableaux.versions(['utilisateurs'])['utilisateurs'], version + 1)
@@ -18,6 +18,7 @@ urlpatterns = [
     path('dashboard/comptable/', views.ComptableDashboardView.as_view(), name='dashboard_comptable'),
     path('dashboard/service-data/', views.ServiceDataDashboardView.as_view(), name='dashboard_service_data'),
     path('dashboard/default/', views.DefaultDashboardView.as_view(), name='dashboard_default'),
+    path('dashboard/widgets/<str:tableau>/<str:widget>/', views.dashboard_widget, name='dashboard_widget'),
 
     # ========================================
     # PROFIL UTILISATEUR
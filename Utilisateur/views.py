@@ -7,24 +7,28 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib import messages
 from django.urls import reverse_lazy, reverse
-from django.db.models import Q, Count, Avg, Sum  # ← AJOUTEZ Sum ici
-from django.http import JsonResponse, FileResponse, Http404
+from django.db.models import Q, Count, Sum
+from django.http import JsonResponse, FileResponse, Http404, StreamingHttpResponse
 from django.db import transaction
 from django.contrib.auth import authenticate, login, logout, update_session_auth_hash
 from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.debug import sensitive_post_parameters
+from django.views.decorators.http import require_GET
 from django.utils import timezone
 from datetime import timedelta
+import time
 
 from django.core.exceptions import ValidationError
 
 from .models import (
-    Section, CustomUser, Professeur, Comptable, 
+    Section, CustomUser, Professeur, Comptable, StatusProfesseurs,
 )
 from Gestion.models import (
     Classe, Maquette 
 )
+from Gestion.services import MaquetteViewModelService
+from . import cache_tableaux, compteurs, exports, widgets
 from .forms import (
     LoginForm, SectionForm, CustomUserCreationWithDocumentsForm,
     ProfesseurForm, ProfesseurUpdateForm, ComptableForm,
@@ -197,129 +201,27 @@ class DashboardRedirectView(LoginRequiredMixin, View):
 
 
 class AdminDashboardView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
-    """Dashboard pour les administrateurs"""
+    """Dashboard pour les administrateurs (coquille : statistiques chargées par les widgets)"""
     template_name = 'dashboards/admin.html'
     
     def test_func(self):
         return self.request.user.role == 'ADMIN'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        context['stats'] = {
-            'total_sections': Section.objects.filter(is_active=True).count(),
-            'total_professeurs': Professeur.objects.filter(is_active=True).count(),
-            'total_comptables': Comptable.objects.filter(is_active=True).count(),
-            'total_utilisateurs': CustomUser.objects.filter(is_active=True).count(),
-            'sections_inactives': Section.objects.filter(is_active=False).count(),
-            'professeurs_inactifs': Professeur.objects.filter(is_active=False).count(),
-        }
-        
-        context['stats_roles'] = list(CustomUser.objects.values('role').annotate(
-            total=Count('id'),
-            actifs=Count('id', filter=Q(is_active=True, is_active_user=True))
-        ).order_by('-total'))
-        
-        date_limite = timezone.now() - timedelta(days=30)
-        context['activites_recentes'] = {
-            'nouveaux_professeurs': Professeur.objects.filter(created_at__gte=date_limite).count(),
-            'nouveaux_utilisateurs': CustomUser.objects.filter(created_at__gte=date_limite).count(),
-        }
-        
-        context['derniers_utilisateurs'] = CustomUser.objects.select_related(
-            'section_principale'
-        ).order_by('-created_at')[:5]
-        
-        context['derniers_professeurs'] = Professeur.objects.select_related(
-            'user'
-        ).order_by('-created_at')[:5]
-        
-        context['top_sections'] = Section.objects.filter(
-            is_active=True
-        ).annotate(
-            nb_professeurs=Count('professeurs')
-        ).order_by('-nb_professeurs')[:5]
-        
-        context['alertes'] = {
-            'utilisateurs_inactifs': CustomUser.objects.filter(
-                is_active_user=False
-            ).count(),
-        }
-        
-        return context
 
 
 class RespPedaDashboardView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
-    """Dashboard pour les responsables pédagogiques"""
+    """Dashboard pour les responsables pédagogiques (coquille : statistiques chargées par les widgets)"""
     template_name = 'dashboards/respo.html'
     
     def test_func(self):
         return self.request.user.role == 'RESP_PEDA'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        user = self.request.user
-        
-        sections_accessibles = user.get_sections_disponibles()
-        context['sections_disponibles'] = sections_accessibles
-        
-        context['stats_professeurs'] = {
-            'total': Professeur.objects.filter(
-                sections__in=sections_accessibles
-            ).distinct().count(),
-            'actifs': Professeur.objects.filter(
-                sections__in=sections_accessibles,
-                is_active=True
-            ).distinct().count(),
-            'par_grade': Professeur.objects.filter(
-                sections__in=sections_accessibles
-            ).values('grade').annotate(count=Count('id')),
-            'par_statut': Professeur.objects.filter(
-                sections__in=sections_accessibles
-            ).values('statut').annotate(count=Count('id')),
-        }
-        
-        context['professeurs_recents'] = Professeur.objects.filter(
-            sections__in=sections_accessibles
-        ).select_related('user').order_by('-created_at')[:10]
-        
-        return context
 
 
 class RespRHDashboardView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
-    """Dashboard pour les responsables RH"""
+    """Dashboard pour les responsables RH (coquille : statistiques chargées par les widgets)"""
     template_name = 'dashboards/rh.html'
     
     def test_func(self):
         return self.request.user.role == 'RESP_RH'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        context['stats'] = {
-            'total_professeurs': Professeur.objects.count(),
-            'professeurs_actifs': Professeur.objects.filter(is_active=True).count(),
-            'total_comptables': Comptable.objects.count(),
-            'comptables_actifs': Comptable.objects.filter(is_active=True).count(),
-        }
-        
-        context['stats_statut'] = {
-            'titulaires': Professeur.objects.filter(statut='Titulaire').count(),
-            'vacataires': Professeur.objects.filter(statut='Vacataire').count(),
-        }
-        
-        date_limite = timezone.now() - timedelta(days=30)
-        context['nouveaux_recrutements'] = {
-            'professeurs': Professeur.objects.filter(created_at__gte=date_limite),
-            'comptables': Comptable.objects.filter(created_at__gte=date_limite),
-        }
-        
-        avg_experience = Professeur.objects.filter(
-            is_active=True
-        ).aggregate(Avg('annee_experience'))
-        context['experience_moyenne'] = avg_experience['annee_experience__avg'] or 0
-        
-        return context
 
 
 class ProfesseurDashboardView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
@@ -407,11 +309,6 @@ class ComptableDashboardView(LoginRequiredMixin, UserPassesTestMixin, TemplateVi
             context['profile'] = None
             context['profile_complet'] = False
             
-            context['stats_accessibles'] = {
-                'total_professeurs': Professeur.objects.filter(is_active=True).count(),
-                'total_sections': Section.objects.filter(is_active=True).count(),
-            }
-            
             context['notifications'] = []
             if not context.get('profile_complet', False):
                 context['notifications'].append({
@@ -430,86 +327,19 @@ class ComptableDashboardView(LoginRequiredMixin, UserPassesTestMixin, TemplateVi
 
 
 class InformaticienDashboardView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
-    """Dashboard pour le service informatique"""
+    """Dashboard pour le service informatique (coquille : statistiques chargées par les widgets)"""
     template_name = 'dashboards/informaticien.html'
     
     def test_func(self):
         return self.request.user.role == 'INFORMATICIEN'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        context['stats_systeme'] = {
-            'total_utilisateurs': CustomUser.objects.count(),
-            'utilisateurs_actifs': CustomUser.objects.filter(
-                is_active=True, is_active_user=True
-            ).count(),
-            'utilisateurs_inactifs': CustomUser.objects.filter(
-                Q(is_active=False) | Q(is_active_user=False)
-            ).count(),
-        }
-        
-        date_limite = timezone.now() - timedelta(days=7)
-        context['activite_recente'] = {
-            'connexions': CustomUser.objects.filter(
-                last_login__gte=date_limite
-            ).count(),
-            'nouveaux_comptes': CustomUser.objects.filter(
-                created_at__gte=date_limite
-            ).count(),
-        }
-        
-        context['utilisateurs_par_role'] = list(CustomUser.objects.values(
-            'role'
-        ).annotate(count=Count('id')).order_by('-count'))
-        
-        context['dernieres_connexions'] = CustomUser.objects.filter(
-            last_login__isnull=False
-        ).order_by('-last_login')[:10]
-        
-        return context
 
 
 class ServiceDataDashboardView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
-    """Dashboard pour le service data"""
+    """Dashboard pour le service data (coquille : statistiques chargées par les widgets)"""
     template_name = 'dashboards/data.html'
     
     def test_func(self):
         return self.request.user.role == 'SERVICE_DATA'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        context['stats_globales'] = {
-            'sections': {
-                'total': Section.objects.count(),
-                'actives': Section.objects.filter(is_active=True).count(),
-            },
-            'utilisateurs': {
-                'total': CustomUser.objects.count(),
-                'actifs': CustomUser.objects.filter(is_active=True).count(),
-                'par_role': list(CustomUser.objects.values('role').annotate(count=Count('id')))
-            },
-            'professeurs': {
-                'total': Professeur.objects.count(),
-                'actifs': Professeur.objects.filter(is_active=True).count(),
-                'par_grade': list(Professeur.objects.values('grade').annotate(count=Count('id'))),
-                'experience_moyenne': Professeur.objects.aggregate(Avg('annee_experience'))['annee_experience__avg']
-            },
-            'comptables': {
-                'total': Comptable.objects.count(),
-                'actifs': Comptable.objects.filter(is_active=True).count(),
-            }
-        }
-        
-        context['chart_data'] = {
-            'roles': list(CustomUser.objects.values('role').annotate(count=Count('id'))),
-            'sections': list(Section.objects.annotate(
-                nb_professeurs=Count('professeurs')
-            ).values('nom', 'nb_professeurs')),
-        }
-        
-        return context
 
 
 class DefaultDashboardView(LoginRequiredMixin, TemplateView):
@@ -531,6 +361,59 @@ class DefaultDashboardView(LoginRequiredMixin, TemplateView):
         return context
 
 
+# ==========================================
+# WIDGETS DES TABLEAUX DE BORD
+# ==========================================
+
+@login_required
+@require_GET
+def dashboard_widget(request, tableau, widget):
+    """
+    Données JSON d'un widget de tableau de bord, chargées en parallèle par
+    static/js/dashboards/widgets.js. Chaque widget a son propre cache et
+    sa durée ; l'en-tête Server-Timing détaille le temps serveur du widget.
+    """
+    debut = time.perf_counter()
+    try:
+        definition, widget_def = widgets.obtenir(tableau, widget)
+    except KeyError:
+        return JsonResponse({'success': False, 'error': 'Widget inconnu'}, status=404)
+    
+    if request.user.role != definition.role:
+        return JsonResponse({'success': False, 'error': 'Accès refusé'}, status=403)
+    
+    user = request.user
+    construit = []
+    
+    def construire():
+        construit.append(time.perf_counter())
+        return widget_def.construire(user)
+    
+    try:
+        data = cache_tableaux.fragment(
+            f'{tableau}.{widget}',
+            construire,
+            portee=user.pk if widget_def.par_utilisateur else 'global',
+            duree=widget_def.duree,
+        )
+    except Exception as e:
+        logger.error(f"❌ Widget {tableau}.{widget}: {str(e)}", exc_info=True)
+        return JsonResponse(
+            {'success': False, 'error': 'Erreur lors du chargement du widget'}, status=500
+        )
+    
+    fin = time.perf_counter()
+    timings = [f'widget;desc="{tableau}.{widget}";dur={(fin - debut) * 1000:.1f}']
+    if construit:
+        timings.append(f'build;dur={(fin - construit[0]) * 1000:.1f}')
+    timings.append(f'cache;desc="{"miss" if construit else "hit"}"')
+    
+    response = JsonResponse({'success': True, 'widget': f'{tableau}.{widget}', 'data': data})
+    response['Server-Timing'] = ', '.join(timings)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 # ==========================================
 # VUES SECTIONS
 # ==========================================
@@ -1189,7 +1072,7 @@ class ProfesseurDetailView(LoginRequiredMixin, DetailView):
         
         # Informations de base
         context['age'] = professeur.get_age()
-        context['sections'] = professeur.sections.all()
+        context['sections'] = list(professeur.sections.all())
         
         # Calcul de la complétude des documents
         documents = {
@@ -1216,7 +1099,7 @@ class ProfesseurDetailView(LoginRequiredMixin, DetailView):
         
         # Statistiques supplémentaires
         context['stats'] = {
-            'total_sections': professeur.sections.count(),
+            'total_sections': len(context['sections']),
             'documents_complets': professeur.has_complete_documents(),
             'anciennete_jours': (timezone.now().date() - professeur.created_at.date()).days if professeur.created_at else 0,
         }
@@ -1267,6 +1150,16 @@ class ProfesseurDetailView(LoginRequiredMixin, DetailView):
                 'pourcentage': min((professeur.annee_experience / 30) * 100, 100)  # Max 30 ans
             }
         
+        # Fiche mise en cache ({% cache %}) par version du professeur, de son
+        # compte et de ses sections ; les actions dépendant du rôle restent hors cache
+        context.update(cache_tableaux.contexte_fragment(
+            professeur.updated_at,
+            professeur.user.updated_at,
+            professeur.user.last_login,
+            context['age'],
+            [(section.pk, section.updated_at) for section in context['sections']],
+        ))
+        
         return context
 
 
@@ -1623,32 +1516,67 @@ def recherche_globale(request):
 
 @login_required
 def export_data(request):
-    """Export des données en JSON"""
+    """
+    Export des données : JSON (par défaut), CSV ou NDJSON en flux
+
+    Paramètres GET :
+        type: all, professeurs, comptables ou sections
+        format: json, csv (une seule table) ou ndjson
+        section: id de section, statut: statut des professeurs,
+        actif: 1 / 0, gzip: 1 pour compresser un export CSV / NDJSON
+    """
     if request.user.role not in ['ADMIN', 'SERVICE_DATA']:
         return JsonResponse({'error': 'Permission refusée'}, status=403)
     
     data_type = request.GET.get('type', 'all')
-    data = {}
-    
-    if data_type in ['all', 'professeurs']:
-        professeurs = Professeur.objects.select_related('user').values(
-            'matricule', 'user__first_name', 'user__last_name',
-            'grade', 'statut', 'is_active'
-        )
-        data['professeurs'] = list(professeurs)
+    format_export = request.GET.get('format', 'json')
+    try:
+        noms = exports.tables_demandees(data_type)
+    except KeyError:
+        return JsonResponse({'error': f'Type inconnu : {data_type}'}, status=400)
+    if format_export not in ('json', 'csv', 'ndjson'):
+        return JsonResponse({'error': f'Format inconnu : {format_export}'}, status=400)
+    if format_export == 'csv' and len(noms) > 1:
+        return JsonResponse({
+            'error': "L'export CSV porte sur une seule table (type=professeurs, comptables ou sections)"
+        }, status=400)
+    
+    statut = request.GET.get('statut') or None
+    if statut and statut not in StatusProfesseurs.values:
+        return JsonResponse({'error': f'Statut inconnu : {statut}'}, status=400)
+    section = request.GET.get('section') or None
+    if section and not section.isdigit():
+        return JsonResponse({'error': 'Section invalide'}, status=400)
+    actif = request.GET.get('actif')
+    filtres = {
+        'section': section,
+        'statut': statut,
+        'actif': actif in ('1', 'true') if actif in ('1', '0', 'true', 'false') else None,
+    }
     
-    if data_type in ['all', 'comptables']:
-        comptables = Comptable.objects.select_related('user').values(
-            'matricule', 'code_unique', 'user__first_name',
-            'user__last_name', 'is_active'
-        )
-        data['comptables'] = list(comptables)
+    if format_export == 'json':
+        data = {}
+        for nom in noms:
+            champs = exports.TABLES[nom].champs
+            data[nom] = [dict(zip(champs, ligne)) for ligne in exports.lignes(nom, filtres)]
+        return JsonResponse(data, safe=False)
     
-    if data_type in ['all', 'sections']:
-        sections = Section.objects.values('nom', 'adresse', 'is_active')
-        data['sections'] = list(sections)
+    if format_export == 'csv':
+        blocs = exports.flux_csv(noms[0], filtres)
+        content_type, extension = 'text/csv; charset=utf-8', 'csv'
+    else:
+        blocs = exports.flux_ndjson(noms, filtres)
+        content_type, extension = 'application/x-ndjson; charset=utf-8', 'ndjson'
     
-    return JsonResponse(data, safe=False)
+    filename = f"export_{data_type}_{timezone.now():%Y%m%d_%H%M}.{extension}"
+    if request.GET.get('gzip') == '1':
+        response = StreamingHttpResponse(exports.compresser(blocs), content_type='application/gzip')
+        filename += '.gz'
+    else:
+        response = StreamingHttpResponse(exports.encoder(blocs), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'no-store'
+    return response
 
 
 @login_required
@@ -1677,30 +1605,42 @@ class StatistiquesView(LoginRequiredMixin, RoleRequiredMixin, TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        date_limite = timezone.now() - timedelta(days=30)
+        
+        stats = compteurs.lire('sections', 'utilisateurs', 'professeurs')
+        utilisateurs, professeurs = stats['utilisateurs'], stats['professeurs']
         
         context['stats'] = {
             'sections': {
-                'total': Section.objects.count(),
-                'actives': Section.objects.filter(is_active=True).count()
+                'total': stats['sections']['total'],
+                'actives': stats['sections']['actives'],
             },
             'utilisateurs': {
-                'total': CustomUser.objects.count(),
-                'actifs': CustomUser.objects.filter(is_active=True, is_active_user=True).count(),
-                'par_role': list(CustomUser.objects.values('role').annotate(count=Count('id')))
+                'total': utilisateurs['total'],
+                'actifs': utilisateurs['comptes_actifs'],
+                'par_role': [
+                    {'role': role, 'count': nombre}
+                    for role, nombre in compteurs.par_prefixe(utilisateurs, 'role').items()
+                ]
             },
             'professeurs': {
-                'total': Professeur.objects.count(),
-                'actifs': Professeur.objects.filter(is_active=True).count(),
-                'par_grade': list(Professeur.objects.values('grade').annotate(count=Count('id'))),
-                'par_statut': list(Professeur.objects.values('statut').annotate(count=Count('id')))
+                'total': professeurs['total'],
+                'actifs': professeurs['actifs'],
+                'par_grade': [
+                    {'grade': grade, 'count': nombre}
+                    for grade, nombre in compteurs.par_prefixe(professeurs, 'grade').items()
+                ],
+                'par_statut': [
+                    {'statut': statut, 'count': nombre}
+                    for statut, nombre in compteurs.par_prefixe(professeurs, 'statut').items()
+                ]
             },
             'comptables': Comptable.statistiques(),
         }
         
-        date_limite = timezone.now() - timedelta(days=30)
         context['activites_recentes'] = {
-            'nouveaux_professeurs': Professeur.objects.filter(created_at__gte=date_limite).count(),
-            'nouveaux_utilisateurs': CustomUser.objects.filter(created_at__gte=date_limite).count(),
+            'nouveaux_professeurs': compteurs.crees_depuis(professeurs, date_limite),
+            'nouveaux_utilisateurs': compteurs.crees_depuis(utilisateurs, date_limite),
         }
         
         return context
@@ -2233,257 +2173,27 @@ class MaquetteDetailView(LoginRequiredMixin, DetailView):
                 is_active=True
             ).exclude(pk=maquette.pk).order_by('niveau_libelle')[:5]
             
-            # Récupérer les UEs depuis le champ JSON
-            unites_enseignement = maquette.unites_enseignement or []
-            context['total_ues'] = len(unites_enseignement)
-            context['unites_enseignement'] = unites_enseignement
-            
             # ========================================
-            # EXTRACTION DES UEs ET MATIÈRES
+            # VIEW-MODEL COMPILÉ (cache versionné)
             # ========================================
             
-            matieres_list = []
-            ues_list = []
-            semestres_set = set()
+            view_model = MaquetteViewModelService.get(maquette)
             
-            # Statistiques globales
-            total_coefficient = 0
-            total_volume_horaire = 0
-            total_volume_cm = 0
-            total_volume_td = 0
-            total_volume_tp = 0
-            total_cout_global = 0
+            for key in (
+                'unites_enseignement', 'total_ues', 'matieres', 'ues',
+                'matieres_par_semestre', 'ues_par_semestre', 'total_matieres',
+                'total_coefficient', 'total_volume_cm', 'total_volume_td',
+                'total_volume_tp', 'total_cout', 'semestres',
+                'stats_par_semestre', 'has_matieres', 'has_ues',
+            ):
+                context[key] = view_model[key]
             
-            # Parcourir chaque UE
-            for ue in unites_enseignement:
-                # ========================================
-                # EXTRACTION INFOS UE (format API réel)
-                # ========================================
-                ue_id = ue.get('id', '')
-                ue_libelle = ue.get('libelle', 'UE sans nom')
-                ue_code = ue.get('code', '')
-                
-                # CORRECTION: Gérer semestre_id au lieu de semestre
-                ue_semestre = ue.get('semestre')
-                if not ue_semestre:
-                    ue_semestre = ue.get('semestre_id')
-                
-                # Extraire le numéro du semestre_libelle si nécessaire
-                if not ue_semestre and ue.get('semestre_libelle'):
-                    semestre_libelle = ue.get('semestre_libelle', '')
-                    # Extraire "1" de "SEMESTRE 1"
-                    import re
-                    match = re.search(r'\d+', semestre_libelle)
-                    if match:
-                        ue_semestre = int(match.group())
-                
-                # Crédits
-                ue_credits = ue.get('credits', 0)
-                try:
-                    ue_credits = float(ue_credits) if ue_credits else 0
-                except (ValueError, TypeError):
-                    ue_credits = 0
-                
-                # Ajouter le semestre au set
-                if ue_semestre:
-                    semestres_set.add(ue_semestre)
-                
-                # ========================================
-                # EXTRACTION DES MATIÈRES (si présentes)
-                # ========================================
-                matieres = ue.get('matieres', [])
-                
-                # Ajouter l'UE à la liste
-                ues_list.append({
-                    'id': ue_id,
-                    'libelle': ue_libelle,
-                    'code': ue_code,
-                    'semestre': ue_semestre,
-                    'semestre_libelle': ue.get('semestre_libelle', ''),
-                    'credits': ue_credits,
-                    'nombre_matieres': len(matieres),
-                    'categorie': ue.get('categorie_nom', ''),
-                })
-                
-                # Si pas de matières, continuer
-                if not matieres:
-                    continue
-                
-                # ========================================
-                # TRAITEMENT DES MATIÈRES
-                # ========================================
-                for matiere in matieres:
-                    # Données de base
-                    nom = matiere.get('nom', 'Matière sans nom')
-                    code = matiere.get('code', '')
-                    description = matiere.get('description', '')
-                    
-                    # Coefficient
-                    coefficient = matiere.get('coefficient', 0)
-                    try:
-                        coefficient = float(coefficient) if coefficient else 0
-                    except (ValueError, TypeError):
-                        coefficient = 0
-                    total_coefficient += coefficient
-                    
-                    # Volumes horaires
-                    volume_cm = matiere.get('volume_horaire_cm', 0) or 0
-                    volume_td = matiere.get('volume_horaire_td', 0) or 0
-                    volume_tp = matiere.get('volume_horaire_tp', 0) or 0
-                    
-                    try:
-                        volume_cm = float(volume_cm) if volume_cm else 0
-                        volume_td = float(volume_td) if volume_td else 0
-                        volume_tp = float(volume_tp) if volume_tp else 0
-                    except (ValueError, TypeError):
-                        volume_cm = 0
-                        volume_td = 0
-                        volume_tp = 0
-                    
-                    volume_total = volume_cm + volume_td + volume_tp
-                    total_volume_horaire += volume_total
-                    total_volume_cm += volume_cm
-                    total_volume_td += volume_td
-                    total_volume_tp += volume_tp
-                    
-                    # Taux horaires
-                    taux_cm = matiere.get('taux_horaire_cm', 0) or 0
-                    taux_td = matiere.get('taux_horaire_td', 0) or 0
-                    taux_tp = matiere.get('taux_horaire_tp', 0) or 0
-                    
-                    try:
-                        taux_cm = float(taux_cm) if taux_cm else 0
-                        taux_td = float(taux_td) if taux_td else 0
-                        taux_tp = float(taux_tp) if taux_tp else 0
-                    except (ValueError, TypeError):
-                        taux_cm = 0
-                        taux_td = 0
-                        taux_tp = 0
-                    
-                    # Calculs des coûts
-                    cout_cm = volume_cm * taux_cm
-                    cout_td = volume_td * taux_td
-                    cout_tp = volume_tp * taux_tp
-                    cout_total = cout_cm + cout_td + cout_tp
-                    total_cout_global += cout_total
-                    
-                    # Déterminer le semestre
-                    semestre = matiere.get('semestre') or ue_semestre
-                    
-                    # Professeur
-                    professeur = matiere.get('professeur', {})
-                    professeur_nom = ''
-                    if professeur:
-                        if isinstance(professeur, dict):
-                            professeur_nom = professeur.get('nom', '')
-                        elif isinstance(professeur, str):
-                            professeur_nom = professeur
-                    
-                    # Ajouter la matière
-                    matieres_list.append({
-                        'id': matiere.get('id', ''),
-                        'nom': nom,
-                        'code': code,
-                        'description': description,
-                        'coefficient': coefficient,
-                        'ue_libelle': ue_libelle,
-                        'ue_code': ue_code,
-                        'ue_id': ue_id,
-                        'ue_credits': ue_credits,
-                        'semestre': semestre,
-                        'volume_cm': volume_cm,
-                        'taux_cm': taux_cm,
-                        'cout_cm': cout_cm,
-                        'volume_td': volume_td,
-                        'taux_td': taux_td,
-                        'cout_td': cout_td,
-                        'volume_tp': volume_tp,
-                        'taux_tp': taux_tp,
-                        'cout_tp': cout_tp,
-                        'volume_total': volume_total,
-                        'cout_total': cout_total,
-                        'professeur_nom': professeur_nom,
-                    })
-            
-            # ========================================
-            # TRI ET GROUPEMENT
-            # ========================================
-            
-            # Trier les matières
-            matieres_list.sort(key=lambda x: (x['semestre'] if x['semestre'] else 999, x['nom']))
-            
-            # Semestres uniques
-            semestres_uniques = sorted(list(semestres_set))
-            
-            # Groupement des matières par semestre
-            matieres_par_semestre = {}
-            for semestre in semestres_uniques:
-                matieres_par_semestre[semestre] = [
-                    m for m in matieres_list if m['semestre'] == semestre
-                ]
-            
-            # Groupement des UEs par semestre
-            ues_par_semestre = {}
-            for semestre in semestres_uniques:
-                ues_par_semestre[semestre] = [
-                    ue for ue in ues_list if ue['semestre'] == semestre
-                ]
-            
-            # ========================================
-            # STATISTIQUES PAR SEMESTRE
-            # ========================================
-            
-            stats_par_semestre = []
-            for sem in semestres_uniques:
-                matieres_sem = matieres_par_semestre.get(sem, [])
-                ues_sem = ues_par_semestre.get(sem, [])
-                
-                stats_par_semestre.append({
-                    'semestre': sem,
-                    'nombre_ues': len(ues_sem),
-                    'nombre_matieres': len(matieres_sem),
-                    'credits_total': sum(ue['credits'] for ue in ues_sem),
-                    'coefficient_total': sum(m['coefficient'] for m in matieres_sem),
-                    'volume_total': sum(m['volume_total'] for m in matieres_sem),
-                    'volume_cm': sum(m['volume_cm'] for m in matieres_sem),
-                    'volume_td': sum(m['volume_td'] for m in matieres_sem),
-                    'volume_tp': sum(m.get('volume_tp', 0) for m in matieres_sem),
-                    'cout_total': sum(m['cout_total'] for m in matieres_sem),
-                })
-            
-            # ========================================
-            # AJOUT AU CONTEXTE
-            # ========================================
+            context['total_volume_horaire'] = int(view_model['total_volume_horaire'])
             
-            context['matieres'] = matieres_list
-            context['ues'] = ues_list
-            context['matieres_par_semestre'] = matieres_par_semestre
-            context['ues_par_semestre'] = ues_par_semestre
-            context['total_matieres'] = len(matieres_list)
-            
-            # Statistiques globales
-            context['total_coefficient'] = total_coefficient
-            context['total_volume_horaire'] = int(total_volume_horaire)
-            context['total_volume_cm'] = total_volume_cm
-            context['total_volume_td'] = total_volume_td
-            context['total_volume_tp'] = total_volume_tp
-            context['total_cout'] = total_cout_global
-            
-            # Semestres
-            context['semestres'] = semestres_uniques
-            context['stats_par_semestre'] = stats_par_semestre
-            
-            # Flags
-            context['has_matieres'] = len(matieres_list) > 0
-            context['has_ues'] = len(ues_list) > 0
-            
-            # Log
-            logger.info(
-                f"Détail maquette {maquette.pk} chargé: "
-                f"{len(matieres_list)} matières, "
-                f"{len(ues_list)} UEs, "
-                f"{len(semestres_uniques)} semestres"
-            )
+            # Blocs {% cache %} du gabarit, clé liée à la version de la maquette
+            context.update(cache_tableaux.contexte_fragment(
+                MaquetteViewModelService.get_version(maquette)
+            ))
             
         except Exception as e:
             # Gestion des erreurs
@@ -2520,137 +2230,28 @@ def maquette_matieres_view(request, pk):
         # Récupérer la maquette
         maquette = get_object_or_404(Maquette, pk=pk)
         
-        # Récupérer les UEs depuis le champ JSON
-        unites_enseignement = maquette.unites_enseignement or []
-        
-        # Construction de la liste des matières avec informations complètes
-        matieres_list = []
-        
-        for ue in unites_enseignement:
-            ue_libelle = ue.get('libelle', 'UE sans nom')
-            ue_code = ue.get('code', '')
-            ue_id = ue.get('id', '')
-            ue_semestre = ue.get('semestre')
-            
-            matieres = ue.get('matieres', [])
-            
-            for matiere in matieres:
-                # Récupération des données
-                nom = matiere.get('nom', 'Matière sans nom')
-                code = matiere.get('code', '')
-                coefficient = matiere.get('coefficient', 0)
-                
-                # Volumes horaires
-                volume_cm = matiere.get('volume_horaire_cm', 0) or 0
-                volume_td = matiere.get('volume_horaire_td', 0) or 0
-                
-                # S'assurer que ce sont des nombres
-                try:
-                    volume_cm = float(volume_cm) if volume_cm else 0
-                    volume_td = float(volume_td) if volume_td else 0
-                    coefficient = float(coefficient) if coefficient else 0
-                except (ValueError, TypeError):
-                    volume_cm = 0
-                    volume_td = 0
-                    coefficient = 0
-                
-                volume_total = volume_cm + volume_td
-                
-                # Taux horaires
-                taux_cm = matiere.get('taux_horaire_cm', 0) or 0
-                taux_td = matiere.get('taux_horaire_td', 0) or 0
-                
-                try:
-                    taux_cm = float(taux_cm) if taux_cm else 0
-                    taux_td = float(taux_td) if taux_td else 0
-                except (ValueError, TypeError):
-                    taux_cm = 0
-                    taux_td = 0
-                
-                # Calcul du coût total
-                total_taux = (volume_cm * taux_cm) + (volume_td * taux_td)
-                
-                # Déterminer le semestre
-                semestre = matiere.get('semestre') or ue_semestre
-                
-                matieres_list.append({
-                    'id': matiere.get('id', ''),
-                    'nom': nom,
-                    'code': code,
-                    'description': matiere.get('description', ''),
-                    'coefficient': coefficient,
-                    'ue_libelle': ue_libelle,
-                    'ue_code': ue_code,
-                    'ue_id': ue_id,
-                    'semestre': semestre,
-                    'volume_horaire_cm': volume_cm,
-                    'taux_horaire_cm': taux_cm,
-                    'volume_horaire_td': volume_td,
-                    'taux_horaire_td': taux_td,
-                    'volume_horaire_total': volume_total,
-                    'total_taux_horaire': total_taux,
-                })
-        
-        # Trier par semestre puis par nom de matière
-        matieres_list.sort(key=lambda x: (x['semestre'] if x['semestre'] else 999, x['nom']))
-        
-        # Calcul des statistiques globales
-        total_coefficient = sum(m['coefficient'] for m in matieres_list)
-        total_volume_horaire = sum(m['volume_horaire_total'] for m in matieres_list)
-        total_volume_cm = sum(m['volume_horaire_cm'] for m in matieres_list)
-        total_volume_td = sum(m['volume_horaire_td'] for m in matieres_list)
-        total_cout = sum(m['total_taux_horaire'] for m in matieres_list)
-        
-        # Récupération des semestres uniques
-        semestres_uniques = sorted(list(set(
-            m['semestre'] for m in matieres_list if m['semestre']
-        )))
-        
-        # Groupement des matières par semestre
-        matieres_par_semestre = {}
-        for semestre in semestres_uniques:
-            matieres_par_semestre[semestre] = [
-                m for m in matieres_list if m['semestre'] == semestre
-            ]
-        
-        # Statistiques par semestre
-        stats_par_semestre = []
-        for sem in semestres_uniques:
-            matieres_sem = matieres_par_semestre[sem]
-            stats_par_semestre.append({
-                'semestre': sem,
-                'nombre_matieres': len(matieres_sem),
-                'coefficient_total': sum(m['coefficient'] for m in matieres_sem),
-                'volume_total': sum(m['volume_horaire_total'] for m in matieres_sem),
-                'volume_cm': sum(m['volume_horaire_cm'] for m in matieres_sem),
-                'volume_td': sum(m['volume_horaire_td'] for m in matieres_sem),
-                'cout_total': sum(m['total_taux_horaire'] for m in matieres_sem),
-            })
+        # View-model compilé partagé avec la page de détail
+        view_model = MaquetteViewModelService.get(maquette)
+        matieres_page = view_model['matieres_page']
         
         # Préparation du contexte
         context = {
             'maquette': maquette,
             'maquette_id': pk,
-            'matieres': matieres_list,
-            'matieres_par_semestre': matieres_par_semestre,
-            'total_ues': len(unites_enseignement),
-            'total_matieres': len(matieres_list),
-            'total_coefficient': total_coefficient,
-            'total_volume_horaire': total_volume_horaire,
-            'total_volume_cm': total_volume_cm,
-            'total_volume_td': total_volume_td,
-            'total_cout': total_cout,
-            'semestres': semestres_uniques,
-            'stats_par_semestre': stats_par_semestre,
-            'has_matieres': len(matieres_list) > 0,
+            'matieres': view_model['matieres'],
+            'matieres_par_semestre': matieres_page['matieres_par_semestre'],
+            'total_ues': view_model['total_ues'],
+            'total_matieres': view_model['total_matieres'],
+            'total_coefficient': view_model['total_coefficient'],
+            'total_volume_horaire': matieres_page['total_volume_horaire'],
+            'total_volume_cm': view_model['total_volume_cm'],
+            'total_volume_td': view_model['total_volume_td'],
+            'total_cout': matieres_page['total_cout'],
+            'semestres': matieres_page['semestres'],
+            'stats_par_semestre': matieres_page['stats_par_semestre'],
+            'has_matieres': view_model['has_matieres'],
         }
         
-        logger.info(
-            f"Matières chargées pour maquette {pk}: "
-            f"{len(matieres_list)} matières, "
-            f"{len(semestres_uniques)} semestres"
-        )
-        
         return render(request, 'maquettes/matieres.html', context)
         
     except Maquette.DoesNotExist:
@@ -2992,7 +2593,7 @@ def professeur_contrats(request, pk):
         contrats = contrats.filter(status=statut_filter)
     
     if annee_filter:
-        contrats = contrats.filter(date_validation__year=annee_filter)
+        contrats = contrats.filter(annee_academique=Contrat.normaliser_annee(annee_filter))
     
     # Statistiques détaillées
     stats_detail = {}
@@ -3013,7 +2614,9 @@ def professeur_contrats(request, pk):
     )
     
     # Années disponibles pour le filtre
-    annees = Contrat.objects.filter(professeur=professeur).dates('date_validation', 'year')
+    annees = Contrat.objects.filter(professeur=professeur).exclude(
+        annee_academique=''
+    ).values_list('annee_academique', flat=True).distinct().order_by('-annee_academique')
     
     context = {
         'professeur': professeur,
@@ -0,0 +1,313 @@
+"""
+Widgets des tableaux de bord
+
+Chaque tableau de bord est une page légère (coquille) dont les statistiques
+sont chargées en parallèle par static/js/dashboards/widgets.js depuis des
+endpoints JSON indépendants (`dashboard_widget`). Un widget déclare la
+fonction qui construit ses données (JSON sérialisables), sa durée de cache
+et s'il dépend de l'utilisateur connecté ; il est mis en cache sous
+`<tableau>.<widget>` dans cache_tableaux, avec ses propres tags.
+"""
+
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+
+from . import compteurs
+from .aggregations import compter_si
+from .models import Comptable, CustomUser, Professeur, Section, StatusProfesseurs
+
+Widget = namedtuple('Widget', ['construire', 'duree', 'par_utilisateur'])
+Tableau = namedtuple('Tableau', ['role', 'widgets'])
+
+
+def _date(valeur):
+    return valeur.isoformat() if valeur else None
+
+
+def _ligne_utilisateur(user):
+    return {
+        'libelle': user.get_full_name() or user.username,
+        'detail': user.get_role_display(),
+        'date': _date(user.created_at),
+    }
+
+
+def _ligne_professeur(professeur):
+    return {
+        'libelle': professeur.user.get_full_name(),
+        'detail': professeur.get_grade_display(),
+        'date': _date(professeur.created_at),
+    }
+
+
+# ==========================================
+# ADMINISTRATEUR
+# ==========================================
+
+def admin_compteurs(user):
+    date_limite = timezone.now() - timedelta(days=30)
+    stats = compteurs.lire('sections', 'professeurs', 'utilisateurs', 'comptables')
+    utilisateurs = stats['utilisateurs']
+
+    return {
+        'stats': {
+            'total_sections': stats['sections']['actives'],
+            'total_professeurs': stats['professeurs']['actifs'],
+            'total_comptables': stats['comptables']['actifs'],
+            'total_utilisateurs': utilisateurs['actifs'],
+            'sections_inactives': stats['sections']['inactives'],
+            'professeurs_inactifs': stats['professeurs']['inactifs'],
+        },
+        'activites_recentes': {
+            'nouveaux_professeurs': compteurs.crees_depuis(stats['professeurs'], date_limite),
+            'nouveaux_utilisateurs': compteurs.crees_depuis(utilisateurs, date_limite),
+        },
+        'alertes': {
+            'utilisateurs_inactifs': utilisateurs['comptes_desactives'],
+        },
+    }
+
+
+def admin_roles(user):
+    utilisateurs = compteurs.lire('utilisateurs')['utilisateurs']
+    actifs_par_role = compteurs.par_prefixe(utilisateurs, 'role_actifs')
+    return {
+        'stats_roles': sorted(
+            (
+                {'role': role, 'total': total, 'actifs': actifs_par_role.get(role, 0)}
+                for role, total in compteurs.par_prefixe(utilisateurs, 'role').items()
+            ),
+            key=lambda ligne: -ligne['total']
+        ),
+    }
+
+
+def admin_recents(user):
+    return {
+        'derniers_utilisateurs': [
+            _ligne_utilisateur(u) for u in CustomUser.objects.order_by('-created_at')[:5]
+        ],
+        'derniers_professeurs': [
+            _ligne_professeur(p)
+            for p in Professeur.objects.select_related('user').order_by('-created_at')[:5]
+        ],
+    }
+
+
+def admin_sections(user):
+    sections = Section.objects.filter(
+        is_active=True
+    ).annotate(
+        nb_professeurs=Count('professeurs')
+    ).order_by('-nb_professeurs')[:5]
+    return {
+        'top_sections': [
+            {'nom': section.get_nom_display(), 'nb_professeurs': section.nb_professeurs}
+            for section in sections
+        ],
+    }
+
+
+# ==========================================
+# RESPONSABLE PÉDAGOGIQUE (sections de l'utilisateur)
+# ==========================================
+
+def _professeurs_accessibles(user):
+    return Professeur.objects.filter(sections__in=user.get_sections_disponibles())
+
+
+def resp_peda_compteurs(user):
+    return {
+        'stats_professeurs': compter_si(
+            _professeurs_accessibles(user), distinct=True, actifs=Q(is_active=True)
+        ),
+    }
+
+
+def resp_peda_repartition(user):
+    professeurs = _professeurs_accessibles(user)
+    return {
+        'par_grade': list(professeurs.values('grade').annotate(count=Count('id', distinct=True))),
+        'par_statut': list(professeurs.values('statut').annotate(count=Count('id', distinct=True))),
+    }
+
+
+def resp_peda_recents(user):
+    professeurs = _professeurs_accessibles(user).distinct().select_related(
+        'user'
+    ).order_by('-created_at')[:10]
+    return {'professeurs_recents': [_ligne_professeur(p) for p in professeurs]}
+
+
+# ==========================================
+# RESPONSABLE RH
+# ==========================================
+
+def resp_rh_compteurs(user):
+    stats = compteurs.lire('professeurs', 'comptables')
+    professeurs, comptables = stats['professeurs'], stats['comptables']
+    return {
+        'stats': {
+            'total_professeurs': professeurs['total'],
+            'professeurs_actifs': professeurs['actifs'],
+            'total_comptables': comptables['total'],
+            'comptables_actifs': comptables['actifs'],
+        },
+        'stats_statut': {
+            'titulaires': professeurs[f'statut:{StatusProfesseurs.TITULAIRE}'],
+            'vacataires': professeurs[f'statut:{StatusProfesseurs.VACATAIRE}'],
+        },
+        'experience_moyenne': round(
+            professeurs['experience_actifs'] / professeurs['actifs'], 1
+        ) if professeurs['actifs'] else 0,
+    }
+
+
+def resp_rh_recrutements(user):
+    date_limite = timezone.now() - timedelta(days=30)
+    professeurs = Professeur.objects.filter(
+        created_at__gte=date_limite
+    ).select_related('user').order_by('-created_at')
+    comptables = Comptable.objects.filter(
+        created_at__gte=date_limite
+    ).select_related('user').order_by('-created_at')
+    return {
+        'professeurs': [_ligne_professeur(p) for p in professeurs],
+        'comptables': [
+            {'libelle': c.user.get_full_name(), 'detail': c.matricule, 'date': _date(c.created_at)}
+            for c in comptables
+        ],
+    }
+
+
+# ==========================================
+# COMPTABLE
+# ==========================================
+
+def comptable_compteurs(user):
+    stats = compteurs.lire('professeurs', 'sections')
+    return {
+        'total_professeurs': stats['professeurs']['actifs'],
+        'total_sections': stats['sections']['actives'],
+    }
+
+
+# ==========================================
+# SERVICE INFORMATIQUE
+# ==========================================
+
+def informaticien_compteurs(user):
+    date_limite = timezone.now() - timedelta(days=7)
+    utilisateurs = compter_si(
+        CustomUser.objects.all(),
+        actifs=Q(is_active=True, is_active_user=True),
+        inactifs=Q(is_active=False) | Q(is_active_user=False),
+        connexions=Q(last_login__gte=date_limite),
+        nouveaux=Q(created_at__gte=date_limite),
+    )
+    return {
+        'stats_systeme': {
+            'total_utilisateurs': utilisateurs['total'],
+            'utilisateurs_actifs': utilisateurs['actifs'],
+            'utilisateurs_inactifs': utilisateurs['inactifs'],
+        },
+        'activite_recente': {
+            'connexions': utilisateurs['connexions'],
+            'nouveaux_comptes': utilisateurs['nouveaux'],
+        },
+    }
+
+
+def informaticien_roles(user):
+    return {
+        'utilisateurs_par_role': list(CustomUser.objects.values(
+            'role'
+        ).annotate(count=Count('id')).order_by('-count')),
+    }
+
+
+def informaticien_connexions(user):
+    derniers = CustomUser.objects.filter(last_login__isnull=False).order_by('-last_login')[:10]
+    return {
+        'dernieres_connexions': [
+            {**_ligne_utilisateur(u), 'date': _date(u.last_login)} for u in derniers
+        ],
+    }
+
+
+# ==========================================
+# SERVICE DATA
+# ==========================================
+
+def service_data_compteurs(user):
+    professeurs = compter_si(
+        Professeur.objects.all(),
+        actifs=Q(is_active=True),
+        experience_moyenne=Avg('annee_experience'),
+    )
+    return {
+        'stats_globales': {
+            'sections': compter_si(Section.objects.all(), actives=Q(is_active=True)),
+            'utilisateurs': compter_si(CustomUser.objects.all(), actifs=Q(is_active=True)),
+            'professeurs': {
+                **professeurs,
+                'experience_moyenne': float(professeurs['experience_moyenne'] or 0),
+            },
+            'comptables': compter_si(Comptable.objects.all(), actifs=Q(is_active=True)),
+        },
+    }
+
+
+def service_data_graphiques(user):
+    return {
+        'roles': list(CustomUser.objects.values('role').annotate(count=Count('id'))),
+        'grades': list(Professeur.objects.values('grade').annotate(count=Count('id'))),
+        'sections': list(Section.objects.annotate(
+            nb_professeurs=Count('professeurs')
+        ).values('nom', 'nb_professeurs')),
+    }
+
+
+# ==========================================
+# REGISTRE
+# ==========================================
+
+# Durées de cache (secondes) : compteurs courts, répartitions plus longues
+TABLEAUX = {
+    'admin': Tableau('ADMIN', {
+        'compteurs': Widget(admin_compteurs, 60 * 5, False),
+        'roles': Widget(admin_roles, 60 * 15, False),
+        'recents': Widget(admin_recents, 60 * 2, False),
+        'sections': Widget(admin_sections, 60 * 15, False),
+    }),
+    'resp_peda': Tableau('RESP_PEDA', {
+        'compteurs': Widget(resp_peda_compteurs, 60 * 5, True),
+        'repartition': Widget(resp_peda_repartition, 60 * 15, True),
+        'recents': Widget(resp_peda_recents, 60 * 2, True),
+    }),
+    'resp_rh': Tableau('RESP_RH', {
+        'compteurs': Widget(resp_rh_compteurs, 60 * 5, False),
+        'recrutements': Widget(resp_rh_recrutements, 60 * 5, False),
+    }),
+    'comptable': Tableau('COMPTABLE', {
+        'compteurs': Widget(comptable_compteurs, 60 * 5, False),
+    }),
+    'informaticien': Tableau('INFORMATICIEN', {
+        'compteurs': Widget(informaticien_compteurs, 60, False),
+        'roles': Widget(informaticien_roles, 60 * 15, False),
+        'connexions': Widget(informaticien_connexions, 60, False),
+    }),
+    'service_data': Tableau('SERVICE_DATA', {
+        'compteurs': Widget(service_data_compteurs, 60 * 5, False),
+        'graphiques': Widget(service_data_graphiques, 60 * 15, False),
+    }),
+}
+
+
+def obtenir(tableau, widget):
+    """(Tableau, Widget) enregistrés, KeyError si inconnus"""
+    definition = TABLEAUX[tableau]
+    return definition, definition.widgets[widget]
@@ -0,0 +1,127 @@
+// Chargement progressif des widgets de tableau de bord
+//
+// Chaque conteneur [data-widget-url] est rempli par son propre endpoint JSON.
+// Les requêtes partent toutes en même temps : un widget lent ne retarde
+// pas l'affichage des autres.
+//
+//   <div data-widget-url="{% url 'dashboard_widget' 'admin' 'compteurs' %}">
+//       <span data-valeur="stats.total_utilisateurs">…</span>
+//       <div data-liste="derniers_utilisateurs">
+//           <template><div><span data-champ="libelle"></span></div></template>
+//       </div>
+//   </div>
+//
+// Un évènement `widget:charge` (detail = données) est émis après chaque
+// chargement pour les graphiques propres à une page.
+
+(function () {
+    'use strict';
+
+    function lireChemin(donnees, chemin) {
+        return chemin.split('.').reduce(function (valeur, cle) {
+            return valeur == null ? undefined : valeur[cle];
+        }, donnees);
+    }
+
+    function formater(valeur, format) {
+        if (valeur == null) {
+            return '-';
+        }
+        if (format === 'date') {
+            return new Date(valeur).toLocaleDateString('fr-FR');
+        }
+        if (format === 'datetime') {
+            return new Date(valeur).toLocaleString('fr-FR');
+        }
+        if (typeof valeur === 'number') {
+            return valeur.toLocaleString('fr-FR');
+        }
+        return String(valeur);
+    }
+
+    function elements(racine, selecteur) {
+        const trouves = Array.from(racine.querySelectorAll(selecteur));
+        if (racine.matches(selecteur)) {
+            trouves.unshift(racine);
+        }
+        return trouves;
+    }
+
+    function remplirListe(conteneur, lignes) {
+        const modele = conteneur.querySelector('template');
+        if (!modele) {
+            return;
+        }
+        Array.from(conteneur.children).forEach(function (enfant) {
+            if (enfant !== modele) {
+                enfant.remove();
+            }
+        });
+
+        if (!lignes || !lignes.length) {
+            const vide = document.createElement('p');
+            vide.className = 'widget-vide';
+            vide.textContent = conteneur.dataset.vide || 'Aucune donnée';
+            conteneur.appendChild(vide);
+            return;
+        }
+
+        lignes.forEach(function (ligne) {
+            const copie = modele.content.cloneNode(true);
+            copie.querySelectorAll('[data-champ]').forEach(function (champ) {
+                champ.textContent = formater(lireChemin(ligne, champ.dataset.champ), champ.dataset.format);
+            });
+            conteneur.appendChild(copie);
+        });
+    }
+
+    function remplir(conteneur, donnees) {
+        elements(conteneur, '[data-valeur]').forEach(function (element) {
+            const valeur = formater(lireChemin(donnees, element.dataset.valeur), element.dataset.format);
+            element.textContent = valeur + (element.dataset.suffixe || '');
+        });
+        elements(conteneur, '[data-liste]').forEach(function (element) {
+            remplirListe(element, lireChemin(donnees, element.dataset.liste));
+        });
+    }
+
+    function chargerWidget(conteneur) {
+        conteneur.classList.add('widget-chargement');
+
+        return fetch(conteneur.dataset.widgetUrl, {
+            credentials: 'same-origin',
+            headers: {
+                'Accept': 'application/json',
+                'X-Requested-With': 'XMLHttpRequest'
+            }
+        })
+            .then(function (response) {
+                return response.json().then(function (json) {
+                    if (!response.ok || !json.success) {
+                        throw new Error(json.error || 'Erreur ' + response.status);
+                    }
+                    return json.data;
+                });
+            })
+            .then(function (donnees) {
+                remplir(conteneur, donnees);
+                conteneur.dispatchEvent(new CustomEvent('widget:charge', {
+                    detail: donnees,
+                    bubbles: true
+                }));
+            })
+            .catch(function (erreur) {
+                conteneur.classList.add('widget-erreur');
+                console.error('❌ Widget ' + conteneur.dataset.widgetUrl + ' :', erreur);
+            })
+            .finally(function () {
+                conteneur.classList.remove('widget-chargement');
+            });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('[data-widget-url]').forEach(chargerWidget);
+    });
+
+    window.chargerWidget = chargerWidget;
+})();